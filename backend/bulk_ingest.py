@@ -0,0 +1,156 @@
+import json
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from storage import DUPLICATE
+
+_decoder = json.JSONDecoder()
+
+
+class BodyFormatError(ValueError):
+    pass
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[object], Optional[str]]]:
+    """Yield (item, error) per non-empty line of an NDJSON body as it arrives."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[object], Optional[str]]]:
+    """Yield (item, None) per element of a JSON array body without holding the whole array."""
+    source = chunks.__aiter__()
+    buffer, position, pending, exhausted = "", 0, b"", False
+    # start -> first (after "[") -> next (after an element) -> item (after ",") -> ... -> done
+    state = "start"
+
+    async def read_more() -> bool:
+        nonlocal buffer, position, pending, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = await source.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+            return False
+        pending += chunk
+        # Only decode complete UTF-8 sequences; a split character waits for the next chunk
+        try:
+            text, pending = pending.decode(), b""
+        except UnicodeDecodeError as e:
+            if e.end != len(pending):
+                raise BodyFormatError("Body is not valid UTF-8")
+            text, pending = pending[:e.start].decode(), pending[e.start:]
+        buffer = buffer[position:] + text
+        position = 0
+        return True
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position >= len(buffer):
+            if not await read_more():
+                break
+            continue
+
+        char = buffer[position]
+        if state == "start":
+            if char != "[":
+                raise BodyFormatError("Expected a JSON array")
+            state, position = "first", position + 1
+        elif state == "done":
+            raise BodyFormatError("Unexpected data after the JSON array")
+        elif char == "]" and state in ("first", "next"):
+            state, position = "done", position + 1
+        elif state == "next":
+            if char != ",":
+                raise BodyFormatError(f"Expected ',' or ']' at character {position}")
+            state, position = "item", position + 1
+        else:
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except ValueError:
+                # Possibly an element split across chunks
+                if await read_more():
+                    continue
+                raise BodyFormatError(f"Invalid JSON array element at character {position}")
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buffer) and isinstance(item, (int, float)) and await read_more():
+                continue
+            state, position = "next", end
+            yield item, None
+
+    if state != "done":
+        raise BodyFormatError("Incomplete JSON array")
+
+
+async def ingest_mood_entries(
+    moods,
+    items: AsyncIterator[Tuple[Optional[object], Optional[str]]],
+    build_document: Callable[[object], dict],
+    chunk_size: int = 500,
+) -> dict:
+    """Validate and insert mood entries in unordered chunks into the MoodRepository ``moods``.
+
+    ``build_document`` turns a raw item into a mood entry document or raises ``ValueError``.
+    Entries whose ``idempotency_key`` was already stored are reported as duplicates with
+    the id of the stored entry.
+    """
+    results: List[dict] = []
+    chunk: List[Tuple[int, dict]] = []
+    index = 0
+
+    async for item, error in items:
+        if error is None:
+            try:
+                chunk.append((index, build_document(item)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            results.append({"index": index, "status": "invalid", "error": error})
+        index += 1
+        if len(chunk) >= chunk_size:
+            results.extend(await _insert_chunk(moods, chunk))
+            chunk = []
+    if chunk:
+        results.extend(await _insert_chunk(moods, chunk))
+
+    results.sort(key=lambda result: result["index"])
+    counts = {"created": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"received": index, **counts, "results": results}
+
+
+async def _insert_chunk(moods, chunk: List[Tuple[int, dict]]) -> List[dict]:
+    errors = await moods.insert_many([document for _, document in chunk])
+
+    results, duplicate_keys = [], []
+    for (index, document), error in zip(chunk, errors):
+        if error is None:
+            results.append({"index": index, "status": "created", "id": document["id"]})
+        elif error == DUPLICATE:
+            duplicate_keys.append(document["idempotency_key"])
+            results.append({"index": index, "status": "duplicate", "idempotency_key": document["idempotency_key"]})
+        else:
+            results.append({"index": index, "status": "failed", "error": error})
+
+    if duplicate_keys:
+        existing = await moods.ids_for_keys(duplicate_keys)
+        for result in results:
+            if result["status"] == "duplicate":
+                result["id"] = existing.get(result.pop("idempotency_key"))
+    return results
@@ -0,0 +1,180 @@
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pagination import keyset_key
+from storage import Keyset
+
+# Rough token estimate (~4 characters per token for English text); only used for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the end of ``text`` so that it fits in ``max_tokens``."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return "…" + text[-(max_chars - 1):]
+
+
+def summary_watermark(summary_doc: dict) -> Keyset:
+    """(timestamp, id) of the last turn folded into a summary; reads continue after it."""
+    # Summaries saved without the id skip every turn at their timestamp, as they always did
+    return summary_doc["summarized_through"], summary_doc.get("summarized_through_id") or "\uffff"
+
+
+def format_turn(turn: dict) -> str:
+    return f"User: {turn['user_message']}\nMindWell: {turn['ai_response']}"
+
+
+class ConversationContext:
+    """Bounded prompt context for a chat session.
+
+    The last ``recent_turns`` turns are sent verbatim. Older turns are folded into a
+    running summary kept by the conversation repository. Folding happens in batches
+    of at most ``fold_batch`` turns (and ``max_context_tokens``) and merges only the new
+    turns into the previous summary, so neither the chat prompt nor the summarizer
+    prompt grows with the session length. A session that has fallen behind catches up
+    one batch at a time.
+
+    ``summarize(session_id, previous_summary, turns)`` returns the merged summary. After
+    a failed fold the session waits ``retry_delay`` seconds, doubling up to
+    ``max_retry_delay``, before folding again.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, str, List[dict]], Awaitable[str]],
+        recent_turns: int = 6,
+        fold_batch: int = 6,
+        summary_max_tokens: int = 400,
+        max_context_tokens: int = 3000,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+        clock=time.monotonic,
+    ):
+        self.summarize = summarize
+        self.recent_turns = recent_turns
+        self.fold_batch = fold_batch
+        self.summary_max_tokens = summary_max_tokens
+        self.max_context_tokens = max_context_tokens
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._clock = clock
+        self._folding = set()
+        # session_id -> (consecutive failures, earliest next attempt)
+        self._backoff: Dict[str, Tuple[int, float]] = {}
+
+    def render_system_message(self, base_prompt: str, summary: str, turns: List[dict]) -> str:
+        sections = [base_prompt]
+        if summary:
+            sections.append(f"Summary of the earlier conversation:\n{trim_to_tokens(summary, self.summary_max_tokens)}")
+
+        # Drop the oldest verbatim turns until the context fits the budget
+        budget = self.max_context_tokens - sum(estimate_tokens(section) for section in sections)
+        kept = []
+        for turn in reversed(turns):
+            text = format_turn(turn)
+            cost = estimate_tokens(text)
+            if cost > budget:
+                break
+            kept.append(text)
+            budget -= cost
+        if kept:
+            sections.append("Most recent conversation:\n" + "\n".join(reversed(kept)))
+        return "\n\n".join(sections)
+
+    async def load(self, conversations, session_id: str, pending: List[dict] = ()) -> Tuple[str, List[dict]]:
+        """Return the stored summary and the turns that have not been folded into it yet.
+
+        ``conversations`` is a ConversationRepository. ``pending`` are turns accepted but not
+        yet written to storage; they are newer than anything stored and are merged in.
+        """
+        summary_doc = await conversations.get_summary(session_id)
+        summary, after = "", None
+        if summary_doc:
+            summary = summary_doc["summary"]
+            after = summary_watermark(summary_doc)
+
+        # Only the newest turns can ever reach the prompt, even if folding has fallen behind
+        limit = self.recent_turns + self.fold_batch
+        turns = await conversations.recent(session_id, after, limit)
+        if pending:
+            stored_ids = {turn["id"] for turn in turns}
+            turns = sorted(turns + [turn for turn in pending if turn["id"] not in stored_ids], key=keyset_key)[-limit:]
+        return summary, turns
+
+    async def maybe_fold(self, conversations, session_id: str) -> bool:
+        """Fold older turns into the summary while a full batch is waiting. Returns True if folded."""
+        if session_id in self._folding:
+            return False
+        failures, retry_at = self._backoff.get(session_id, (0, 0.0))
+        if self._clock() < retry_at:
+            return False
+        self._folding.add(session_id)
+        folded = False
+        try:
+            while await self._fold(conversations, session_id):
+                folded = True
+        except Exception:
+            self._record_failure(session_id, failures + 1)
+            raise
+        finally:
+            self._folding.discard(session_id)
+        self._backoff.pop(session_id, None)
+        return folded
+
+    def _record_failure(self, session_id: str, failures: int):
+        now = self._clock()
+        if len(self._backoff) >= 10000:
+            # Sessions that failed and never came back
+            self._backoff = {key: value for key, value in self._backoff.items() if value[1] > now}
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** (failures - 1))
+        self._backoff[session_id] = (failures, now + delay)
+
+    async def _fold(self, conversations, session_id: str) -> bool:
+        summary_doc = await conversations.get_summary(session_id)
+        previous_summary, after = "", None
+        summarized_turns = 0
+        if summary_doc:
+            previous_summary = summary_doc["summary"]
+            summarized_turns = summary_doc.get("summarized_turns", 0)
+            after = summary_watermark(summary_doc)
+
+        pending = await conversations.count(session_id, after)
+        if pending < self.recent_turns + self.fold_batch:
+            return False
+
+        to_fold, budget = [], self.max_context_tokens
+        for turn in await conversations.oldest(session_id, after, self.fold_batch):
+            cost = estimate_tokens(format_turn(turn))
+            if cost > budget:
+                if to_fold:
+                    break
+                # A single turn longer than the budget is folded with its start cut off
+                turn = dict(turn, user_message=trim_to_tokens(turn["user_message"], budget // 2), ai_response=trim_to_tokens(turn["ai_response"], budget // 2))
+            to_fold.append(turn)
+            budget -= cost
+        summary = await self.summarize(session_id, previous_summary, to_fold)
+        await conversations.save_summary(session_id, {
+            "summary": trim_to_tokens(summary.strip(), self.summary_max_tokens),
+            "summarized_through": to_fold[-1]["timestamp"],
+            "summarized_through_id": to_fold[-1]["id"],
+            "summarized_turns": summarized_turns + len(to_fold),
+            "updated_at": datetime.now(timezone.utc),
+        })
+        return True
+
+
+def summary_request(previous_summary: Optional[str], turns: List[dict]) -> str:
+    """Prompt asking the LLM to merge new turns into an existing summary."""
+    transcript = "\n".join(format_turn(turn) for turn in turns)
+    return (
+        f"Current summary:\n{previous_summary or '(none yet)'}\n\n"
+        f"New conversation turns:\n{transcript}\n\n"
+        "Update the summary to include the new turns."
+    )
@@ -0,0 +1,23 @@
+import json
+import os
+
+from precompressed import PrecompressedPayload
+from serialization import dumps_bytes
+
+CRISIS_RESOURCES_PATH = os.environ.get(
+    'CRISIS_RESOURCES_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'crisis_resources.json'),
+)
+
+
+def load_crisis_resources(path: str = CRISIS_RESOURCES_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        resources = json.load(f)
+    for key in ("emergency_contacts", "immediate_steps"):
+        if not resources.get(key):
+            raise ValueError(f"{path} must define a non-empty {key!r}")
+    return resources
+
+
+def build_crisis_payload(resources: dict) -> PrecompressedPayload:
+    return PrecompressedPayload(dumps_bytes(resources))
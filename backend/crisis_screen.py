@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import string
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CRISIS_PHRASES_PATH = os.environ.get(
+    'CRISIS_PHRASES_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'crisis_phrases.json'),
+)
+
+# Words within a phrase may be separated by any run of whitespace or punctuation
+_SEPARATOR = r"[\W_]+"
+
+# Whitespace and punctuation become plain spaces before matching, so a phrase can only start
+# after a space or an apostrophe (which may be a quote); "'" and "’" stay because they occur
+# inside words
+_TO_SPACE = str.maketrans({char: " " for char in string.punctuation.replace("'", "") + string.whitespace + "‘“”—–…"})
+
+
+def load_crisis_phrases(path: str = CRISIS_PHRASES_PATH) -> Dict[str, List[str]]:
+    with open(path, encoding="utf-8") as f:
+        phrases = json.load(f)
+    if not phrases or not all(isinstance(items, list) and items for items in phrases.values()):
+        raise ValueError(f"{path} must map each category to a non-empty list of phrases")
+    return phrases
+
+
+def _phrase_words(phrase: str) -> Tuple[str, ...]:
+    return tuple(phrase.lower().replace("’", "'").replace("-", " ").split())
+
+
+def _word_pattern(word: str) -> str:
+    # A trailing "*" matches any word continuation ("suicid*" -> suicide, suicidal)
+    prefix = word.endswith("*")
+    word = word.rstrip("*")
+    # Apostrophes are optional and may be typographic: "dont" and "don’t" match "don't"
+    pattern = "['’]?".join(re.escape(part) for part in word.split("'"))
+    return pattern + (r"\w*" if prefix else "")
+
+
+def _alternatives(node: dict) -> List[str]:
+    return [_word_pattern(word) + _continuation(child) for word, child in sorted(node.items()) if word]
+
+
+def _continuation(node: dict) -> str:
+    """Pattern for the words that may follow the word leading to ``node`` in the trie."""
+    alternatives = _alternatives(node)
+    if not alternatives:
+        return ""
+    rest = _SEPARATOR + f"(?:{'|'.join(alternatives)})"
+    # "" marks the end of a phrase; longer phrases through this node make the rest optional
+    return f"(?:{rest})?" if "" in node else rest
+
+
+def _compile(root: dict) -> re.Pattern:
+    # The pattern starts with a two-character class, so the regex engine jumps between word
+    # starts instead of trying every position; each branch then starts with the literal first
+    # character of its words, which the engine checks before entering the branch
+    by_first_char: Dict[str, dict] = {}
+    for word, child in root.items():
+        by_first_char.setdefault(word[0], {})[word[1:]] = child
+    branches = []
+    for char, words in sorted(by_first_char.items()):
+        rests = [_word_pattern(rest) + _continuation(child) for rest, child in sorted(words.items())]
+        branches.append(re.escape(char) + "(?:" + "|".join(rests) + ")")
+    return re.compile("[ '’](?:" + "|".join(branches) + r")(?!\w)")
+
+
+class CrisisMatcher:
+    """Multi-phrase matcher compiled into a single regular expression over a word trie.
+
+    Phrases that share leading words share one branch, so a message is scanned once, in the
+    regex engine's C loop, however many phrases are configured. Matching is on whole words
+    of the lowercased message and tolerates punctuation or repeated spaces between words.
+    It is a fast pre-screen: negations ("I would never hurt myself") still match, which
+    only means resources are shown when they may not be needed.
+    """
+
+    def __init__(self, phrases: Dict[str, Iterable[str]]):
+        self._categories: Dict[Tuple[str, ...], str] = {}
+        self._prefixes: List[Tuple[re.Pattern, str]] = []
+        root: dict = {}
+        for category, items in phrases.items():
+            for phrase in items:
+                words = _phrase_words(phrase)
+                if not words:
+                    continue
+                if any(word.endswith("*") for word in words):
+                    exact = r"(?<!\w)" + _SEPARATOR.join(_word_pattern(word) for word in words) + r"(?!\w)"
+                    self._prefixes.append((re.compile(exact), category))
+                else:
+                    self._categories[tuple(word.replace("'", "") for word in words)] = category
+                node = root
+                for word in words:
+                    node = node.setdefault(word, {})
+                node[""] = {}
+
+        self.pattern = _compile(root)
+
+    def _category(self, matched: str) -> Optional[str]:
+        words = tuple(re.findall(r"[^\W_]+", re.sub(r"['’]", "", matched)))
+        category = self._categories.get(words)
+        if category is not None:
+            return category
+        for pattern, category in self._prefixes:
+            if pattern.fullmatch(matched[1:]):
+                return category
+        return None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " " + text.lower().translate(_TO_SPACE)
+
+    def search(self, text: str) -> bool:
+        return self.pattern.search(self.normalize(text)) is not None
+
+    def categories(self, text: str) -> List[str]:
+        """Categories of all phrases found in ``text``, in order of first appearance."""
+        found = []
+        for match in self.pattern.finditer(self.normalize(text)):
+            category = self._category(match.group(0))
+            if category is not None and category not in found:
+                found.append(category)
+        return found
@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Dict, Sequence, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from metrics import Histogram
+
+# Read preferences accepted by MONGO_READ_PREFERENCE
+READ_PREFERENCES = {
+    "primary",
+    "primaryPreferred",
+    "secondary",
+    "secondaryPreferred",
+    "nearest",
+}
+
+
+def _int_env(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def mongo_client_options() -> dict:
+    """Connection pool settings for the Motor client, taken from the environment."""
+    read_preference = os.environ.get("MONGO_READ_PREFERENCE", "primary")
+    if read_preference not in READ_PREFERENCES:
+        raise ValueError(f"MONGO_READ_PREFERENCE must be one of {sorted(READ_PREFERENCES)}, got {read_preference!r}")
+
+    return {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS", 60000),
+        "waitQueueTimeoutMS": _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 10000),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 20000),
+        "readPreference": read_preference,
+    }
+
+
+def create_mongo_client(mongo_url: str = None, event_listeners: Sequence = ()) -> AsyncIOMotorClient:
+    """Create a non-blocking Motor client. No connection is opened until the first operation."""
+    mongo_url = mongo_url or os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    return AsyncIOMotorClient(mongo_url, event_listeners=list(event_listeners), **mongo_client_options())
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every command the driver sends, by command name and collection.
+
+    Durations are the driver's own round-trip measurements, so they exclude time spent
+    waiting for a pooled connection. Callbacks run on the driver's threads.
+    """
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self._lock = threading.Lock()
+        self._collections: Dict[Tuple[int, object], str] = {}
+
+    def started(self, event):
+        # getMore names its cursor id; the collection comes in a separate field
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        collection = target if isinstance(target, str) else ""
+        with self._lock:
+            self._collections[(event.request_id, event.connection_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop((event.request_id, event.connection_id), "")
+        self.histogram.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection, outcome=outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
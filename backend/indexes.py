@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Bump when INDEXES changes; the applied version is recorded in app_metadata
+INDEX_VERSION = 5
+
+# Every index this app manages carries this prefix, so reconciliation never touches indexes created by hand
+INDEX_PREFIX = "mh_"
+
+# Index options compared during reconciliation, with the server's value when the option is absent.
+# An existing index whose key or any of these differs from its declaration is dropped and recreated.
+RECONCILED_OPTIONS = {"unique": False, "sparse": False, "partialFilterExpression": None, "expireAfterSeconds": None}
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "conversations": [
+        # get_chat_history and the chat context loader: session_id filter, (timestamp, id) keyset order
+        IndexModel([("session_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)], name="mh_session_id_timestamp"),
+    ],
+    "conversation_summaries": [
+        IndexModel([("session_id", ASCENDING)], name="mh_session_id", unique=True),
+    ],
+    "mood_entries": [
+        # get_mood_history: newest first, (timestamp, id) keyset order
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)], name="mh_timestamp"),
+        # Retried bulk uploads: an idempotency key is stored at most once
+        IndexModel(
+            [("idempotency_key", ASCENDING)],
+            name="mh_idempotency_key",
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}},
+        ),
+    ],
+    "mood_daily": [
+        # One rollup per UTC day; range reads by date
+        IndexModel([("date", ASCENDING)], name="mh_date", unique=True),
+    ],
+    "resources": [
+        # get_resources with a category, and distinct("category")
+        IndexModel([("category", ASCENDING), ("timestamp", DESCENDING)], name="mh_category_timestamp"),
+        # get_resources without a category
+        IndexModel([("timestamp", DESCENDING)], name="mh_timestamp"),
+        # get_resource
+        IndexModel([("id", ASCENDING)], name="mh_id"),
+    ],
+}
+
+# Representative queries issued by the API routes: (collection, filter, sort or None).
+# Grouped by the index each one relies on; a route that adds a query adds it here too.
+ROUTE_QUERIES = [
+    # conversations.mh_session_id_timestamp: chat history pages, context recent/oldest turns
+    ("conversations", {"session_id": "explain-check"}, [("timestamp", ASCENDING), ("id", ASCENDING)]),
+    ("conversations", {"$and": [{"session_id": "explain-check"}, {"$or": [
+        {"timestamp": {"$gt": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+        {"timestamp": datetime(2000, 1, 1, tzinfo=timezone.utc), "id": {"$gt": "explain-check"}},
+    ]}]}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("conversations", {"$and": [{"session_id": "explain-check"}, {"$or": [
+        {"timestamp": {"$gt": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+        {"timestamp": datetime(2000, 1, 1, tzinfo=timezone.utc), "id": {"$gt": "explain-check"}},
+    ]}]}, [("timestamp", ASCENDING), ("id", ASCENDING)]),
+    # conversation_summaries.mh_session_id: the rolling summary of a session
+    ("conversation_summaries", {"session_id": "explain-check"}, None),
+    # mood_entries.mh_timestamp: history pages, and the analytics / export time range
+    ("mood_entries", {}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("mood_entries", {"$or": [
+        {"timestamp": {"$lt": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+        {"timestamp": datetime(2000, 1, 1, tzinfo=timezone.utc), "id": {"$lt": "explain-check"}},
+    ]}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("mood_entries", {"timestamp": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc), "$lt": datetime(2000, 2, 1, tzinfo=timezone.utc)}}, [("timestamp", ASCENDING)]),
+    # mood_entries.mh_idempotency_key: ids of retried bulk entries
+    ("mood_entries", {"idempotency_key": {"$in": ["explain-check"], "$type": "string"}}, None),
+    # mood_daily.mh_date: rollups for an analytics date range
+    ("mood_daily", {"date": {"$gte": "2000-01-01", "$lt": "2000-02-01"}}, [("date", ASCENDING)]),
+    # resources.mh_timestamp, mh_category_timestamp and mh_id
+    ("resources", {}, [("timestamp", DESCENDING)]),
+    ("resources", {"category": "explain-check"}, [("timestamp", DESCENDING)]),
+    ("resources", {"id": "explain-check"}, None),
+]
+
+
+async def reconcile_indexes(db) -> dict:
+    """Create missing managed indexes, drop managed ones no longer declared, and record the version."""
+    created, dropped = [], []
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        wanted = {model.document["name"]: model for model in models}
+        existing = {}
+        async for index in collection.list_indexes():
+            existing[index["name"]] = index
+
+        for name, index in list(existing.items()):
+            if not name.startswith(INDEX_PREFIX):
+                continue
+            model = wanted.get(name)
+            changed = model is not None and (
+                list(index["key"].items()) != list(model.document["key"].items())
+                or any(index.get(option, default) != model.document.get(option, default) for option, default in RECONCILED_OPTIONS.items())
+            )
+            if model is None or changed:
+                await collection.drop_index(name)
+                dropped.append(f"{collection_name}.{name}")
+                existing.pop(name)
+
+        missing = [model for name, model in wanted.items() if name not in existing]
+        if missing:
+            await collection.create_indexes(missing)
+            created.extend(f"{collection_name}.{model.document['name']}" for model in missing)
+
+    await db.app_metadata.update_one(
+        {"_id": "indexes"},
+        {"$set": {"version": INDEX_VERSION, "reconciled_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    return {"version": INDEX_VERSION, "created": created, "dropped": dropped}
+
+
+def plan_stages(plan) -> List[str]:
+    """All stage names in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+async def find_collection_scans(db) -> List[str]:
+    """Explain every route query and return the ones whose winning plan is a COLLSCAN."""
+    offenders = []
+    for collection_name, query, sort in ROUTE_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        if "COLLSCAN" in plan_stages(explanation["queryPlanner"]["winningPlan"]):
+            offenders.append(f"{collection_name} {query} sort={sort}")
+    return offenders
+
+
+async def ensure_indexes(db, explain_check: bool = False) -> dict:
+    result = await reconcile_indexes(db)
+    if explain_check:
+        offenders = await find_collection_scans(db)
+        if offenders:
+            raise RuntimeError("Queries fall back to a collection scan: " + "; ".join(offenders))
+    return result
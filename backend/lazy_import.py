@@ -0,0 +1,29 @@
+import importlib
+import threading
+
+
+class LazyImport:
+    """``module.name``, imported when first called instead of when the app is imported.
+
+    Calling the proxy calls the real object, so it stands in for a class or function.
+    """
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self._target = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        if self._target is None:
+            # May run on a worker thread (preloading) while a request needs it too
+            with self._lock:
+                if self._target is None:
+                    self._target = getattr(importlib.import_module(self.module), self.name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"LazyImport({self.module}.{self.name})"
@@ -0,0 +1,202 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+
+class SchedulerRejected(Exception):
+    """The request was not run; the client should retry after ``retry_after`` seconds."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFull(SchedulerRejected):
+    status_code = 503
+
+
+class SessionBusy(SchedulerRejected):
+    status_code = 429
+
+
+class QueueTimeout(SchedulerRejected):
+    status_code = 503
+
+
+class Ticket:
+    __slots__ = ("session_id", "enqueued_at", "deadline", "started_at", "released", "_future")
+
+    def __init__(self, session_id: str, enqueued_at: float, deadline: float):
+        self.session_id = session_id
+        self.enqueued_at = enqueued_at
+        self.deadline = deadline
+        self.started_at: Optional[float] = None
+        self.released = False
+        self._future = asyncio.get_running_loop().create_future()
+
+
+class LlmScheduler:
+    """Admission control for LLM calls.
+
+    At most ``max_in_flight`` calls run at once. Calls for the same session run one at a
+    time in arrival order, and sessions take free slots in the order their next call became
+    ready. A call that has not started ``queue_timeout`` seconds after it was queued is
+    dropped. New calls are rejected while ``max_queued`` calls are waiting (QueueFull) or
+    while their session already has ``max_per_session`` calls queued or running (SessionBusy).
+
+    Background calls, such as conversation summaries, only start when a slot is free and
+    no call is waiting; otherwise they are rejected with QueueFull, so they never delay or
+    crowd out a user's call.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_queued: int = 100,
+        max_per_session: int = 3,
+        queue_timeout: float = 10.0,
+        clock=time.monotonic,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_per_session = max_per_session
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+        self._in_flight = 0
+        self._queued = 0
+        # Next call of each session, once it is that session's turn, in the order they became ready
+        self._ready: Deque[Ticket] = deque()
+        # Every queued or running call, per session, oldest (the running or ready one) first
+        self._sessions: Dict[str, Deque[Ticket]] = {}
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._service_time = 1.0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_session = 0
+        self.expired = 0
+        self.admitted_background = 0
+        self.rejected_background = 0
+
+    def retry_after(self) -> int:
+        # Time for the calls ahead to drain through the free slots, using the average call length
+        return max(1, min(60, math.ceil((self._queued / self.max_in_flight + 1) * self._service_time)))
+
+    async def acquire(self, session_id: str, background: bool = False) -> Ticket:
+        if background and (self._queued or self._in_flight >= self.max_in_flight):
+            self.rejected_background += 1
+            raise QueueFull("The assistant is busy; background work is deferred", self.retry_after())
+        calls = self._sessions.get(session_id)
+        if calls is not None and len(calls) >= self.max_per_session:
+            self.rejected_session += 1
+            raise SessionBusy("Too many messages in progress for this session", self.retry_after())
+        if self._queued >= self.max_queued:
+            self.rejected_full += 1
+            raise QueueFull("The assistant is busy, please try again shortly", self.retry_after())
+
+        now = self._clock()
+        ticket = Ticket(session_id, now, now + self.queue_timeout)
+        self._queued += 1
+        calls = self._sessions.setdefault(session_id, deque())
+        calls.append(ticket)
+        if len(calls) == 1:
+            self._ready.append(ticket)
+            self._dispatch()
+
+        try:
+            if not ticket._future.done():
+                await asyncio.wait({ticket._future}, timeout=max(0.0, ticket.deadline - self._clock()))
+        except asyncio.CancelledError:
+            self._abandon(ticket)
+            raise
+        if not ticket._future.done():
+            self._abandon(ticket)
+            self.expired += 1
+            raise QueueTimeout("Timed out waiting for the assistant, please try again", self.retry_after())
+        if background:
+            self.admitted_background += 1
+        return ticket
+
+    def release(self, ticket: Ticket):
+        """Free the ticket's slot; safe to call more than once."""
+        if ticket.released or ticket.started_at is None:
+            return
+        ticket.released = True
+        self._in_flight -= 1
+        elapsed = self._clock() - ticket.started_at
+        self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self._next_in_session(ticket)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, session_id: str, background: bool = False):
+        ticket = await self.acquire(session_id, background)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _start(self, ticket: Ticket):
+        ticket.started_at = self._clock()
+        self._queued -= 1
+        self._in_flight += 1
+        self.admitted += 1
+        self._waits.append(ticket.started_at - ticket.enqueued_at)
+        ticket._future.set_result(None)
+
+    def _dispatch(self):
+        while self._ready and self._in_flight < self.max_in_flight:
+            self._start(self._ready.popleft())
+
+    def _next_in_session(self, ticket: Ticket):
+        calls = self._sessions[ticket.session_id]
+        calls.remove(ticket)
+        if calls:
+            self._ready.append(calls[0])
+        else:
+            del self._sessions[ticket.session_id]
+
+    def _abandon(self, ticket: Ticket):
+        if ticket._future.done():
+            # Started just as the waiter was cancelled
+            self.release(ticket)
+            return
+        ticket._future.cancel()
+        self._queued -= 1
+        calls = self._sessions[ticket.session_id]
+        if calls[0] is ticket:
+            self._ready.remove(ticket)
+            self._next_in_session(ticket)
+            self._dispatch()
+        else:
+            calls.remove(ticket)
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000, 1)
+
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "sessions": len(self._sessions),
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_session": self.rejected_session,
+            "expired": self.expired,
+            "admitted_background": self.admitted_background,
+            "rejected_background": self.rejected_background,
+            "wait_ms_p50": percentile(0.5),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else None,
+            "avg_call_ms": round(self._service_time * 1000, 1),
+        }
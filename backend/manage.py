@@ -0,0 +1,81 @@
+"""Maintenance commands, run from the backend directory: python manage.py --help"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional
+
+import typer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from migrations import apply_migrations  # noqa: E402
+from mood_rollups import check_mood_rollups, rebuild_mood_rollups  # noqa: E402
+from storage import create_storage  # noqa: E402
+from storage_mongo import MongoStorage  # noqa: E402
+
+cli = typer.Typer(help="Mental Health Resource API maintenance commands")
+
+
+def run_on_mongo(command, *args, **kwargs):
+    """Run ``command`` against the MongoDB database of STORAGE_ENGINE storage.
+
+    The mood_daily commands only apply to MongoDB, where rollups are a separate write that
+    can drift from the entries; SQLite updates them in the entry's own transaction.
+    """
+    storage = create_storage()
+    if not isinstance(storage, MongoStorage):
+        typer.echo(f"This command only applies to STORAGE_ENGINE=mongo, not {type(storage).__name__}.", err=True)
+        raise typer.Exit(code=2)
+
+    async def main():
+        try:
+            return await command(storage.db, *args, **kwargs)
+        finally:
+            await storage.close()
+
+    return asyncio.run(main())
+
+
+@cli.command("rebuild-mood-rollups")
+def rebuild_mood_rollups_command(
+    start: Optional[datetime] = typer.Option(None, "--from", help="First UTC day to rebuild"),
+    end: Optional[datetime] = typer.Option(None, "--to", help="UTC day after the last one to rebuild"),
+    batch_size: int = typer.Option(1000, help="Entries per read batch and rollups per write batch"),
+):
+    """Recompute mood_daily from mood_entries (all days, or the given range)."""
+    typer.echo(json.dumps(run_on_mongo(rebuild_mood_rollups, start, end, batch_size)))
+
+
+@cli.command("check-mood-rollups")
+def check_mood_rollups_command(
+    start: Optional[datetime] = typer.Option(None, "--from"),
+    end: Optional[datetime] = typer.Option(None, "--to"),
+    batch_size: int = typer.Option(1000),
+):
+    """Compare mood_daily with mood_entries; exits with status 1 if they differ."""
+    report = run_on_mongo(check_mood_rollups, start, end, batch_size)
+    typer.echo(json.dumps(report, indent=2))
+    if not report["consistent"]:
+        raise typer.Exit(code=1)
+
+
+@cli.command("migrate")
+def migrate_command():
+    """Create tables and indexes and apply pending one-time migrations to STORAGE_ENGINE storage.
+
+    The API also does this in the background at startup; run it to prepare a database ahead of a deploy.
+    """
+    async def main():
+        storage = create_storage()
+        try:
+            await storage.setup()
+            return await apply_migrations(storage)
+        finally:
+            await storage.close()
+
+    typer.echo(json.dumps({"applied": asyncio.run(main())}))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,72 @@
+"""One-time data migrations.
+
+Each migration runs once per database: ``apply_migrations`` records it in storage after it
+succeeds and skips it on later starts. Migrations must be safe to re-run, since a process
+can stop between applying one and recording it.
+"""
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Tuple
+
+from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RESOURCES = [
+    {
+        "title": "Understanding Anxiety: A Beginner's Guide",
+        "category": "anxiety",
+        "description": "Learn the basics of anxiety disorders and how they affect daily life.",
+        "content": "Anxiety is a normal human emotion that everyone experiences from time to time. However, when anxiety becomes persistent, excessive, and interferes with daily activities, it may be classified as an anxiety disorder. Common symptoms include excessive worry, restlessness, fatigue, difficulty concentrating, irritability, muscle tension, and sleep disturbances. Understanding these symptoms is the first step toward managing anxiety effectively.",
+        "url": "",
+    },
+    {
+        "title": "5-4-3-2-1 Grounding Technique",
+        "category": "coping-strategies",
+        "description": "A simple grounding exercise to help manage anxiety and panic.",
+        "content": "The 5-4-3-2-1 technique is a grounding exercise that uses your five senses to help you focus on the present moment: 5 things you can see, 4 things you can touch, 3 things you can hear, 2 things you can smell, and 1 thing you can taste. This technique helps interrupt anxious thoughts and brings your attention back to the here and now.",
+        "url": "",
+    },
+    {
+        "title": "Building a Daily Mindfulness Practice",
+        "category": "mindfulness",
+        "description": "Simple steps to incorporate mindfulness into your daily routine.",
+        "content": "Mindfulness is the practice of paying attention to the present moment without judgment. Start with just 5 minutes a day: find a quiet space, focus on your breath, and when your mind wanders, gently bring attention back to breathing. You can also practice mindful walking, eating, or listening. Consistency is more important than duration.",
+        "url": "",
+    },
+    {
+        "title": "When to Seek Professional Help",
+        "category": "professional-help",
+        "description": "Signs that indicate it's time to consult a mental health professional.",
+        "content": "Consider seeking professional help if you experience: persistent sadness or anxiety lasting more than 2 weeks, difficulty functioning at work or in relationships, thoughts of self-harm, substance abuse as a coping mechanism, sleep disturbances, or significant changes in appetite. Remember, seeking help is a sign of strength, not weakness.",
+        "url": "",
+    }
+]
+
+
+async def seed_sample_resources(storage: Storage):
+    # Databases that already have resources, seeded or not, are left alone
+    if await storage.resources.count() == 0:
+        now = datetime.now(timezone.utc)
+        await storage.resources.insert_many([dict(resource, id=str(uuid.uuid4()), timestamp=now) for resource in SAMPLE_RESOURCES])
+
+
+# Applied in this order; names are recorded, so never rename or reorder applied entries
+MIGRATIONS: List[Tuple[str, Callable[[Storage], Awaitable[None]]]] = [
+    ("0001_seed_sample_resources", seed_sample_resources),
+]
+
+
+async def apply_migrations(storage: Storage, migrations=MIGRATIONS) -> List[str]:
+    """Apply the migrations not yet recorded; returns the names of those applied now."""
+    applied = await storage.applied_migrations()
+    newly_applied = []
+    for name, migrate in migrations:
+        if name in applied:
+            continue
+        await migrate(storage)
+        await storage.record_migration(name)
+        logger.info("Applied migration %s", name)
+        newly_applied.append(name)
+    return newly_applied
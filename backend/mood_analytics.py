@@ -0,0 +1,124 @@
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from storage import utc_naive
+
+# Fields needed from each mood entry
+ANALYTICS_FIELDS = ("mood_level", "timestamp", "activities")
+
+ROLLING_WINDOWS = (7, 30)
+
+
+def _value(x) -> Optional[float]:
+    x = float(x)
+    return None if math.isnan(x) else round(x, 3)
+
+
+def empty_analytics() -> dict:
+    return {
+        "summary": {"entries": 0, "days": 0, "first": None, "last": None, "mean": None, "volatility": None, "mean_abs_daily_change": None},
+        "daily": [],
+        "weekly": [],
+        "activities": [],
+    }
+
+
+def compute_mood_analytics(entries: List[dict]) -> dict:
+    """Daily/weekly means, 7- and 30-day rolling averages, volatility and per-activity mood lift.
+
+    Everything is computed with NumPy array operations over the entries (bincount for the
+    day and week groups, cumulative sums over a dense day axis for the rolling windows).
+    Day and week boundaries are in UTC, and weeks start on Monday.
+    """
+    if not entries:
+        return empty_analytics()
+
+    levels = np.fromiter((entry["mood_level"] for entry in entries), dtype=np.float64, count=len(entries))
+    timestamps = np.array([utc_naive(entry["timestamp"]) for entry in entries], dtype="datetime64[us]")
+    days = timestamps.astype("datetime64[D]").astype(np.int64)
+
+    # Per-day means over the days that have entries
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    day_counts = np.bincount(day_index)
+    day_means = np.bincount(day_index, weights=levels) / day_counts
+
+    # Rolling means of the daily means over calendar-day windows; days without entries don't count
+    span = unique_days[-1] - unique_days[0] + 1
+    offsets = unique_days - unique_days[0]
+    dense_sum = np.zeros(span + 1)
+    dense_days = np.zeros(span + 1)
+    dense_sum[offsets + 1] = day_means
+    dense_days[offsets + 1] = 1
+    cum_sum, cum_days = np.cumsum(dense_sum), np.cumsum(dense_days)
+    rolling = {}
+    for window in ROLLING_WINDOWS:
+        end = offsets + 1
+        start = np.maximum(end - window, 0)
+        rolling[window] = (cum_sum[end] - cum_sum[start]) / (cum_days[end] - cum_days[start])
+
+    # Weeks start on Monday; 1970-01-01 (day 0) was a Thursday
+    week_starts = days - (days + 3) % 7
+    unique_weeks, week_index = np.unique(week_starts, return_inverse=True)
+    week_counts = np.bincount(week_index)
+    week_means = np.bincount(week_index, weights=levels) / week_counts
+
+    daily_changes = np.abs(np.diff(day_means))
+    order = np.argsort(timestamps)
+
+    day_labels = np.datetime_as_string(unique_days.astype("datetime64[D]")).tolist()
+    week_labels = np.datetime_as_string(unique_weeks.astype("datetime64[D]")).tolist()
+
+    return {
+        "summary": {
+            "entries": len(entries),
+            "days": len(unique_days),
+            "first": timestamps[order[0]].item().isoformat(),
+            "last": timestamps[order[-1]].item().isoformat(),
+            "mean": _value(levels.mean()),
+            "volatility": _value(day_means.std()),
+            "mean_abs_daily_change": _value(daily_changes.mean()) if len(daily_changes) else None,
+        },
+        "daily": [
+            {"date": date, "mean": _value(mean), "count": count, "rolling_7d": _value(r7), "rolling_30d": _value(r30)}
+            for date, mean, count, r7, r30 in zip(
+                day_labels, day_means.tolist(), day_counts.tolist(), rolling[7].tolist(), rolling[30].tolist()
+            )
+        ],
+        "weekly": [
+            {"week_start": week, "mean": _value(mean), "count": count}
+            for week, mean, count in zip(week_labels, week_means.tolist(), week_counts.tolist())
+        ],
+        "activities": activity_lift(entries, levels),
+    }
+
+
+def activity_lift(entries: List[dict], levels: np.ndarray) -> List[dict]:
+    """Average mood on entries with vs. without each activity, highest lift first."""
+    codes = {}
+    entry_ids, activity_ids = [], []
+    for position, entry in enumerate(entries):
+        for activity in set(entry.get("activities") or []):
+            entry_ids.append(position)
+            activity_ids.append(codes.setdefault(activity, len(codes)))
+    if not codes:
+        return []
+
+    activity_ids = np.asarray(activity_ids)
+    with_count = np.bincount(activity_ids, minlength=len(codes))
+    with_sum = np.bincount(activity_ids, weights=levels[np.asarray(entry_ids)], minlength=len(codes))
+    without_count = len(levels) - with_count
+
+    mean_with = with_sum / with_count
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_without = np.where(without_count > 0, (levels.sum() - with_sum) / without_count, np.nan)
+    lift = mean_with - mean_without
+
+    results = [
+        {"activity": activity, "entries": int(with_count[code]), "mean_with": _value(mean_with[code]),
+         "mean_without": _value(mean_without[code]), "lift": _value(lift[code])}
+        for activity, code in codes.items()
+    ]
+    results.sort(key=lambda item: (item["lift"] is None, -(item["lift"] or 0), -item["entries"]))
+    return results
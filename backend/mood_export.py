@@ -0,0 +1,111 @@
+import asyncio
+import csv
+import importlib.util
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Tuple
+
+# Rows per chunk: one CSV write, one Parquet row group
+EXPORT_CHUNK_ROWS = 5000
+
+EXPORT_COLUMNS = ("id", "timestamp", "mood_level", "notes", "activities")
+
+# Format -> (media type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def available_formats() -> List[str]:
+    # pyarrow is optional and only imported once a Parquet export starts
+    return [name for name in EXPORT_FORMATS if name != "parquet" or importlib.util.find_spec("pyarrow") is not None]
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Storage hands back naive UTC
+    return timestamp.replace(tzinfo=timezone.utc) if timestamp.tzinfo is None else timestamp.astimezone(timezone.utc)
+
+
+async def chunked(entries: AsyncIterator[dict], size: int) -> AsyncIterator[List[dict]]:
+    chunk = []
+    async for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def csv_chunks(entries: AsyncIterator[dict], chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """CSV with a header row; activities are a JSON array, so any activity text survives. One bytes chunk per ``chunk_rows`` entries."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+    async for chunk in chunked(entries, chunk_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (entry["id"], _utc(entry["timestamp"]).isoformat(), entry["mood_level"], entry.get("notes") or "", json.dumps(entry.get("activities") or [], ensure_ascii=False))
+            for entry in chunk
+        )
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """File-like target for the Parquet writer; bytes are handed on as soon as they are written."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+async def parquet_chunks(entries: AsyncIterator[dict], chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """Parquet with one row group per ``chunk_rows`` entries, so memory stays flat for any history size."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("mood_level", pa.int32()),
+        ("notes", pa.string()),
+        ("activities", pa.list_(pa.string())),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for chunk in chunked(entries, chunk_rows):
+            table = pa.Table.from_pydict({
+                "id": [entry["id"] for entry in chunk],
+                "timestamp": [_utc(entry["timestamp"]) for entry in chunk],
+                "mood_level": [entry["mood_level"] for entry in chunk],
+                "notes": [entry.get("notes") or "" for entry in chunk],
+                "activities": [list(entry.get("activities") or []) for entry in chunk],
+            }, schema=schema)
+            # Encoding and compressing a row group is CPU work; keep it off the event loop
+            await asyncio.to_thread(writer.write_table, table)
+            yield sink.drain()
+    finally:
+        # Writes the footer; an export with no rows is still a valid, empty file
+        writer.close()
+    yield sink.drain()
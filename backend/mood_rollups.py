@@ -0,0 +1,218 @@
+import math
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from pymongo import UpdateOne
+
+ROLLUP_COLLECTION = "mood_daily"
+
+# Activity names become field names under "activities", so the characters MongoDB reserves are swapped out
+_KEY_ESCAPES = {".": "．", "$": "＄"}
+
+
+def activity_key(activity: str) -> str:
+    for char, replacement in _KEY_ESCAPES.items():
+        activity = activity.replace(char, replacement)
+    return activity
+
+
+def activity_name(key: str) -> str:
+    for char, replacement in _KEY_ESCAPES.items():
+        key = key.replace(replacement, char)
+    return key
+
+
+def day_key(timestamp: datetime) -> str:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.strftime("%Y-%m-%d")
+
+
+def rollup_update(entry: dict) -> dict:
+    """Upsert document that adds one mood entry to its day's rollup."""
+    level = entry["mood_level"]
+    increments = {"count": 1, "sum": level, "sum_sq": level * level}
+    for activity in set(entry.get("activities") or []):
+        key = activity_key(activity)
+        increments[f"activities.{key}.count"] = 1
+        increments[f"activities.{key}.sum"] = level
+    return {
+        "$inc": increments,
+        "$min": {"min": level},
+        "$max": {"max": level},
+    }
+
+
+def rollup_bulk_updates(entries: List[dict]) -> List["UpdateOne"]:
+    """One merged upsert per day for a batch of new entries."""
+    # pymongo is imported on use, so the API can load the rollup helpers without the driver
+    from pymongo import UpdateOne
+
+    updates: Dict[str, dict] = {}
+    for entry in entries:
+        date = day_key(entry["timestamp"])
+        entry_update = rollup_update(entry)
+        merged = updates.get(date)
+        if merged is None:
+            updates[date] = entry_update
+            continue
+        for field, amount in entry_update["$inc"].items():
+            merged["$inc"][field] = merged["$inc"].get(field, 0) + amount
+        merged["$min"]["min"] = min(merged["$min"]["min"], entry_update["$min"]["min"])
+        merged["$max"]["max"] = max(merged["$max"]["max"], entry_update["$max"]["max"])
+    return [UpdateOne({"date": date}, update, upsert=True) for date, update in updates.items()]
+
+
+async def record_mood_rollup(db, entry: dict):
+    await db[ROLLUP_COLLECTION].update_one({"date": day_key(entry["timestamp"])}, rollup_update(entry), upsert=True)
+
+
+class DayAccumulator:
+    def __init__(self, date: str):
+        self.date = date
+        self.count = 0
+        self.sum = 0
+        self.sum_sq = 0
+        self.min = None
+        self.max = None
+        self.activities: Dict[str, Dict[str, int]] = {}
+
+    def add(self, entry: dict):
+        level = entry["mood_level"]
+        self.count += 1
+        self.sum += level
+        self.sum_sq += level * level
+        self.min = level if self.min is None else min(self.min, level)
+        self.max = level if self.max is None else max(self.max, level)
+        for activity in set(entry.get("activities") or []):
+            counters = self.activities.setdefault(activity_key(activity), {"count": 0, "sum": 0})
+            counters["count"] += 1
+            counters["sum"] += level
+
+    def document(self) -> dict:
+        return {
+            "date": self.date,
+            "count": self.count,
+            "sum": self.sum,
+            "sum_sq": self.sum_sq,
+            "min": self.min,
+            "max": self.max,
+            "activities": self.activities,
+        }
+
+
+def _range_query(start: Optional[datetime], end: Optional[datetime]) -> dict:
+    query = {}
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = start
+        if end:
+            query["timestamp"]["$lt"] = end
+    return query
+
+
+async def iter_daily_rollups(db, start: Optional[datetime] = None, end: Optional[datetime] = None, batch_size: int = 1000) -> AsyncIterator[dict]:
+    """Recompute rollups from raw entries, one day at a time, reading entries in timestamp order."""
+    cursor = db.mood_entries.find(
+        _range_query(start, end),
+        {"_id": 0, "mood_level": 1, "activities": 1, "timestamp": 1},
+    ).sort("timestamp", 1).batch_size(batch_size)
+
+    current = None
+    async for entry in cursor:
+        date = day_key(entry["timestamp"])
+        if current is None or current.date != date:
+            if current is not None:
+                yield current.document()
+            current = DayAccumulator(date)
+        current.add(entry)
+    if current is not None:
+        yield current.document()
+
+
+def _date_range_query(start: Optional[datetime], end: Optional[datetime]) -> dict:
+    query = {}
+    if start:
+        query.setdefault("date", {})["$gte"] = day_key(start)
+    if end:
+        query.setdefault("date", {})["$lt"] = day_key(end)
+    return query
+
+
+async def rebuild_mood_rollups(db, start: Optional[datetime] = None, end: Optional[datetime] = None, batch_size: int = 1000) -> dict:
+    """Replace rollups for whole days in [start, end) with values recomputed from mood_entries.
+
+    Pass day-aligned bounds. Entries logged while a day is being rebuilt can be counted
+    twice or missed, so run this while writes are paused, or follow it with ``check_mood_rollups``.
+    """
+    from pymongo import ReplaceOne
+
+    collection = db[ROLLUP_COLLECTION]
+    written, seen_dates, batch = 0, [], []
+    async for document in iter_daily_rollups(db, start, end, batch_size):
+        seen_dates.append(document["date"])
+        batch.append(ReplaceOne({"date": document["date"]}, document, upsert=True))
+        if len(batch) >= batch_size:
+            await collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        written += len(batch)
+
+    # Days that no longer have any entries
+    stale = _date_range_query(start, end)
+    stale["date"] = dict(stale.get("date", {}), **{"$nin": seen_dates})
+    deleted = (await collection.delete_many(stale)).deleted_count
+    return {"days_written": written, "days_deleted": deleted}
+
+
+def _rollup_differences(expected: dict, actual: dict) -> List[str]:
+    fields = [field for field in ("count", "sum", "sum_sq", "min", "max") if expected.get(field) != actual.get(field)]
+    if (expected.get("activities") or {}) != (actual.get("activities") or {}):
+        fields.append("activities")
+    return fields
+
+
+async def check_mood_rollups(db, start: Optional[datetime] = None, end: Optional[datetime] = None, batch_size: int = 1000) -> dict:
+    """Compare stored rollups with values recomputed from mood_entries."""
+    stored = {}
+    async for document in db[ROLLUP_COLLECTION].find(_date_range_query(start, end), {"_id": 0}):
+        stored[document["date"]] = document
+
+    mismatched, missing, checked = [], [], 0
+    async for expected in iter_daily_rollups(db, start, end, batch_size):
+        checked += 1
+        actual = stored.pop(expected["date"], None)
+        if actual is None:
+            missing.append(expected["date"])
+            continue
+        fields = _rollup_differences(expected, actual)
+        if fields:
+            mismatched.append({"date": expected["date"], "fields": fields})
+
+    return {
+        "consistent": not (mismatched or missing or stored),
+        "days_checked": checked,
+        "missing": missing,
+        "mismatched": mismatched,
+        "extra": sorted(stored),
+    }
+
+
+def summarize_rollup(document: dict) -> dict:
+    count = document["count"]
+    mean = document["sum"] / count
+    variance = max(document["sum_sq"] / count - mean * mean, 0.0)
+    return {
+        "date": document["date"],
+        "count": count,
+        "mean": round(mean, 3),
+        "std": round(math.sqrt(variance), 3),
+        "min": document["min"],
+        "max": document["max"],
+        "activities": {activity_name(key): value["count"] for key, value in (document.get("activities") or {}).items()},
+    }
+
@@ -0,0 +1,65 @@
+"""Chat client on the OpenAI SDK; unlike emergentintegrations' LlmChat it can stream a reply."""
+from typing import AsyncIterator, Dict, List, Optional
+
+# One SDK client (and connection pool) per API key, shared by every session
+_clients: Dict[Optional[str], object] = {}
+
+
+def _client(api_key: Optional[str]):
+    client = _clients.get(api_key)
+    if client is None:
+        from openai import AsyncOpenAI
+
+        # OPENAI_BASE_URL, when set, points the SDK at a compatible proxy
+        client = _clients[api_key] = AsyncOpenAI(api_key=api_key)
+    return client
+
+
+class UserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class OpenAIChat:
+    """Drop-in for ``LlmChat``: built the same way, with ``send_message`` and ``stream_message``.
+
+    Keeps the session's messages itself. A turn joins the history only once its reply is
+    complete, so a failed or abandoned stream leaves the history as it was.
+    """
+
+    def __init__(self, api_key: Optional[str], session_id: str, system_message: str, client=None):
+        self.session_id = session_id
+        self.messages: List[dict] = [{"role": "system", "content": system_message}]
+        self.model = "gpt-4o"
+        self.max_tokens: Optional[int] = None
+        self._client = client or _client(api_key)
+
+    def with_model(self, provider: str, model: str) -> "OpenAIChat":
+        if provider != "openai":
+            raise ValueError(f"OpenAIChat only serves OpenAI models, not {provider!r}")
+        self.model = model
+        return self
+
+    def with_max_tokens(self, max_tokens: int) -> "OpenAIChat":
+        self.max_tokens = max_tokens
+        return self
+
+    async def stream_message(self, user_message) -> AsyncIterator[str]:
+        """Yield the reply's text deltas as the API sends them."""
+        messages = self.messages + [{"role": "user", "content": user_message.text}]
+        options = {"max_tokens": self.max_tokens} if self.max_tokens else {}
+        stream = await self._client.chat.completions.create(model=self.model, messages=messages, stream=True, **options)
+        tokens = []
+        try:
+            async for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    tokens.append(token)
+                    yield token
+        finally:
+            # Frees the upstream connection when the client goes away mid-reply
+            await stream.close()
+        self.messages = messages + [{"role": "assistant", "content": "".join(tokens)}]
+
+    async def send_message(self, user_message) -> str:
+        return "".join([token async for token in self.stream_message(user_message)])
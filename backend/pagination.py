@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional, Set, Tuple
+
+from serialization import dumps_bytes
+from storage import Keyset, utc_naive
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(document: dict) -> str:
+    """Opaque cursor pointing just after ``document`` in (timestamp, id) order."""
+    payload = json.dumps({"t": document["timestamp"].isoformat(), "id": document["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_filter(query: dict, keyset: Optional[Keyset], direction: int) -> dict:
+    """Extend a MongoDB ``query`` to start after ``keyset`` when reading in ``direction`` over (timestamp, id)."""
+    if keyset is None:
+        return query
+    timestamp, last_id = keyset
+    operator = "$gt" if direction > 0 else "$lt"
+    after = {"$or": [
+        {"timestamp": {operator: timestamp}},
+        {"timestamp": timestamp, "id": {operator: last_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+def keyset_sort(direction: int) -> list:
+    return [("timestamp", direction), ("id", direction)]
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+def to_ndjson_line(document: dict) -> bytes:
+    return dumps_bytes(document) + b"\n"
+
+
+def keyset_key(document: dict) -> Tuple[datetime, str]:
+    return utc_naive(document["timestamp"]), document["id"]
+
+
+def pending_after(pending: Iterable[dict], cursor: Optional[str], seen_ids: Set[str]) -> List[dict]:
+    """Documents not yet in the database that sort after ``cursor`` (ascending) and were not already read."""
+    start = None
+    if cursor:
+        timestamp, last_id = decode_cursor(cursor)
+        start = (utc_naive(timestamp), last_id)
+    documents = [
+        dict(document, timestamp=utc_naive(document["timestamp"]))
+        for document in pending
+        if document["id"] not in seen_ids and (start is None or keyset_key(document) > start)
+    ]
+    documents.sort(key=keyset_key)
+    return documents
+
+
+def merge_pending_page(documents: List[dict], next_cursor: Optional[str], pending: List[dict], cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Append unflushed documents to the last page of an ascending listing."""
+    if next_cursor is not None or not pending:
+        return documents, next_cursor
+    extra = pending_after(pending, cursor, {document["id"] for document in documents})
+    if not extra:
+        return documents, None
+    documents = sorted(documents + extra, key=keyset_key)
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, encode_cursor(documents[-1])
+    return documents, None
+
+
+async def stream_ndjson(cursor, pending: Optional[List[dict]] = None, after: Optional[str] = None, limit: int = 0) -> AsyncIterator[bytes]:
+    """Serialize documents one at a time as they come off the database cursor, then any unflushed ones."""
+    pending_ids = {document["id"] for document in pending or []}
+    seen, sent = set(), 0
+    async for document in cursor:
+        if document.get("id") in pending_ids:
+            seen.add(document["id"])
+        sent += 1
+        yield to_ndjson_line(document)
+    for document in pending_after(pending or [], after, seen):
+        if limit and sent >= limit:
+            return
+        sent += 1
+        yield to_ndjson_line(document)
+
+
+async def fetch_page(documents: AsyncIterator[dict], limit: int) -> Tuple[list, Optional[str]]:
+    """Read up to ``limit`` documents (the source must be limited to ``limit + 1``) and the next-page cursor."""
+    documents = [document async for document in documents]
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(documents[-1])
@@ -0,0 +1,32 @@
+import gzip
+import hashlib
+from typing import Optional
+
+from fastapi.responses import Response
+
+from compression import encoded_etag, etag_matches, preferred_encoding
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    return preferred_encoding(accept_encoding, ("gzip",)) == "gzip"
+
+
+class PrecompressedPayload:
+    """A response body encoded once, kept as identity and gzip bytes with a strong ETag per encoding."""
+
+    def __init__(self, body: bytes, media_type: str = "application/json", max_age: int = 86400):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.cache_control = f"public, max-age={max_age}"
+
+    def response(self, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None) -> Response:
+        encoding = "gzip" if accepts_gzip(accept_encoding) else None
+        headers = {"ETag": encoded_etag(self.etag, encoding), "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(content=self.gzip_body, media_type=self.media_type, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from compression import compress, encoded_etag
+from serialization import dumps_bytes
+
+RESOURCE_FIELDS = ("id", "title", "category", "description", "content", "url", "timestamp")
+
+# Returned by default; a resource's content comes from GET /api/resources/{id}
+SUMMARY_FIELDS = tuple(field for field in RESOURCE_FIELDS if field != "content")
+
+
+def parse_fields(value: Optional[str]) -> Tuple[str, ...]:
+    """Requested resource fields in canonical order; id is always included."""
+    if not value:
+        return SUMMARY_FIELDS
+    fields = {"id"}
+    for name in value.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in RESOURCE_FIELDS:
+            raise ValueError(f"Unknown resource field: {name}")
+        fields.add(name)
+    return tuple(field for field in RESOURCE_FIELDS if field in fields)
+
+
+class CachedPayload:
+    __slots__ = ("body", "etag", "_encoded")
+
+    def __init__(self, payload: dict):
+        self.body = dumps_bytes(payload)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self._encoded: Dict[str, bytes] = {}
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return encoded_etag(self.etag, encoding)
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body compressed with ``encoding``, compressed once per payload."""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+
+class CatalogSnapshot:
+    """Resources loaded with SUMMARY_FIELDS; payloads per (category, fields) are built on first use."""
+
+    def __init__(self, version: int, resources: List[dict], categories: List[str]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._all = resources
+        self._by_category: Dict[str, List[dict]] = {}
+        for resource in resources:
+            self._by_category.setdefault(resource["category"], []).append(resource)
+        self._payloads: Dict[Tuple[Optional[str], Tuple[str, ...]], CachedPayload] = {}
+        self.categories = CachedPayload({"categories": categories})
+
+    def resources(self, category: Optional[str] = None, fields: Tuple[str, ...] = SUMMARY_FIELDS) -> CachedPayload:
+        key = (category or None, fields)
+        payload = self._payloads.get(key)
+        if payload is None:
+            items = self._by_category.get(category, []) if category else self._all
+            if fields != SUMMARY_FIELDS:
+                items = [{field: item[field] for field in fields if field in item} for item in items]
+            payload = self._payloads[key] = CachedPayload({"resources": items})
+        return payload
+
+
+class ResourceCatalogCache:
+    """Read-through cache of the serialized resource catalog.
+
+    ``loader`` returns the resource list with SUMMARY_FIELDS (newest first) and the distinct
+    categories.
+    Writes in this process call ``invalidate``. ``ttl`` bounds how long other workers'
+    writes can go unseen.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Tuple[List[dict], List[str]]]], ttl: float = 300.0):
+        self._loader = loader
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def invalidate(self):
+        self.version += 1
+        self._snapshot = None
+
+    def _fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and time.monotonic() - snapshot.loaded_at < self.ttl
+        )
+
+    async def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            self.hits += 1
+            return snapshot
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            version = self.version
+            resources, categories = await self._loader()
+            self.loads += 1
+            snapshot = CatalogSnapshot(version, resources, categories)
+            # A write that landed while loading makes this snapshot stale; serve it once but don't keep it
+            if version == self.version:
+                self._snapshot = snapshot
+            return snapshot
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+# Leading and trailing punctuation does not change what a short opener asks for
+_EDGE_PUNCTUATION = re.compile(r"^[\W_]+|[\W_]+$")
+
+
+def normalize_prompt(text: str) -> str:
+    """Canonical form of a message for exact matching: case, spacing and end punctuation are ignored."""
+    text = unicodedata.normalize("NFKC", text).replace("’", "'").lower()
+    return _EDGE_PUNCTUATION.sub("", _WHITESPACE.sub(" ", text))
+
+
+def response_key(normalized: str, system_prompt: str, model_params: dict) -> str:
+    # A changed system prompt or model setting makes every earlier answer unreachable
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    material = json.dumps([normalized, prompt_hash, model_params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Exact-match cache of LLM replies to the first message of a new session.
+
+    Entries are kept in least-recently-used order and evicted from the front once their
+    total size passes ``max_bytes``; an entry older than ``ttl`` seconds is a miss, so a
+    popular opener is answered afresh at least that often. Only messages of at most
+    ``max_prompt_chars`` characters are cached: long first messages are personal and
+    rarely repeated word for word.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 1_000_000,
+        ttl: float = 3600.0,
+        max_prompt_chars: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_prompt_chars = max_prompt_chars
+        self._clock = clock
+        # key -> (response, size in bytes, stored at, seconds the LLM call took)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.seconds_saved = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, message: str, system_prompt: str, model_params: dict) -> Optional[str]:
+        """Cache key for ``message``, or None (counted as a bypass) when it is not cacheable."""
+        normalized = normalize_prompt(message)
+        if not normalized or len(normalized) > self.max_prompt_chars:
+            self.bypasses += 1
+            return None
+        return response_key(normalized, system_prompt, model_params)
+
+    def bypass(self):
+        self.bypasses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() - entry[2] >= self.ttl:
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.seconds_saved += entry[3]
+        return entry[0]
+
+    def put(self, key: str, response: str, latency: float):
+        size = len(key) + len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (response, size, self._clock(), latency)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_ms": round(self.seconds_saved * 1000, 1),
+            "avg_latency_saved_ms": round(self.seconds_saved * 1000 / self.hits, 1) if self.hits else 0.0,
+        }
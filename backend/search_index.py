@@ -0,0 +1,306 @@
+import bisect
+import heapq
+import html
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its of on or "
+    "that the their there this to was what when where which who will with you your".split()
+)
+
+# Per-field weights applied to term frequencies and lengths (BM25F-style)
+FIELD_WEIGHTS = {"title": 3.0, "description": 2.0, "content": 1.0}
+
+# The last query word is completed to at most this many of the most common indexed terms
+MAX_PREFIX_EXPANSIONS = 16
+
+
+class _Postings:
+    """Documents containing one term with their weighted term frequencies.
+
+    ``arrays`` turns them into BM25 impacts (the term-frequency part of the score, before idf)
+    held twice: by document id for lookups, and by descending impact for top-k pruning (the
+    latter negated, so a cutoff is one ascending ``searchsorted``). Impacts depend on the
+    average document length, so they are recomputed on first use after any document is added.
+    """
+
+    __slots__ = ("doc_ids", "frequencies", "_arrays")
+
+    def __init__(self):
+        self.doc_ids: List[int] = []
+        self.frequencies: List[float] = []
+        self._arrays = None
+
+    def append(self, doc_id: int, frequency: float):
+        self.doc_ids.append(doc_id)
+        self.frequencies.append(frequency)
+
+    def arrays(self, lengths: np.ndarray, average_length: float, k1: float, b: float):
+        cached = self._arrays
+        if cached is not None and cached[0] == average_length and len(cached[1]) == len(self.doc_ids):
+            return cached[1:5]
+        if cached is None:
+            doc_ids = np.asarray(self.doc_ids, dtype=np.int64)
+            frequencies = np.asarray(self.frequencies)
+            order = None
+        else:
+            # Postings only grow at the end and an add barely moves the average, so the previous
+            # arrays are extended and the previous order, nearly sorted, is re-sorted (timsort is
+            # close to linear on such input)
+            _, doc_ids, _, _, _, frequencies, order = cached
+            known = len(doc_ids)
+            if known < len(self.doc_ids):
+                doc_ids = np.concatenate((doc_ids, np.asarray(self.doc_ids[known:], dtype=np.int64)))
+                frequencies = np.concatenate((frequencies, np.asarray(self.frequencies[known:])))
+                order = np.concatenate((order, np.arange(known, len(doc_ids))))
+        impacts = frequencies * (k1 + 1) / (frequencies + k1 * (1 - b + b * lengths[doc_ids] / average_length))
+        order = np.argsort(-impacts, kind="stable") if order is None else order[np.argsort(-impacts[order], kind="stable")]
+        self._arrays = (average_length, doc_ids, impacts, doc_ids[order], -impacts[order], frequencies, order)
+        return self._arrays[1:5]
+
+
+class ResourceSearchIndex:
+    """In-process inverted index over resource title, description and content with BM25 ranking.
+
+    Queries return the exact BM25 top-k without scoring every matching document: a first
+    pass over the highest-impact postings of each word gives a score threshold, and only
+    postings that could still reach it are scored. The last query word also matches as a
+    prefix (search-as-you-type), scoring as its best-matching completion.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, _Postings] = {}
+        self._vocabulary: List[str] = []
+        self._new_terms: List[str] = []
+        self._completions: Dict[str, List[str]] = {}
+        self._documents: List[dict] = []
+        self._ids: Dict[str, int] = {}
+        self._lengths: List[float] = []
+        self._category_codes: Dict[str, int] = {}
+        self._categories: List[int] = []
+        self._arrays = None
+        self._total_length = 0.0
+
+    @classmethod
+    def from_resources(cls, resources: Iterable[dict], **options) -> "ResourceSearchIndex":
+        """An index over ``resources``. Pure CPU work, so callers on an event loop run it in a thread."""
+        index = cls(**options)
+        for resource in resources:
+            index.add(resource)
+        # Sort the vocabulary here rather than in the first prefix query
+        index._vocabulary_range("")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._documents)
+
+    def add(self, resource: dict) -> bool:
+        """Index a resource; returns False if its id is already indexed."""
+        if resource["id"] in self._ids:
+            return False
+        doc_id = len(self._documents)
+        self._ids[resource["id"]] = doc_id
+        self._documents.append(resource)
+
+        frequencies: Counter = Counter()
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for token, occurrences in Counter(TOKEN_PATTERN.findall((resource.get(field) or "").lower())).items():
+                if token not in STOPWORDS:
+                    frequencies[token] += weight * occurrences
+                    length += weight * occurrences
+
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+                self._new_terms.append(term)
+            postings.append(doc_id, frequency)
+
+        self._lengths.append(length)
+        self._categories.append(self._category_codes.setdefault(resource.get("category"), len(self._category_codes)))
+        self._total_length += length
+        return True
+
+    def _vocabulary_range(self, prefix: str) -> List[str]:
+        if self._new_terms:
+            # A bulk build re-sorts once; a few incremental additions are inserted in place
+            if len(self._new_terms) > 1000:
+                self._vocabulary = sorted(self._postings)
+            else:
+                for term in self._new_terms:
+                    bisect.insort(self._vocabulary, term)
+            self._new_terms = []
+            self._completions.clear()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "￿")
+        return self._vocabulary[start:end]
+
+    def _complete(self, prefix: str) -> List[str]:
+        terms = self._vocabulary_range(prefix)
+        if len(terms) <= MAX_PREFIX_EXPANSIONS:
+            return terms
+        completions = self._completions.get(prefix)
+        if completions is None:
+            if len(self._completions) >= 10000:
+                self._completions.clear()
+            # Keep the exact word plus the most common completions
+            completions = self._completions[prefix] = heapq.nsmallest(
+                MAX_PREFIX_EXPANSIONS, terms, key=lambda term: (term != prefix, -len(self._postings[term].doc_ids))
+            )
+        return completions
+
+    def query_terms(self, query: str, prefix: bool = True) -> List[List[str]]:
+        """Index terms for each query word; only the last word is prefix-expanded."""
+        words = TOKEN_PATTERN.findall(query.lower())
+        groups = []
+        for position, word in enumerate(words):
+            if position < len(words) - 1 or not prefix:
+                if word not in STOPWORDS and word in self._postings:
+                    groups.append([word])
+                continue
+            terms = self._complete(word)
+            if terms:
+                groups.append(terms)
+        return groups
+
+    def _document_arrays(self):
+        # Extended rather than rebuilt after additions, so the first query after an add stays cheap
+        lengths, category_codes = self._arrays or (np.zeros(0), np.zeros(0, dtype=np.int64))
+        known = len(lengths)
+        if known < len(self._lengths):
+            lengths = np.concatenate((lengths, np.asarray(self._lengths[known:])))
+            category_codes = np.concatenate((category_codes, np.asarray(self._categories[known:], dtype=np.int64)))
+            self._arrays = (lengths, category_codes)
+        return lengths, category_codes, self._category_codes
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None, prefix: bool = True) -> dict:
+        groups = self.query_terms(query, prefix)
+        count = len(self._documents)
+        if not groups or not count:
+            return {"results": []}
+
+        lengths, category_codes, codes = self._document_arrays()
+        if category is not None and category not in codes:
+            return {"results": []}
+        category_code = codes.get(category)
+        average_length = self._total_length / count or 1.0
+
+        # Per group: (idf, doc ids, impacts, doc ids by impact, negated impacts by impact) for each term
+        scored_groups = []
+        for terms in groups:
+            scored_terms = []
+            for term in terms:
+                arrays = self._postings[term].arrays(lengths, average_length, self.k1, self.b)
+                df = len(arrays[0])
+                scored_terms.append((math.log(1 + (count - df + 0.5) / (df + 0.5)), *arrays))
+            scored_groups.append(scored_terms)
+
+        def exact_scores(candidates: np.ndarray) -> np.ndarray:
+            total = np.zeros(len(candidates))
+            for scored_terms in scored_groups:
+                best = total if len(scored_terms) == 1 else np.zeros(len(candidates))
+                for idf, doc_ids, impacts, _, _ in scored_terms:
+                    positions = doc_ids.searchsorted(candidates)
+                    np.minimum(positions, len(doc_ids) - 1, out=positions)
+                    term_scores = np.where(doc_ids[positions] == candidates, idf * impacts[positions], 0.0)
+                    if best is total:
+                        total += term_scores
+                    else:
+                        np.maximum(best, term_scores, out=best)
+                if best is not total:
+                    total += best
+            return total
+
+        def gather(take) -> np.ndarray:
+            parts = [by_impact[:take(idf, negated)] for scored_terms in scored_groups for idf, _, _, by_impact, negated in scored_terms]
+            candidates = np.unique(np.concatenate(parts))
+            if category_code is not None:
+                candidates = candidates[category_codes[candidates] == category_code]
+            return candidates
+
+        # The best few postings of each term give a lower bound on the k-th best score
+        candidates = gather(lambda idf, negated: 4 * limit)
+        scores = exact_scores(candidates)
+        if len(scores) >= limit:
+            threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            # A document reaching the threshold scores at least threshold / len(groups) on some word;
+            # the slack keeps documents tied with the threshold despite rounding in bound / idf
+            bound = threshold / len(scored_groups) * (1 - 1e-9)
+            candidates = gather(lambda idf, negated: int(negated.searchsorted(-bound / idf, side="right")))
+            scores = exact_scores(candidates)
+        else:
+            candidates = gather(lambda idf, negated: len(negated))
+            scores = exact_scores(candidates)
+
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        matched = matched[np.lexsort((candidates[matched], -scores[matched]))]
+
+        highlight = highlight_pattern(term for terms in groups for term in terms)
+        results = []
+        for position in matched.tolist():
+            resource = self._documents[int(candidates[position])]
+            results.append({
+                "id": resource["id"],
+                "title": resource["title"],
+                "category": resource["category"],
+                "description": resource["description"],
+                "url": resource.get("url", ""),
+                "score": round(float(scores[position]), 4),
+                "snippet": snippet(resource.get("content") or resource.get("description") or "", highlight),
+            })
+        return {"results": results}
+
+
+def highlight_pattern(terms) -> "re.Pattern":
+    """Case-insensitive pattern for whole-token occurrences of any of ``terms``."""
+    terms = sorted(terms, key=len, reverse=True)
+    # The first-character class lets the scan skip most positions before trying the alternatives
+    first = "".join(sorted({term[0] for term in terms}))
+    return re.compile(rf"(?<![a-z0-9])(?=[{first}])(?:{'|'.join(terms)})(?![a-z0-9])", re.IGNORECASE)
+
+
+def snippet(text: str, highlight: "re.Pattern", width: int = 160) -> str:
+    """HTML-escaped excerpt of ``text`` around the densest run of matches, with matches in <mark>."""
+    matches = list(highlight.finditer(text))
+    if not matches:
+        return html.escape(text[:width]) + ("…" if len(text) > width else "")
+
+    # Window start that covers the most matches
+    best_start, best_count, right = matches[0].start(), 0, 0
+    for left, match in enumerate(matches):
+        while right < len(matches) and matches[right].end() - match.start() <= width:
+            right += 1
+        if right - left > best_count:
+            best_start, best_count = match.start(), right - left
+
+    start = max(0, best_start - width // 4)
+    if start:
+        # Don't cut a word in half
+        space = text.rfind(" ", 0, start)
+        start = space + 1 if space != -1 and start - space < 20 else start
+    end = min(len(text), start + width)
+
+    parts, position = [], start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append("<mark>" + html.escape(text[match.start():match.end()]) + "</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
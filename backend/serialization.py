@@ -0,0 +1,13 @@
+import json
+from datetime import datetime
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(payload) -> bytes:
+    """Compact JSON encoding of Mongo documents, with datetimes in ISO 8601 like FastAPI's encoder."""
+    return json.dumps(payload, default=json_default, separators=(",", ":")).encode()
@@ -1,18 +1,44 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
 import uuid
 from datetime import datetime, timezone
 import asyncio
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+import importlib
+import logging
+import time
+from lazy_import import LazyImport
+from storage import LazyStorage, create_storage
+from migrations import apply_migrations
+from streaming import sse_chat_events
+from session_cache import SessionCache
+from chat_context import ConversationContext, summary_request
+from resource_cache import SUMMARY_FIELDS, CachedPayload, ResourceCatalogCache, parse_fields
+from compression import CompressionMiddleware, etag_matches, preferred_encoding
+from search_index import ResourceSearchIndex
+from crisis import build_crisis_payload, load_crisis_resources
+from crisis_screen import CrisisMatcher, load_crisis_phrases
+from llm_scheduler import LlmScheduler, SchedulerRejected
+from response_cache import ResponseCache
+from metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, Registry
+from starlette.background import BackgroundTask
+from mood_rollups import day_key, summarize_rollup
+from bulk_ingest import BodyFormatError, ingest_mood_entries, iter_json_array, iter_ndjson
+from mood_analytics import ANALYTICS_FIELDS, compute_mood_analytics
+from mood_export import EXPORT_FORMATS, available_formats, csv_chunks, parquet_chunks
+from serialization import dumps_bytes
+from pagination import NDJSON_MEDIA_TYPE, InvalidCursor, decode_cursor, fetch_page, merge_pending_page, stream_ndjson, wants_ndjson
+from write_behind import WriteBehindFull, WriteBehindQueue
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize FastAPI app
 app = FastAPI(title="Mental Health Resource API")
 
@@ -25,14 +51,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB connection
+# Responses below this many bytes are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+
+# Request, database and LLM timings, exposed at /api/metrics
+metrics_registry = Registry()
+request_latency = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+mongo_latency = metrics_registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time.", ("command", "collection", "outcome"))
+llm_latency = metrics_registry.histogram(
+    "llm_call_duration_seconds", "LLM call latency.", ("operation", "outcome"))
+# Added last so it is the outermost middleware and includes compression time
+app.add_middleware(MetricsMiddleware, histogram=request_latency)
+
+# Conversations, mood entries and resources live behind repositories; STORAGE_ENGINE picks mongo (default), sqlite or memory.
+# The engine and its client are created on first use, not at import.
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = MongoClient(MONGO_URL)
-db = client.mental_health_app
+def open_storage():
+    engine = os.environ.get('STORAGE_ENGINE', 'mongo')
+    event_listeners = []
+    if engine == 'mongo':
+        # Imported here so the MongoDB driver is only loaded when that engine is created
+        from database import MongoCommandTimer
+        event_listeners.append(MongoCommandTimer(mongo_latency))
+    return create_storage(
+        engine,
+        mongo_url=MONGO_URL,
+        event_listeners=event_listeners,
+        # Keeps the app unready if set and any route query would scan a whole collection
+        explain_check=os.environ.get('INDEX_EXPLAIN_CHECK', '').lower() in ('1', 'true', 'yes'),
+        path=os.environ.get('SQLITE_PATH', 'mental_health.db'),
+    )
+
+storage = LazyStorage(open_storage)
 
 # OpenAI API Key
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 
+# "emergent" (emergentintegrations, the default) only returns whole replies, so /api/chat/stream
+# re-chunks them. "openai" streams token by token through the OpenAI SDK, but needs a key that works
+# against the OpenAI API (or OPENAI_BASE_URL) directly. Both build clients the same way.
+LLM_CLIENT = os.environ.get('LLM_CLIENT', 'emergent')
+
+# The LLM client library is slow to import, so it is loaded on first use (or preloaded after startup)
+if LLM_CLIENT == 'openai':
+    LlmChat = LazyImport('openai_chat', 'OpenAIChat')
+    UserMessage = LazyImport('openai_chat', 'UserMessage')
+else:
+    LlmChat = LazyImport('emergentintegrations.llm.chat', 'LlmChat')
+    UserMessage = LazyImport('emergentintegrations.llm.chat', 'UserMessage')
+
+# LlmChat clients are reused per session instead of being rebuilt on every turn
+session_cache = SessionCache(
+    max_size=int(os.environ.get('CHAT_SESSION_CACHE_SIZE', '1000')),
+    idle_ttl=float(os.environ.get('CHAT_SESSION_IDLE_TTL_SECONDS', '1800')),
+)
+
 # Pydantic models
 class ChatMessage(BaseModel):
     message: str
@@ -41,12 +117,17 @@ class ChatMessage(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     session_id: str
+    crisis: Optional[dict] = None
 
 class MoodEntry(BaseModel):
-    mood_level: int  # 1-10 scale
+    mood_level: int = Field(ge=1, le=10)
     notes: Optional[str] = ""
     activities: Optional[List[str]] = []
 
+class BulkMoodEntry(MoodEntry):
+    timestamp: Optional[datetime] = None
+    idempotency_key: Optional[str] = None
+
 class MoodResponse(BaseModel):
     id: str
     mood_level: int
@@ -89,102 +170,432 @@ Important guidelines:
 
 Remember: You're here to support, listen, and guide - not to diagnose or provide medical treatment."""
 
-# Initialize sample resources
-def init_sample_resources():
-    sample_resources = [
-        {
-            "id": str(uuid.uuid4()),
-            "title": "Understanding Anxiety: A Beginner's Guide",
-            "category": "anxiety",
-            "description": "Learn the basics of anxiety disorders and how they affect daily life.",
-            "content": "Anxiety is a normal human emotion that everyone experiences from time to time. However, when anxiety becomes persistent, excessive, and interferes with daily activities, it may be classified as an anxiety disorder. Common symptoms include excessive worry, restlessness, fatigue, difficulty concentrating, irritability, muscle tension, and sleep disturbances. Understanding these symptoms is the first step toward managing anxiety effectively.",
-            "url": "",
-            "timestamp": datetime.now(timezone.utc)
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "title": "5-4-3-2-1 Grounding Technique",
-            "category": "coping-strategies",
-            "description": "A simple grounding exercise to help manage anxiety and panic.",
-            "content": "The 5-4-3-2-1 technique is a grounding exercise that uses your five senses to help you focus on the present moment: 5 things you can see, 4 things you can touch, 3 things you can hear, 2 things you can smell, and 1 thing you can taste. This technique helps interrupt anxious thoughts and brings your attention back to the here and now.",
-            "url": "",
-            "timestamp": datetime.now(timezone.utc)
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "title": "Building a Daily Mindfulness Practice",
-            "category": "mindfulness",
-            "description": "Simple steps to incorporate mindfulness into your daily routine.",
-            "content": "Mindfulness is the practice of paying attention to the present moment without judgment. Start with just 5 minutes a day: find a quiet space, focus on your breath, and when your mind wanders, gently bring attention back to breathing. You can also practice mindful walking, eating, or listening. Consistency is more important than duration.",
-            "url": "",
-            "timestamp": datetime.now(timezone.utc)
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "title": "When to Seek Professional Help",
-            "category": "professional-help",
-            "description": "Signs that indicate it's time to consult a mental health professional.",
-            "content": "Consider seeking professional help if you experience: persistent sadness or anxiety lasting more than 2 weeks, difficulty functioning at work or in relationships, thoughts of self-harm, substance abuse as a coping mechanism, sleep disturbances, or significant changes in appetite. Remember, seeking help is a sign of strength, not weakness.",
-            "url": "",
-            "timestamp": datetime.now(timezone.utc)
-        }
-    ]
-    
-    # Check if resources already exist
-    if db.resources.count_documents({}) == 0:
-        db.resources.insert_many(sample_resources)
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a supportive mental health conversation between a user and MindWell.
+Merge the new turns into the current summary. Keep the user's main concerns, feelings, circumstances, coping strategies already suggested, and any safety concerns.
+Write in the third person, in at most a few short paragraphs, without quoting the conversation."""
+
+async def summarize_turns(session_id: str, previous_summary: str, turns: List[dict]) -> str:
+    chat = LlmChat(
+        api_key=OPENAI_API_KEY,
+        session_id=f"summary-{uuid.uuid4()}",
+        system_message=SUMMARY_SYSTEM_PROMPT
+    ).with_model("openai", "gpt-4o").with_max_tokens(chat_context.summary_max_tokens)
+    # Runs only on an idle LLM slot; while the scheduler is busy the fold is rejected and retried later
+    async with llm_scheduler.slot(f"summary:{session_id}", background=True):
+        with llm_latency.time(operation="summary"):
+            return await asyncio.wait_for(chat.send_message(UserMessage(text=summary_request(previous_summary, turns))), LLM_CALL_TIMEOUT_SECONDS)
+
+# Prompt context per turn: a running summary plus the most recent turns verbatim
+chat_context = ConversationContext(
+    summarize=summarize_turns,
+    recent_turns=int(os.environ.get('CHAT_CONTEXT_RECENT_TURNS', '6')),
+    fold_batch=int(os.environ.get('CHAT_CONTEXT_FOLD_BATCH', '6')),
+    summary_max_tokens=int(os.environ.get('CHAT_CONTEXT_SUMMARY_MAX_TOKENS', '400')),
+    max_context_tokens=int(os.environ.get('CHAT_CONTEXT_MAX_TOKENS', '3000')),
+    retry_delay=float(os.environ.get('CHAT_CONTEXT_FOLD_RETRY_SECONDS', '5')),
+    max_retry_delay=float(os.environ.get('CHAT_CONTEXT_FOLD_MAX_RETRY_SECONDS', '300')),
+)
+
+# Default JSON page size for chat history
+CHAT_HISTORY_PAGE_SIZE = 100
+
+async def load_resource_catalog():
+    resources = await storage.resources.list(fields=SUMMARY_FIELDS)
+    categories = await storage.resources.categories()
+    return resources, categories
+
+# Serialized resource catalog; invalidated by create_resource
+resource_cache = ResourceCatalogCache(
+    load_resource_catalog,
+    ttl=float(os.environ.get('RESOURCE_CACHE_TTL_SECONDS', '300')),
+)
+
+# Ranked full-text search over resources; built at startup and extended by create_resource.
+# Each worker keeps its own index, so resources created through another worker show up after its restart.
+search_index = ResourceSearchIndex()
+
+async def build_search_index():
+    global search_index
+    resources = [resource async for resource in storage.resources.iter_all()]
+    # A large catalog takes seconds to index, which would stall every request on the event loop
+    index = await asyncio.to_thread(ResourceSearchIndex.from_resources, resources)
+    # Resources created while the index was being built; already indexed ones are skipped
+    for resource in search_index:
+        index.add(resource)
+    search_index = index
+    logger.info("Indexed %d resources for search", len(search_index))
+
+def cached_json_response(payload, if_none_match: Optional[str], accept_encoding: Optional[str] = None) -> Response:
+    encoding = preferred_encoding(accept_encoding) if len(payload.body) >= COMPRESSION_MIN_BYTES else None
+    headers = {"ETag": payload.etag_for(encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        # Compressed once per cached payload rather than by the middleware on every request
+        headers["Content-Encoding"] = encoding
+        return Response(content=payload.encoded(encoding), media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+# Crisis content is loaded and encoded once, so its endpoint never waits on the database or the JSON encoder
+CRISIS_RESOURCES = load_crisis_resources()
+crisis_payload = build_crisis_payload(CRISIS_RESOURCES)
+
+# Every chat message is screened for crisis language before the LLM is called
+crisis_matcher = CrisisMatcher(load_crisis_phrases())
+
+# Sent with the crisis resources when the LLM fails on a message that matched the screen
+CRISIS_FALLBACK_RESPONSE = (
+    "It sounds like you may be going through something really painful right now, and I'm glad you reached out. "
+    "I'm having trouble responding at the moment, but you don't have to face this alone. "
+    "Please contact one of the crisis resources below, or call 911 if you are in immediate danger."
+)
+
+def screen_message(message: str) -> Optional[dict]:
+    categories = crisis_matcher.categories(message)
+    if not categories:
+        return None
+    return {"categories": categories, **CRISIS_RESOURCES}
+
+# Mood entries per insert_many round trip on /api/mood/bulk
+MOOD_BULK_CHUNK_SIZE = int(os.environ.get('MOOD_BULK_CHUNK_SIZE', '500'))
+
+async def insert_conversations(conversations: List[dict]):
+    await storage.conversations.insert_many(conversations)
+
+# Chat transcripts are written in batches off the response path
+conversation_writer = WriteBehindQueue(
+    insert_conversations,
+    key=lambda conversation: conversation["session_id"],
+    max_batch=int(os.environ.get('CHAT_WRITE_BATCH_SIZE', '100')),
+    flush_interval=float(os.environ.get('CHAT_WRITE_FLUSH_INTERVAL_MS', '50')) / 1000,
+    max_queued=int(os.environ.get('CHAT_WRITE_QUEUE_SIZE', '10000')),
+    put_timeout=float(os.environ.get('CHAT_WRITE_PUT_TIMEOUT_SECONDS', '2')),
+    # Lost connections are retried until they succeed; documents the database rejects are dropped
+    is_transient=lambda error: storage.is_transient_error(error),
+)
+
+# Caps concurrent LLM calls, runs each session's calls in order and sheds load when the queue is full
+llm_scheduler = LlmScheduler(
+    max_in_flight=int(os.environ.get('LLM_MAX_IN_FLIGHT', '8')),
+    max_queued=int(os.environ.get('LLM_MAX_QUEUED', '100')),
+    max_per_session=int(os.environ.get('LLM_MAX_PER_SESSION', '3')),
+    queue_timeout=float(os.environ.get('LLM_QUEUE_TIMEOUT_SECONDS', '10')),
+)
+LLM_CALL_TIMEOUT_SECONDS = float(os.environ.get('LLM_CALL_TIMEOUT_SECONDS', '60'))
+
+def rejected_response(e: SchedulerRejected) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+CHAT_MODEL_PARAMS = {"provider": "openai", "model": "gpt-4o", "max_tokens": 1000}
+
+# Opt-in: replies to a new session's first message are reused for the same opener
+RESPONSE_CACHE_ENABLED = os.environ.get('CHAT_RESPONSE_CACHE_ENABLED', '').lower() in ('1', 'true', 'yes')
+response_cache = ResponseCache(
+    max_bytes=int(os.environ.get('CHAT_RESPONSE_CACHE_MAX_BYTES', '1000000')),
+    ttl=float(os.environ.get('CHAT_RESPONSE_CACHE_TTL_SECONDS', '3600')),
+    max_prompt_chars=int(os.environ.get('CHAT_RESPONSE_CACHE_MAX_PROMPT_CHARS', '200')),
+)
+FIRST_TURN_SYSTEM_MESSAGE = chat_context.render_system_message(MENTAL_HEALTH_SYSTEM_PROMPT, "", [])
+
+def first_turn_cache_key(chat_request: ChatMessage, crisis: Optional[dict]) -> Optional[str]:
+    # Later turns depend on the conversation so far; crisis messages always reach the model
+    if not RESPONSE_CACHE_ENABLED or chat_request.session_id is not None:
+        return None
+    if crisis is not None:
+        response_cache.bypass()
+        return None
+    return response_cache.key(chat_request.message, FIRST_TURN_SYSTEM_MESSAGE, CHAT_MODEL_PARAMS)
+
+# Keeps references to fire-and-forget tasks so they are not garbage collected mid-run
+background_tasks = set()
+
+async def prepare_storage():
+    # Tables and indexes (for MongoDB, managed indexes are reconciled), then pending one-time migrations
+    await storage.setup()
+    if await apply_migrations(storage):
+        resource_cache.invalidate()
+    await build_search_index()
+
+# Storage preparation is retried in the background, so the process starts even while the database is unreachable
+STARTUP_RETRY_SECONDS = float(os.environ.get('STARTUP_RETRY_SECONDS', '1'))
+STARTUP_RETRY_MAX_SECONDS = float(os.environ.get('STARTUP_RETRY_MAX_SECONDS', '30'))
+startup_state = {"ready": False, "attempts": 0, "error": None}
+startup_tasks = []
+
+async def prepare_until_ready():
+    delay = STARTUP_RETRY_SECONDS
+    while True:
+        startup_state["attempts"] += 1
+        try:
+            await prepare_storage()
+        except Exception as e:
+            startup_state["error"] = str(e) or type(e).__name__
+            logger.warning("Storage not ready (attempt %d), retrying in %.1fs: %r", startup_state["attempts"], delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_SECONDS)
+            continue
+        startup_state.update(ready=True, error=None)
+        logger.info("Storage ready after %d attempt(s)", startup_state["attempts"])
+        return
+
+async def preload_llm_client():
+    # Otherwise the first chat request imports it on the event loop
+    try:
+        await asyncio.to_thread(LlmChat.resolve)
+        if LLM_CLIENT == 'openai':
+            # openai_chat imports the SDK only when it builds its first client
+            await asyncio.to_thread(importlib.import_module, 'openai')
+    except Exception as e:
+        logger.warning("Could not preload the LLM client: %r", e)
+
+def start_background_task(coroutine):
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
 # API Routes
 @app.on_event("startup")
 async def startup_event():
-    init_sample_resources()
+    conversation_writer.start()
+    startup_tasks.append(start_background_task(prepare_until_ready()))
+    if isinstance(LlmChat, LazyImport):
+        startup_tasks.append(start_background_task(preload_llm_client()))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in startup_tasks:
+        task.cancel()
+    await conversation_writer.stop(timeout=float(os.environ.get('CHAT_WRITE_DRAIN_TIMEOUT_SECONDS', '10')))
+    await storage.close()
+
+HEALTH_DB_TIMEOUT_SECONDS = float(os.environ.get('HEALTH_DB_TIMEOUT_SECONDS', '2'))
+
+@app.get("/api/health/live")
+async def liveness_check():
+    # Only says the process is serving requests; never touches the database
+    return {"status": "alive", "service": "Mental Health Resource API"}
+
+@app.get("/api/health/ready")
+async def readiness_check():
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content={
+            "status": "starting",
+            "service": "Mental Health Resource API",
+            "startup": {"attempts": startup_state["attempts"], "error": startup_state["error"]},
+        })
+    return await health_check()
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "service": "Mental Health Resource API"}
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(storage.ping(), HEALTH_DB_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning("Health check database ping failed: %r", e)
+        return JSONResponse(status_code=503, content={
+            "status": "unhealthy",
+            "service": "Mental Health Resource API",
+            "database": {"status": "unreachable", "error": str(e) or type(e).__name__},
+        })
+    return {
+        "status": "healthy",
+        "service": "Mental Health Resource API",
+        "database": {"status": "ok", "ping_ms": round((time.perf_counter() - started) * 1000, 2)},
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def build_llm_chat(session_id: str, summary: str = "", turns: List[dict] = None):
+    return LlmChat(
+        api_key=OPENAI_API_KEY,
+        session_id=session_id,
+        system_message=chat_context.render_system_message(MENTAL_HEALTH_SYSTEM_PROMPT, summary, turns or [])
+    ).with_model(CHAT_MODEL_PARAMS["provider"], CHAT_MODEL_PARAMS["model"]).with_max_tokens(CHAT_MODEL_PARAMS["max_tokens"])
+
+async def get_llm_chat(session_id: str, is_new_session: bool):
+    async def rebuild():
+        # Not cached in this process: restore the session's summary and recent turns
+        summary, turns = "", []
+        if not is_new_session:
+            summary, turns = await chat_context.load(storage.conversations, session_id, conversation_writer.pending(session_id))
+        return build_llm_chat(session_id, summary, turns)
+
+    return await session_cache.get_or_create(session_id, rebuild)
+
+def schedule_context_fold(session_id: str):
+    async def fold():
+        try:
+            folded = await chat_context.maybe_fold(storage.conversations, session_id)
+        except SchedulerRejected:
+            # Deferred while the LLM is busy; retried after the context's backoff
+            return
+        except Exception:
+            # The cached client still holds the turns; it is rebuilt after a later successful fold
+            logger.exception("Failed to update conversation summary for session %s", session_id)
+            return
+        if folded:
+            # Rebuild the cached client from the new summary so its own history stays bounded
+            session_cache.discard(session_id)
+
+    start_background_task(fold())
+
+async def store_conversation(session_id: str, user_message: str, ai_response: str):
+    conversation_entry = {
+        "id": str(uuid.uuid4()),
+        "session_id": session_id,
+        "user_message": user_message,
+        "ai_response": ai_response,
+        "timestamp": datetime.now(timezone.utc)
+    }
+    # Returns once queued; waits only when the write-behind queue is full, and raises WriteBehindFull if it stays full
+    await conversation_writer.put(conversation_entry)
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_with_ai(chat_request: ChatMessage):
+    # Screened before anything that can wait or fail, so a crisis message always gets resources
+    crisis = screen_message(chat_request.message)
     try:
         # Generate session ID if not provided
         session_id = chat_request.session_id or str(uuid.uuid4())
         
-        # Initialize LLM chat
-        chat = LlmChat(
-            api_key=OPENAI_API_KEY,
-            session_id=session_id,
-            system_message=MENTAL_HEALTH_SYSTEM_PROMPT
-        ).with_model("openai", "gpt-4o").with_max_tokens(1000)
-        
-        # Create user message
-        user_message = UserMessage(text=chat_request.message)
+        # A cached first reply skips the LLM; the next turn rebuilds the chat from stored history
+        cache_key = first_turn_cache_key(chat_request, crisis)
+        ai_response = response_cache.get(cache_key) if cache_key else None
         
-        # Get AI response
-        ai_response = await chat.send_message(user_message)
+        try:
+            if ai_response is None:
+                # Waits for this session's earlier messages and for a free LLM slot
+                async with llm_scheduler.slot(session_id):
+                    # Reuse the session's LLM chat, or rebuild it from stored history
+                    chat = await get_llm_chat(session_id, is_new_session=chat_request.session_id is None)
+                    
+                    # Get AI response
+                    started = time.perf_counter()
+                    with llm_latency.time(operation="chat"):
+                        ai_response = await asyncio.wait_for(chat.send_message(UserMessage(text=chat_request.message)), LLM_CALL_TIMEOUT_SECONDS)
+                if cache_key:
+                    response_cache.put(cache_key, ai_response, time.perf_counter() - started)
+        except SchedulerRejected as e:
+            if crisis is None:
+                raise rejected_response(e)
+            ai_response = CRISIS_FALLBACK_RESPONSE
+        except Exception as e:
+            # The client may hold a half-finished turn; rebuild it from the database next time
+            session_cache.discard(session_id)
+            if crisis is None:
+                if isinstance(e, asyncio.TimeoutError):
+                    raise HTTPException(status_code=504, detail="Chat error: the assistant took too long to respond")
+                raise
+            logger.exception("LLM call failed for a message that matched the crisis screen")
+            ai_response = CRISIS_FALLBACK_RESPONSE
         
         # Store conversation in database
-        conversation_entry = {
-            "id": str(uuid.uuid4()),
-            "session_id": session_id,
-            "user_message": chat_request.message,
-            "ai_response": ai_response,
-            "timestamp": datetime.now(timezone.utc)
-        }
-        db.conversations.insert_one(conversation_entry)
+        try:
+            await store_conversation(session_id, chat_request.message, ai_response)
+            schedule_context_fold(session_id)
+        except WriteBehindFull as e:
+            if crisis is None:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+            # The crisis resources still go out; only the transcript is lost
+            logger.error("Conversation turn for session %s not stored: %s", session_id, e)
         
-        return ChatResponse(response=ai_response, session_id=session_id)
+        return ChatResponse(response=ai_response, session_id=session_id, crisis=crisis)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
+@app.post("/api/chat/stream")
+async def chat_with_ai_stream(chat_request: ChatMessage):
+    session_id = chat_request.session_id or str(uuid.uuid4())
+    crisis = screen_message(chat_request.message)
+    ticket, chat = None, None
+    try:
+        # The slot is held until the stream ends, so rejections still get a proper status code
+        ticket = await llm_scheduler.acquire(session_id)
+        chat = await get_llm_chat(session_id, is_new_session=chat_request.session_id is None)
+    except Exception as e:
+        if ticket is not None:
+            llm_scheduler.release(ticket)
+            ticket = None
+        if crisis is None:
+            if isinstance(e, SchedulerRejected):
+                raise rejected_response(e)
+            raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+        # Still stream the crisis resources; sse_chat_events reports the failure after them
+        logger.exception("Could not start a chat reply for a message that matched the crisis screen")
+
+    def release_slot():
+        if ticket is not None:
+            llm_scheduler.release(ticket)
+
+    async def persist(ai_response: str):
+        await store_conversation(session_id, chat_request.message, ai_response)
+        schedule_context_fold(session_id)
+
+    async def events():
+        completed = False
+        started = time.perf_counter()
+        try:
+            async for event in sse_chat_events(chat, UserMessage(text=chat_request.message), session_id, on_complete=persist, crisis=crisis):
+                completed = completed or event.startswith("event: done")
+                yield event
+        finally:
+            if chat is not None:
+                # Includes the time spent sending tokens to the client
+                llm_latency.observe(time.perf_counter() - started, operation="chat_stream", outcome="ok" if completed else "error")
+            release_slot()
+            if not completed:
+                session_cache.discard(session_id)
+
+    # Tokens are sent as they arrive; the conversation is stored once the reply is complete.
+    # The background task frees the slot if the client disconnects before the stream starts.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_slot),
+    )
+
+@app.get("/api/chat/sessions/stats")
+async def get_chat_session_stats():
+    return session_cache.stats()
+
+@app.get("/api/chat/scheduler/stats")
+async def get_chat_scheduler_stats():
+    return llm_scheduler.stats()
+
+@app.get("/api/chat/cache/stats")
+async def get_chat_cache_stats():
+    return {"enabled": RESPONSE_CACHE_ENABLED, **response_cache.stats()}
+
 @app.get("/api/chat/history/{session_id}")
-async def get_chat_history(session_id: str):
+async def get_chat_history(
+    session_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
     try:
-        conversations = list(db.conversations.find(
-            {"session_id": session_id},
-            {"_id": 0}
-        ).sort("timestamp", 1))
-        return {"conversations": conversations}
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # Turns still in the write-behind queue are merged in, so a session always sees its own writes
+        pending = conversation_writer.pending(session_id)
+        if wants_ndjson(accept):
+            return StreamingResponse(
+                stream_ndjson(storage.conversations.history(session_id, after, limit or 0), pending=pending, after=cursor, limit=limit or 0),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        limit = limit or CHAT_HISTORY_PAGE_SIZE
+        conversations, next_cursor = await fetch_page(storage.conversations.history(session_id, after, limit + 1), limit)
+        conversations, next_cursor = merge_pending_page(conversations, next_cursor, pending, cursor, limit)
+        return {"conversations": conversations, "next_cursor": next_cursor}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching chat history: {str(e)}")
 
@@ -199,40 +610,167 @@ async def log_mood(mood_entry: MoodEntry):
             "timestamp": datetime.now(timezone.utc)
         }
         
-        db.mood_entries.insert_one(mood_data)
+        # Also adds the entry to its day's rollup
+        await storage.moods.insert(mood_data)
         
         return MoodResponse(**mood_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error logging mood: {str(e)}")
 
+def build_bulk_mood_document(item) -> dict:
+    try:
+        mood_entry = BulkMoodEntry.model_validate(item)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'entry'}: {error['msg']}" for error in e.errors()
+        ))
+    timestamp = mood_entry.timestamp or datetime.now(timezone.utc)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    mood_data = {
+        "id": str(uuid.uuid4()),
+        "mood_level": mood_entry.mood_level,
+        "notes": mood_entry.notes or "",
+        "activities": mood_entry.activities or [],
+        "timestamp": timestamp
+    }
+    if mood_entry.idempotency_key:
+        mood_data["idempotency_key"] = mood_entry.idempotency_key
+    return mood_data
+
+@app.post("/api/mood/bulk")
+async def log_mood_bulk(request: Request):
+    # JSON arrays and NDJSON are both parsed as the body streams in, so uploads of any length are fine
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        items = iter_ndjson(request.stream())
+    else:
+        items = iter_json_array(request.stream())
+    try:
+        return await ingest_mood_entries(storage.moods, items, build_bulk_mood_document, chunk_size=MOOD_BULK_CHUNK_SIZE)
+    except BodyFormatError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error logging mood entries: {str(e)}")
+
 @app.get("/api/mood/history")
-async def get_mood_history(limit: int = 30):
+async def get_mood_history(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
     try:
-        mood_entries = list(db.mood_entries.find(
-            {},
-            {"_id": 0}
-        ).sort("timestamp", -1).limit(limit))
-        return {"mood_entries": mood_entries}
+        before = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if wants_ndjson(accept):
+            return StreamingResponse(stream_ndjson(storage.moods.history(before, limit or 0)), media_type=NDJSON_MEDIA_TYPE)
+        limit = limit or 30
+        mood_entries, next_cursor = await fetch_page(storage.moods.history(before, limit + 1), limit)
+        return {"mood_entries": mood_entries, "next_cursor": next_cursor}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching mood history: {str(e)}")
 
+@app.get("/api/mood/analytics")
+async def get_mood_analytics(
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+):
+    try:
+        entries = [entry async for entry in storage.moods.between(from_, to, ANALYTICS_FIELDS)]
+        # Plain floats and strings only, so skip jsonable_encoder
+        return Response(content=dumps_bytes(compute_mood_analytics(entries)), media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing mood analytics: {str(e)}")
+
+@app.get("/api/mood/daily")
+async def get_mood_daily(
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+):
+    try:
+        # Reads one rollup document per day instead of every entry
+        rollups = await storage.moods.daily(day_key(from_) if from_ else None, day_key(to) if to else None)
+        return {"days": [summarize_rollup(rollup) for rollup in rollups]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching daily mood: {str(e)}")
+
+# Entries per chunk on /api/mood/export: one CSV write or one Parquet row group
+MOOD_EXPORT_CHUNK_ROWS = int(os.environ.get('MOOD_EXPORT_CHUNK_ROWS', '5000'))
+
+@app.get("/api/mood/export")
+async def export_mood_history(
+    format: str = "csv",
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+):
+    if format not in available_formats():
+        raise HTTPException(status_code=400, detail=f"format must be one of {available_formats()}")
+    try:
+        # Streamed from a storage cursor, oldest first, so memory does not grow with the history
+        entries = storage.moods.between(from_, to)
+        chunks = csv_chunks if format == "csv" else parquet_chunks
+        media_type, extension = EXPORT_FORMATS[format]
+        return StreamingResponse(
+            chunks(entries, MOOD_EXPORT_CHUNK_ROWS),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="mood-history.{extension}"'},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting mood history: {str(e)}")
+
 @app.get("/api/resources")
-async def get_resources(category: Optional[str] = None):
+async def get_resources(
+    category: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
     try:
-        query = {"category": category} if category else {}
-        resources = list(db.resources.find(query, {"_id": 0}).sort("timestamp", -1))
-        return {"resources": resources}
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if "content" in selected:
+            # Article bodies are not cached; storage returns just the requested fields
+            resources = await storage.resources.list(category, selected)
+            return cached_json_response(CachedPayload({"resources": resources}), if_none_match, accept_encoding)
+        catalog = await resource_cache.get()
+        return cached_json_response(catalog.resources(category, selected), if_none_match, accept_encoding)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching resources: {str(e)}")
 
 @app.get("/api/resources/categories")
-async def get_resource_categories():
+async def get_resource_categories(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
     try:
-        categories = db.resources.distinct("category")
-        return {"categories": categories}
+        catalog = await resource_cache.get()
+        return cached_json_response(catalog.categories, if_none_match, accept_encoding)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching categories: {str(e)}")
 
+@app.get("/api/resources/search")
+async def search_resources(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    try:
+        started = time.perf_counter()
+        results = search_index.search(q, limit=limit, category=category)
+        return {"query": q, **results, "took_ms": round((time.perf_counter() - started) * 1000, 3)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching resources: {str(e)}")
+
+@app.get("/api/resources/{resource_id}", response_model=ResourceResponse)
+async def get_resource(resource_id: str):
+    try:
+        resource = await storage.resources.get(resource_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching resource: {str(e)}")
+    if resource is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    return ResourceResponse(**resource)
+
 @app.post("/api/resources", response_model=ResourceResponse)
 async def create_resource(resource: Resource):
     try:
@@ -246,40 +784,17 @@ async def create_resource(resource: Resource):
             "timestamp": datetime.now(timezone.utc)
         }
         
-        db.resources.insert_one(resource_data)
+        await storage.resources.insert(resource_data)
+        resource_cache.invalidate()
+        search_index.add(resource_data)
         
         return ResourceResponse(**resource_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating resource: {str(e)}")
 
 @app.get("/api/crisis-resources")
-async def get_crisis_resources():
-    return {
-        "emergency_contacts": [
-            {
-                "name": "National Suicide Prevention Lifeline",
-                "phone": "988",
-                "description": "24/7 free and confidential support"
-            },
-            {
-                "name": "Crisis Text Line",
-                "phone": "Text HOME to 741741",
-                "description": "24/7 crisis support via text"
-            },
-            {
-                "name": "SAMHSA National Helpline",
-                "phone": "1-800-662-4357",
-                "description": "Treatment referral and information service"
-            }
-        ],
-        "immediate_steps": [
-            "If you're having thoughts of self-harm, please reach out for help immediately",
-            "Contact emergency services (911) if in immediate danger",
-            "Reach out to a trusted friend, family member, or counselor",
-            "Use grounding techniques to help manage overwhelming feelings",
-            "Remember: You are not alone, and help is available"
-        ]
-    }
+async def get_crisis_resources(request: Request):
+    return crisis_payload.response(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+
+class SessionCache:
+    """Bounded in-process cache of per-session objects with LRU and idle-TTL eviction.
+
+    Entries are kept in least-recently-used order, which is also last-access order,
+    so expired entries are always at the front and can be purged cheaply.
+    """
+
+    def __init__(self, max_size: int = 1000, idle_ttl: float = 1800.0, clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._building = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        self._purge_expired(self._clock())
+        return key in self._entries
+
+    def _purge_expired(self, now: float):
+        while self._entries:
+            key, (_, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            del self._entries[key]
+            self.expirations += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        now = self._clock()
+        self._purge_expired(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        entry[1] = now
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value: Any):
+        now = self._clock()
+        self._purge_expired(now)
+        self._entries[key] = [value, now]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    async def get_or_create(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value, or build it once with ``factory`` even if several callers miss at the same time."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = self._building.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        value = await asyncio.shield(task)
+        if key not in self._entries:
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "idle_ttl_seconds": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,218 @@
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Engines accepted by STORAGE_ENGINE
+STORAGE_ENGINES = ("mongo", "sqlite", "memory")
+
+# insert_many result for an entry whose idempotency_key is already stored
+DUPLICATE = "duplicate"
+
+# (timestamp, id) of the last document of the previous page
+Keyset = Tuple[datetime, str]
+
+
+def utc_naive(timestamp: datetime) -> datetime:
+    """Timestamps are stored and returned as naive UTC, the way MongoDB hands them back."""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class ConversationRepository(ABC):
+    """Chat turns and the running summary of each session.
+
+    Turns are ordered by (timestamp, id). ``after`` bounds are exclusive.
+    """
+
+    @abstractmethod
+    async def insert_many(self, conversations: List[dict]):
+        """Store turns; ones already stored are skipped, so a failed batch can be retried whole."""
+
+    @abstractmethod
+    def history(self, session_id: str, after: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        """A session's turns, oldest first, starting after ``after``; ``limit`` 0 means all."""
+
+    @abstractmethod
+    async def recent(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        """The newest ``limit`` turns after ``after``, oldest first."""
+
+    @abstractmethod
+    async def oldest(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        """The oldest ``limit`` turns after ``after``."""
+
+    @abstractmethod
+    async def count(self, session_id: str, after: Optional[Keyset] = None) -> int:
+        ...
+
+    @abstractmethod
+    async def get_summary(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def save_summary(self, session_id: str, summary: dict):
+        """Store summary, summarized_through (timestamp), summarized_through_id, summarized_turns and updated_at."""
+
+
+class MoodRepository(ABC):
+    """Mood entries and their per-day rollups, which every insert keeps up to date."""
+
+    @abstractmethod
+    async def insert(self, entry: dict):
+        ...
+
+    @abstractmethod
+    async def insert_many(self, entries: List[dict]) -> List[Optional[str]]:
+        """Insert what can be inserted; per entry, None, DUPLICATE or an error message."""
+
+    @abstractmethod
+    async def ids_for_keys(self, idempotency_keys: Sequence[str]) -> Dict[str, str]:
+        """Entry ids stored under the given idempotency keys."""
+
+    @abstractmethod
+    def history(self, before: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        """Entries newest first, starting before ``before``; ``limit`` 0 means all."""
+
+    @abstractmethod
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None, fields: Optional[Sequence[str]] = None) -> AsyncIterator[dict]:
+        """Entries with ``start <= timestamp < end`` in timestamp order, optionally only ``fields``."""
+
+    @abstractmethod
+    async def daily(self, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        """Rollup documents for days (YYYY-MM-DD) in [start, end), by date."""
+
+
+class ResourceRepository(ABC):
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    @abstractmethod
+    async def insert(self, resource: dict):
+        ...
+
+    @abstractmethod
+    async def insert_many(self, resources: List[dict]):
+        ...
+
+    @abstractmethod
+    async def list(self, category: Optional[str] = None, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """Resources newest first, optionally in one category and with only ``fields``."""
+
+    @abstractmethod
+    async def get(self, resource_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def categories(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def iter_all(self) -> AsyncIterator[dict]:
+        ...
+
+
+class Storage(ABC):
+    conversations: ConversationRepository
+    moods: MoodRepository
+    resources: ResourceRepository
+
+    @abstractmethod
+    async def setup(self):
+        """Create tables and indexes; safe to run on every start."""
+
+    @abstractmethod
+    async def ping(self):
+        """Raise if the storage cannot be reached."""
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+    @abstractmethod
+    async def applied_migrations(self) -> Set[str]:
+        """Names of the data migrations already recorded."""
+
+    @abstractmethod
+    async def record_migration(self, name: str):
+        """Record a migration as applied; recording it twice is harmless."""
+
+    def is_transient_error(self, error: Exception) -> bool:
+        """Whether a failed write may succeed if retried unchanged (a lost connection, not a bad document)."""
+        return isinstance(error, (OSError, TimeoutError))
+
+
+class LazyStorage(Storage):
+    """Storage built by ``factory`` on first use, so importing the app opens no client.
+
+    The engine's driver is imported at that point too, which keeps it off the import path.
+    """
+
+    def __init__(self, factory: Callable[[], Storage]):
+        self._factory = factory
+        self._storage: Optional[Storage] = None
+
+    @property
+    def storage(self) -> Storage:
+        if self._storage is None:
+            self._storage = self._factory()
+        return self._storage
+
+    @property
+    def conversations(self) -> ConversationRepository:
+        return self.storage.conversations
+
+    @property
+    def moods(self) -> MoodRepository:
+        return self.storage.moods
+
+    @property
+    def resources(self) -> ResourceRepository:
+        return self.storage.resources
+
+    async def setup(self):
+        await self.storage.setup()
+
+    async def ping(self):
+        await self.storage.ping()
+
+    async def close(self):
+        # Nothing to close if nothing was ever opened
+        if self._storage is not None:
+            await self._storage.close()
+
+    async def applied_migrations(self) -> Set[str]:
+        return await self.storage.applied_migrations()
+
+    async def record_migration(self, name: str):
+        await self.storage.record_migration(name)
+
+    def is_transient_error(self, error: Exception) -> bool:
+        return self.storage.is_transient_error(error)
+
+
+def select_fields(document: dict, fields: Optional[Sequence[str]]) -> dict:
+    if fields is None:
+        return dict(document)
+    return {field: document[field] for field in fields if field in document}
+
+
+def create_storage(engine: Optional[str] = None, **options) -> Storage:
+    """Storage for ``engine`` (default: STORAGE_ENGINE, else "mongo").
+
+    Options: ``mongo_url``, ``event_listeners`` and ``explain_check`` for mongo, ``path``
+    for sqlite (default: SQLITE_PATH, else mental_health.db). Engines are imported on
+    demand, so a SQLite or in-memory deployment does not load the MongoDB driver.
+    """
+    engine = engine or os.environ.get("STORAGE_ENGINE", "mongo")
+    if engine == "mongo":
+        from storage_mongo import MongoStorage
+        return MongoStorage.connect(options.get("mongo_url"), options.get("event_listeners", ()), options.get("explain_check", False))
+    if engine == "sqlite":
+        from storage_sqlite import SqliteStorage
+        return SqliteStorage(options.get("path") or os.environ.get("SQLITE_PATH", "mental_health.db"))
+    if engine == "memory":
+        from storage_memory import MemoryStorage
+        return MemoryStorage()
+    raise ValueError(f"STORAGE_ENGINE must be one of {list(STORAGE_ENGINES)}, got {engine!r}")
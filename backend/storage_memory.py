@@ -0,0 +1,196 @@
+import bisect
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+from mood_rollups import DayAccumulator, day_key
+from storage import DUPLICATE, ConversationRepository, Keyset, MoodRepository, ResourceRepository, Storage, select_fields, utc_naive
+
+
+def _stored(document: dict) -> dict:
+    # Copies, so callers can neither change stored documents nor see later changes
+    document = dict(document, timestamp=utc_naive(document["timestamp"]))
+    if "activities" in document:
+        document["activities"] = list(document["activities"])
+    return document
+
+
+def _copy(document: dict, fields: Optional[Sequence[str]] = None) -> dict:
+    document = select_fields(document, fields)
+    if "activities" in document:
+        document["activities"] = list(document["activities"])
+    return document
+
+
+def _keyset(keyset: Optional[Keyset]) -> Optional[Tuple[datetime, str]]:
+    return None if keyset is None else (utc_naive(keyset[0]), keyset[1])
+
+
+class _SortedDocuments:
+    """Documents kept sorted by (timestamp, id) for keyset reads."""
+
+    def __init__(self):
+        self.keys: List[Tuple[datetime, str]] = []
+        self.documents: List[dict] = []
+
+    def add(self, document: dict):
+        key = (document["timestamp"], document["id"])
+        index = bisect.bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.documents.insert(index, document)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+class MemoryConversationRepository(ConversationRepository):
+    def __init__(self):
+        self._sessions: Dict[str, _SortedDocuments] = defaultdict(_SortedDocuments)
+        self._ids: Set[str] = set()
+        self._summaries: Dict[str, dict] = {}
+
+    async def insert_many(self, conversations: List[dict]):
+        for conversation in conversations:
+            if conversation["id"] in self._ids:
+                continue
+            self._ids.add(conversation["id"])
+            self._sessions[conversation["session_id"]].add(_stored(conversation))
+
+    def _after(self, session_id: str, after: Optional[Keyset]) -> List[dict]:
+        turns = self._sessions.get(session_id)
+        if turns is None:
+            return []
+        start = 0 if after is None else bisect.bisect_right(turns.keys, _keyset(after))
+        return turns.documents[start:]
+
+    async def history(self, session_id: str, after: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        turns = self._sessions.get(session_id)
+        if turns is None:
+            return
+        start = 0 if after is None else bisect.bisect_right(turns.keys, _keyset(after))
+        end = start + limit if limit else len(turns)
+        for document in turns.documents[start:end]:
+            yield _copy(document)
+
+    async def recent(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        return [_copy(turn) for turn in self._after(session_id, after)[-limit:]] if limit else []
+
+    async def oldest(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        return [_copy(turn) for turn in self._after(session_id, after)[:limit]]
+
+    async def count(self, session_id: str, after: Optional[Keyset] = None) -> int:
+        return len(self._after(session_id, after))
+
+    async def get_summary(self, session_id: str) -> Optional[dict]:
+        summary = self._summaries.get(session_id)
+        return dict(summary) if summary is not None else None
+
+    async def save_summary(self, session_id: str, summary: dict):
+        stored = dict(summary, session_id=session_id)
+        stored["summarized_through"] = utc_naive(stored["summarized_through"])
+        self._summaries.setdefault(session_id, {}).update(stored)
+
+
+class MemoryMoodRepository(MoodRepository):
+    def __init__(self):
+        self._entries = _SortedDocuments()
+        self._ids: Dict[str, str] = {}
+        self._days: Dict[str, DayAccumulator] = {}
+
+    def _add(self, entry: dict) -> Optional[str]:
+        key = entry.get("idempotency_key")
+        if key is not None and key in self._ids:
+            return DUPLICATE
+        entry = _stored(entry)
+        self._entries.add(entry)
+        if key is not None:
+            self._ids[key] = entry["id"]
+        date = day_key(entry["timestamp"])
+        self._days.setdefault(date, DayAccumulator(date)).add(entry)
+        return None
+
+    async def insert(self, entry: dict):
+        if self._add(entry) is not None:
+            raise ValueError(f"Duplicate idempotency_key {entry['idempotency_key']!r}")
+
+    async def insert_many(self, entries: List[dict]) -> List[Optional[str]]:
+        return [self._add(entry) for entry in entries]
+
+    async def ids_for_keys(self, idempotency_keys: Sequence[str]) -> Dict[str, str]:
+        return {key: self._ids[key] for key in idempotency_keys if key in self._ids}
+
+    async def history(self, before: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        end = len(self._entries) if before is None else bisect.bisect_left(self._entries.keys, _keyset(before))
+        start = max(0, end - limit) if limit else 0
+        for document in reversed(self._entries.documents[start:end]):
+            yield _copy(document)
+
+    async def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None, fields: Optional[Sequence[str]] = None) -> AsyncIterator[dict]:
+        keys = self._entries.keys
+        first = 0 if start is None else bisect.bisect_left(keys, (utc_naive(start), ""))
+        last = len(keys) if end is None else bisect.bisect_left(keys, (utc_naive(end), ""))
+        for document in self._entries.documents[first:last]:
+            yield _copy(document, fields)
+
+    async def daily(self, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        return [
+            self._days[date].document()
+            for date in sorted(self._days)
+            if (start is None or date >= start) and (end is None or date < end)
+        ]
+
+
+class MemoryResourceRepository(ResourceRepository):
+    def __init__(self):
+        self._resources: Dict[str, dict] = {}
+
+    async def count(self) -> int:
+        return len(self._resources)
+
+    async def insert(self, resource: dict):
+        self._resources[resource["id"]] = _stored(resource)
+
+    async def insert_many(self, resources: List[dict]):
+        for resource in resources:
+            await self.insert(resource)
+
+    async def list(self, category: Optional[str] = None, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        resources = [resource for resource in self._resources.values() if not category or resource["category"] == category]
+        resources.sort(key=lambda resource: resource["timestamp"], reverse=True)
+        return [select_fields(resource, fields) for resource in resources]
+
+    async def get(self, resource_id: str) -> Optional[dict]:
+        resource = self._resources.get(resource_id)
+        return dict(resource) if resource is not None else None
+
+    async def categories(self) -> List[str]:
+        return list(dict.fromkeys(resource["category"] for resource in self._resources.values()))
+
+    async def iter_all(self) -> AsyncIterator[dict]:
+        for resource in list(self._resources.values()):
+            yield dict(resource)
+
+
+class MemoryStorage(Storage):
+    """Process-local storage for tests, benchmarks and throwaway deployments; nothing is persisted."""
+
+    def __init__(self):
+        self.conversations = MemoryConversationRepository()
+        self.moods = MemoryMoodRepository()
+        self.resources = MemoryResourceRepository()
+        self._migrations: Dict[str, datetime] = {}
+
+    async def setup(self):
+        pass
+
+    async def ping(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def applied_migrations(self) -> Set[str]:
+        return set(self._migrations)
+
+    async def record_migration(self, name: str):
+        self._migrations.setdefault(name, datetime.now(timezone.utc))
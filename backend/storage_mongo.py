@@ -0,0 +1,200 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set
+
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+from database import create_mongo_client
+from indexes import ensure_indexes
+from mood_rollups import ROLLUP_COLLECTION, record_mood_rollup, rollup_bulk_updates
+from pagination import keyset_filter, keyset_sort
+from storage import DUPLICATE, ConversationRepository, Keyset, MoodRepository, ResourceRepository, Storage
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Server errors a retry can get past: unreachable hosts, failovers, shutdowns and time limits
+TRANSIENT_ERROR_CODES = {6, 7, 50, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+
+# One document per applied data migration, keyed by its name
+MIGRATIONS_COLLECTION = "migrations"
+
+# Documents per round trip when iterating
+BATCH_SIZE = 500
+
+
+def _projection(fields: Optional[Sequence[str]]) -> dict:
+    if fields is None:
+        return {"_id": 0}
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+class MongoConversationRepository(ConversationRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def insert_many(self, conversations: List[dict]):
+        try:
+            await self.db.conversations.insert_many(conversations, ordered=False)
+        except BulkWriteError as e:
+            # A retried batch may have been partly stored already; those documents keep their _id
+            if not all(error.get("code") == DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+
+    async def history(self, session_id: str, after: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        cursor = self.db.conversations.find(keyset_filter({"session_id": session_id}, after, 1), {"_id": 0})
+        async for document in cursor.sort(keyset_sort(1)).limit(limit).batch_size(BATCH_SIZE):
+            yield document
+
+    async def recent(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        turns = await self.db.conversations.find(
+            keyset_filter({"session_id": session_id}, after, 1),
+            {"_id": 0, "id": 1, "user_message": 1, "ai_response": 1, "timestamp": 1}
+        ).sort(keyset_sort(-1)).limit(limit).to_list(length=limit)
+        turns.reverse()
+        return turns
+
+    async def oldest(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        return await self.db.conversations.find(
+            keyset_filter({"session_id": session_id}, after, 1),
+            {"_id": 0, "id": 1, "user_message": 1, "ai_response": 1, "timestamp": 1}
+        ).sort(keyset_sort(1)).limit(limit).to_list(length=None)
+
+    async def count(self, session_id: str, after: Optional[Keyset] = None) -> int:
+        return await self.db.conversations.count_documents(keyset_filter({"session_id": session_id}, after, 1))
+
+    async def get_summary(self, session_id: str) -> Optional[dict]:
+        return await self.db.conversation_summaries.find_one({"session_id": session_id}, {"_id": 0})
+
+    async def save_summary(self, session_id: str, summary: dict):
+        await self.db.conversation_summaries.update_one({"session_id": session_id}, {"$set": summary}, upsert=True)
+
+
+class MongoMoodRepository(MoodRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def insert(self, entry: dict):
+        await self.db.mood_entries.insert_one(entry)
+        await record_mood_rollup(self.db, entry)
+
+    async def insert_many(self, entries: List[dict]) -> List[Optional[str]]:
+        errors: List[Optional[str]] = [None] * len(entries)
+        try:
+            await self.db.mood_entries.insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                duplicate = write_error.get("code") == DUPLICATE_KEY_ERROR and entries[write_error["index"]].get("idempotency_key")
+                errors[write_error["index"]] = DUPLICATE if duplicate else write_error.get("errmsg", "Write failed")
+        inserted = [entry for entry, error in zip(entries, errors) if error is None]
+        if inserted:
+            await self.db[ROLLUP_COLLECTION].bulk_write(rollup_bulk_updates(inserted), ordered=False)
+        return errors
+
+    async def ids_for_keys(self, idempotency_keys: Sequence[str]) -> Dict[str, str]:
+        existing = {}
+        # The $type clause repeats the index's partial filter so the planner can use it
+        query = {"idempotency_key": {"$in": list(idempotency_keys), "$type": "string"}}
+        async for stored in self.db.mood_entries.find(query, {"_id": 0, "id": 1, "idempotency_key": 1}):
+            existing[stored["idempotency_key"]] = stored["id"]
+        return existing
+
+    async def history(self, before: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        cursor = self.db.mood_entries.find(keyset_filter({}, before, -1), {"_id": 0})
+        async for document in cursor.sort(keyset_sort(-1)).limit(limit).batch_size(BATCH_SIZE):
+            yield document
+
+    async def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None, fields: Optional[Sequence[str]] = None) -> AsyncIterator[dict]:
+        query = {}
+        if start or end:
+            query["timestamp"] = {}
+            if start:
+                query["timestamp"]["$gte"] = start
+            if end:
+                query["timestamp"]["$lt"] = end
+        cursor = self.db.mood_entries.find(query, _projection(fields)).sort("timestamp", 1).batch_size(5000)
+        async for document in cursor:
+            yield document
+
+    async def daily(self, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        query = {}
+        if start or end:
+            query["date"] = {}
+            if start:
+                query["date"]["$gte"] = start
+            if end:
+                query["date"]["$lt"] = end
+        return await self.db[ROLLUP_COLLECTION].find(query, {"_id": 0}).sort("date", 1).to_list(length=None)
+
+
+class MongoResourceRepository(ResourceRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def count(self) -> int:
+        return await self.db.resources.count_documents({})
+
+    async def insert(self, resource: dict):
+        await self.db.resources.insert_one(resource)
+
+    async def insert_many(self, resources: List[dict]):
+        await self.db.resources.insert_many(resources)
+
+    async def list(self, category: Optional[str] = None, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        query = {"category": category} if category else {}
+        return await self.db.resources.find(query, _projection(fields)).sort("timestamp", -1).to_list(length=None)
+
+    async def get(self, resource_id: str) -> Optional[dict]:
+        return await self.db.resources.find_one({"id": resource_id}, {"_id": 0})
+
+    async def categories(self) -> List[str]:
+        return await self.db.resources.distinct("category")
+
+    async def iter_all(self) -> AsyncIterator[dict]:
+        async for resource in self.db.resources.find({}, {"_id": 0}).batch_size(1000):
+            yield resource
+
+
+class MongoStorage(Storage):
+    """MongoDB through Motor; indexes are reconciled by ``setup``."""
+
+    def __init__(self, db, client=None, explain_check: bool = False):
+        self.db = db
+        self.client = client
+        self.explain_check = explain_check
+        self.conversations = MongoConversationRepository(db)
+        self.moods = MongoMoodRepository(db)
+        self.resources = MongoResourceRepository(db)
+
+    @classmethod
+    def connect(cls, mongo_url: Optional[str] = None, event_listeners: Sequence = (), explain_check: bool = False, database: str = "mental_health_app") -> "MongoStorage":
+        # No connection is opened until the first operation
+        client = create_mongo_client(mongo_url, event_listeners=event_listeners)
+        return cls(client[database], client, explain_check=explain_check)
+
+    async def setup(self):
+        # Fails if explain_check is set and any route query would scan a whole collection
+        await ensure_indexes(self.db, explain_check=self.explain_check)
+
+    async def ping(self):
+        await self.db.command("ping")
+
+    async def close(self):
+        if self.client is not None:
+            self.client.close()
+
+    async def applied_migrations(self) -> Set[str]:
+        return {document["_id"] async for document in self.db[MIGRATIONS_COLLECTION].find({}, {"_id": 1})}
+
+    async def record_migration(self, name: str):
+        await self.db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": name}, {"$setOnInsert": {"applied_at": datetime.now(timezone.utc)}}, upsert=True)
+
+    def is_transient_error(self, error: Exception) -> bool:
+        if isinstance(error, ConnectionFailure):
+            return True
+        if isinstance(error, BulkWriteError):
+            details = error.details or {}
+            codes = {write_error.get("code") for write_error in details.get("writeErrors", [])} - {DUPLICATE_KEY_ERROR}
+            return bool(details.get("writeConcernErrors")) or (bool(codes) and codes <= TRANSIENT_ERROR_CODES)
+        if isinstance(error, PyMongoError):
+            return error.has_error_label("RetryableWriteError") or getattr(error, "code", None) in TRANSIENT_ERROR_CODES
+        return super().is_transient_error(error)
@@ -0,0 +1,451 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set
+
+from mood_rollups import DayAccumulator, day_key
+from storage import DUPLICATE, ConversationRepository, Keyset, MoodRepository, ResourceRepository, Storage, select_fields, utc_naive
+
+# Rows per query when iterating, so a long history never sits in memory at once
+BATCH_SIZE = 500
+
+# Primary result codes of failures a retry can get past: a held lock, a full disk, an I/O error
+TRANSIENT_ERROR_CODES = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED, sqlite3.SQLITE_FULL, sqlite3.SQLITE_IOERR}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    user_message TEXT NOT NULL,
+    ai_response TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_session_timestamp ON conversations (session_id, timestamp, id);
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    summarized_through TEXT NOT NULL,
+    summarized_through_id TEXT,
+    summarized_turns INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS mood_entries (
+    id TEXT PRIMARY KEY,
+    mood_level INTEGER NOT NULL,
+    notes TEXT NOT NULL,
+    activities TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    idempotency_key TEXT
+);
+CREATE INDEX IF NOT EXISTS mood_entries_timestamp ON mood_entries (timestamp, id);
+CREATE UNIQUE INDEX IF NOT EXISTS mood_entries_idempotency_key ON mood_entries (idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS mood_daily (
+    date TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    sum INTEGER NOT NULL,
+    sum_sq INTEGER NOT NULL,
+    min INTEGER NOT NULL,
+    max INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mood_daily_activities (
+    date TEXT NOT NULL,
+    activity TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    sum INTEGER NOT NULL,
+    PRIMARY KEY (date, activity)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS resources (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    content TEXT NOT NULL,
+    url TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resources_timestamp ON resources (timestamp);
+CREATE INDEX IF NOT EXISTS resources_category_timestamp ON resources (category, timestamp);
+
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL
+);
+"""
+
+# Columns added after their table was first created: (table, column, definition)
+ADDED_COLUMNS = [
+    ("conversation_summaries", "summarized_through_id", "TEXT"),
+]
+
+RESOURCE_COLUMNS = ("id", "title", "category", "description", "content", "url", "timestamp")
+TURN_COLUMNS = "id, user_message, ai_response, timestamp"
+
+
+def _create_schema(connection: sqlite3.Connection):
+    connection.executescript(SCHEMA)
+    # CREATE TABLE IF NOT EXISTS leaves tables from older versions as they were
+    for table, column, definition in ADDED_COLUMNS:
+        if column not in {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def to_text(timestamp: datetime) -> str:
+    # Fixed-width naive UTC, so text order is time order
+    return utc_naive(timestamp).isoformat(sep=" ", timespec="microseconds")
+
+
+def from_text(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _turn(row) -> dict:
+    return {"id": row[0], "user_message": row[1], "ai_response": row[2], "timestamp": from_text(row[3])}
+
+
+def _conversation(row) -> dict:
+    return {"id": row[0], "session_id": row[1], "user_message": row[2], "ai_response": row[3], "timestamp": from_text(row[4])}
+
+
+def _mood(row) -> dict:
+    entry = {"id": row[0], "mood_level": row[1], "notes": row[2], "activities": json.loads(row[3]), "timestamp": from_text(row[4])}
+    if row[5] is not None:
+        entry["idempotency_key"] = row[5]
+    return entry
+
+
+def _resource(row, columns: Sequence[str] = RESOURCE_COLUMNS) -> dict:
+    resource = dict(zip(columns, row))
+    if "timestamp" in resource:
+        resource["timestamp"] = from_text(resource["timestamp"])
+    return resource
+
+
+class SqliteConnection:
+    """One SQLite connection used from a single worker thread.
+
+    SQLite allows one writer at a time anyway, and a single thread keeps the connection
+    free of cross-thread locking; the event loop only waits on the executor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection = connection
+        return self._connection
+
+    async def run(self, function, *args):
+        def call():
+            return function(self._connect(), *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def fetchall(self, sql: str, parameters: Sequence = ()) -> list:
+        return await self.run(lambda connection: connection.execute(sql, parameters).fetchall())
+
+    async def write(self, function, *args):
+        """Run ``function(connection, *args)`` in one transaction."""
+        def transaction(connection):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(connection, *args)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+
+        return await self.run(transaction)
+
+    async def close(self):
+        if self._connection is not None:
+            await self.run(lambda connection: connection.close())
+            self._connection = None
+        self._executor.shutdown(wait=False)
+
+
+def _session_filter(session_id: str, after: Optional[Keyset]):
+    if after is None:
+        return "session_id = ?", [session_id]
+    timestamp = to_text(after[0])
+    return "session_id = ? AND (timestamp > ? OR (timestamp = ? AND id > ?))", [session_id, timestamp, timestamp, after[1]]
+
+
+class SqliteConversationRepository(ConversationRepository):
+    def __init__(self, connection: SqliteConnection):
+        self.connection = connection
+
+    async def insert_many(self, conversations: List[dict]):
+        rows = [
+            (turn["id"], turn["session_id"], turn["user_message"], turn["ai_response"], to_text(turn["timestamp"]))
+            for turn in conversations
+        ]
+        await self.connection.write(lambda connection: connection.executemany("INSERT OR IGNORE INTO conversations VALUES (?, ?, ?, ?, ?)", rows))
+
+    async def history(self, session_id: str, after: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        last = after
+        remaining = limit or None
+        while remaining is None or remaining > 0:
+            size = BATCH_SIZE if remaining is None else min(BATCH_SIZE, remaining)
+            where, parameters = _session_filter(session_id, last)
+            rows = await self.connection.fetchall(
+                f"SELECT id, session_id, user_message, ai_response, timestamp FROM conversations WHERE {where} "
+                "ORDER BY timestamp, id LIMIT ?", parameters + [size])
+            for row in rows:
+                yield _conversation(row)
+            if len(rows) < size:
+                return
+            last = (from_text(rows[-1][4]), rows[-1][0])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    async def recent(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        where, parameters = _session_filter(session_id, after)
+        rows = await self.connection.fetchall(
+            f"SELECT {TURN_COLUMNS} FROM conversations WHERE {where} ORDER BY timestamp DESC, id DESC LIMIT ?", parameters + [limit])
+        return [_turn(row) for row in reversed(rows)]
+
+    async def oldest(self, session_id: str, after: Optional[Keyset], limit: int) -> List[dict]:
+        where, parameters = _session_filter(session_id, after)
+        rows = await self.connection.fetchall(
+            f"SELECT {TURN_COLUMNS} FROM conversations WHERE {where} ORDER BY timestamp, id LIMIT ?", parameters + [limit])
+        return [_turn(row) for row in rows]
+
+    async def count(self, session_id: str, after: Optional[Keyset] = None) -> int:
+        where, parameters = _session_filter(session_id, after)
+        rows = await self.connection.fetchall(f"SELECT COUNT(*) FROM conversations WHERE {where}", parameters)
+        return rows[0][0]
+
+    async def get_summary(self, session_id: str) -> Optional[dict]:
+        rows = await self.connection.fetchall(
+            "SELECT summary, summarized_through, summarized_through_id, summarized_turns, updated_at FROM conversation_summaries WHERE session_id = ?", [session_id])
+        if not rows:
+            return None
+        summary, through, through_id, turns, updated_at = rows[0]
+        return {
+            "session_id": session_id,
+            "summary": summary,
+            "summarized_through": from_text(through),
+            "summarized_through_id": through_id,
+            "summarized_turns": turns,
+            "updated_at": from_text(updated_at),
+        }
+
+    async def save_summary(self, session_id: str, summary: dict):
+        row = (
+            session_id, summary["summary"], to_text(summary["summarized_through"]), summary.get("summarized_through_id"),
+            summary["summarized_turns"], to_text(summary["updated_at"]),
+        )
+        await self.connection.write(lambda connection: connection.execute(
+            "INSERT INTO conversation_summaries VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (session_id) DO UPDATE SET "
+            "summary = excluded.summary, summarized_through = excluded.summarized_through, "
+            "summarized_through_id = excluded.summarized_through_id, "
+            "summarized_turns = excluded.summarized_turns, updated_at = excluded.updated_at", row))
+
+
+def _insert_moods(connection: sqlite3.Connection, entries: List[dict]) -> List[Optional[str]]:
+    errors, days = [], {}
+    for entry in entries:
+        try:
+            connection.execute("INSERT INTO mood_entries VALUES (?, ?, ?, ?, ?, ?)", (
+                entry["id"], entry["mood_level"], entry.get("notes") or "", json.dumps(entry.get("activities") or []),
+                to_text(entry["timestamp"]), entry.get("idempotency_key"),
+            ))
+        except sqlite3.IntegrityError as e:
+            errors.append(DUPLICATE if entry.get("idempotency_key") and "idempotency_key" in str(e) else str(e))
+            continue
+        errors.append(None)
+        date = day_key(utc_naive(entry["timestamp"]))
+        days.setdefault(date, DayAccumulator(date)).add(entry)
+
+    # One upsert per day touched, as the MongoDB engine does
+    for day in days.values():
+        connection.execute(
+            "INSERT INTO mood_daily VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (date) DO UPDATE SET "
+            "count = count + excluded.count, sum = sum + excluded.sum, sum_sq = sum_sq + excluded.sum_sq, "
+            "min = MIN(min, excluded.min), max = MAX(max, excluded.max)",
+            (day.date, day.count, day.sum, day.sum_sq, day.min, day.max))
+        connection.executemany(
+            "INSERT INTO mood_daily_activities VALUES (?, ?, ?, ?) ON CONFLICT (date, activity) DO UPDATE SET "
+            "count = count + excluded.count, sum = sum + excluded.sum",
+            [(day.date, activity, counters["count"], counters["sum"]) for activity, counters in day.activities.items()])
+    return errors
+
+
+class SqliteMoodRepository(MoodRepository):
+    def __init__(self, connection: SqliteConnection):
+        self.connection = connection
+
+    async def insert(self, entry: dict):
+        errors = await self.connection.write(_insert_moods, [entry])
+        if errors[0] is not None:
+            raise ValueError(f"Could not insert mood entry: {errors[0]}")
+
+    async def insert_many(self, entries: List[dict]) -> List[Optional[str]]:
+        return await self.connection.write(_insert_moods, entries)
+
+    async def ids_for_keys(self, idempotency_keys: Sequence[str]) -> Dict[str, str]:
+        keys = list(idempotency_keys)
+        existing = {}
+        # Stays under SQLite's bound-parameter limit
+        for start in range(0, len(keys), BATCH_SIZE):
+            chunk = keys[start:start + BATCH_SIZE]
+            rows = await self.connection.fetchall(
+                f"SELECT idempotency_key, id FROM mood_entries WHERE idempotency_key IN ({', '.join('?' * len(chunk))})", chunk)
+            existing.update(rows)
+        return existing
+
+    async def _pages(self, where: str, parameters: list, order: str, limit: int) -> AsyncIterator[tuple]:
+        """Rows matching ``where`` in (timestamp, id) order ``order``, read in keyset batches."""
+        comparison = ">" if order == "ASC" else "<"
+        last = None
+        remaining = limit or None
+        while remaining is None or remaining > 0:
+            size = BATCH_SIZE if remaining is None else min(BATCH_SIZE, remaining)
+            clauses, values = ([where], list(parameters)) if where else ([], [])
+            if last is not None:
+                clauses.append(f"(timestamp {comparison} ? OR (timestamp = ? AND id {comparison} ?))")
+                values += [last[0], last[0], last[1]]
+            sql = "SELECT id, mood_level, notes, activities, timestamp, idempotency_key FROM mood_entries"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            rows = await self.connection.fetchall(sql + f" ORDER BY timestamp {order}, id {order} LIMIT ?", values + [size])
+            for row in rows:
+                yield row
+            if len(rows) < size:
+                return
+            last = (from_text(rows[-1][4]), rows[-1][0])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    async def history(self, before: Optional[Keyset] = None, limit: int = 0) -> AsyncIterator[dict]:
+        where, parameters = "", []
+        if before is not None:
+            timestamp = to_text(before[0])
+            where, parameters = "(timestamp < ? OR (timestamp = ? AND id < ?))", [timestamp, timestamp, before[1]]
+        async for row in self._pages(where, parameters, "DESC", limit):
+            yield _mood(row)
+
+    async def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None, fields: Optional[Sequence[str]] = None) -> AsyncIterator[dict]:
+        clauses, parameters = [], []
+        if start:
+            clauses.append("timestamp >= ?")
+            parameters.append(to_text(start))
+        if end:
+            clauses.append("timestamp < ?")
+            parameters.append(to_text(end))
+        async for row in self._pages(" AND ".join(clauses), parameters, "ASC", 0):
+            yield select_fields(_mood(row), fields)
+
+    async def daily(self, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        clauses, parameters = [], []
+        if start:
+            clauses.append("date >= ?")
+            parameters.append(start)
+        if end:
+            clauses.append("date < ?")
+            parameters.append(end)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        days = await self.connection.fetchall(f"SELECT date, count, sum, sum_sq, min, max FROM mood_daily{where} ORDER BY date", parameters)
+        activities = await self.connection.fetchall(f"SELECT date, activity, count, sum FROM mood_daily_activities{where}", parameters)
+        by_date: Dict[str, dict] = {}
+        for date, activity, count, total in activities:
+            by_date.setdefault(date, {})[activity] = {"count": count, "sum": total}
+        return [
+            {"date": date, "count": count, "sum": total, "sum_sq": sum_sq, "min": low, "max": high, "activities": by_date.get(date, {})}
+            for date, count, total, sum_sq, low, high in days
+        ]
+
+
+class SqliteResourceRepository(ResourceRepository):
+    def __init__(self, connection: SqliteConnection):
+        self.connection = connection
+
+    @staticmethod
+    def _row(resource: dict) -> tuple:
+        return (
+            resource["id"], resource["title"], resource["category"], resource["description"],
+            resource["content"], resource.get("url") or "", to_text(resource["timestamp"]),
+        )
+
+    async def count(self) -> int:
+        return (await self.connection.fetchall("SELECT COUNT(*) FROM resources"))[0][0]
+
+    async def insert(self, resource: dict):
+        await self.insert_many([resource])
+
+    async def insert_many(self, resources: List[dict]):
+        rows = [self._row(resource) for resource in resources]
+        await self.connection.write(lambda connection: connection.executemany("INSERT INTO resources VALUES (?, ?, ?, ?, ?, ?, ?)", rows))
+
+    async def list(self, category: Optional[str] = None, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        columns = RESOURCE_COLUMNS if fields is None else [column for column in RESOURCE_COLUMNS if column in fields]
+        sql = f"SELECT {', '.join(columns)} FROM resources"
+        parameters = []
+        if category:
+            sql += " WHERE category = ?"
+            parameters.append(category)
+        rows = await self.connection.fetchall(sql + " ORDER BY timestamp DESC", parameters)
+        return [_resource(row, columns) for row in rows]
+
+    async def get(self, resource_id: str) -> Optional[dict]:
+        rows = await self.connection.fetchall(f"SELECT {', '.join(RESOURCE_COLUMNS)} FROM resources WHERE id = ?", [resource_id])
+        return _resource(rows[0]) if rows else None
+
+    async def categories(self) -> List[str]:
+        return [row[0] for row in await self.connection.fetchall("SELECT DISTINCT category FROM resources")]
+
+    async def iter_all(self) -> AsyncIterator[dict]:
+        last = ""
+        while True:
+            rows = await self.connection.fetchall(
+                f"SELECT {', '.join(RESOURCE_COLUMNS)} FROM resources WHERE id > ? ORDER BY id LIMIT ?", [last, BATCH_SIZE])
+            for row in rows:
+                yield _resource(row)
+            if len(rows) < BATCH_SIZE:
+                return
+            last = rows[-1][0]
+
+
+class SqliteStorage(Storage):
+    """A single SQLite file in WAL mode, for small deployments that don't run MongoDB."""
+
+    def __init__(self, path: str):
+        self.connection = SqliteConnection(path)
+        self.conversations = SqliteConversationRepository(self.connection)
+        self.moods = SqliteMoodRepository(self.connection)
+        self.resources = SqliteResourceRepository(self.connection)
+
+    async def setup(self):
+        await self.connection.run(_create_schema)
+
+    async def ping(self):
+        await self.connection.fetchall("SELECT 1")
+
+    async def close(self):
+        await self.connection.close()
+
+    async def applied_migrations(self) -> Set[str]:
+        return {row[0] for row in await self.connection.fetchall("SELECT name FROM migrations")}
+
+    async def record_migration(self, name: str):
+        row = (name, to_text(datetime.now(timezone.utc)))
+        await self.connection.write(lambda connection: connection.execute("INSERT OR IGNORE INTO migrations VALUES (?, ?)", row))
+
+    def is_transient_error(self, error: Exception) -> bool:
+        if isinstance(error, sqlite3.OperationalError):
+            return (getattr(error, "sqlite_errorcode", 0) & 0xFF) in TRANSIENT_ERROR_CODES
+        return super().is_transient_error(error)
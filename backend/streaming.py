@@ -0,0 +1,64 @@
+import asyncio
+import json
+import re
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+# Splits a complete reply into word-sized tokens, keeping the whitespace
+_TOKEN_PATTERN = re.compile(r"\s*\S+")
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event frame."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+async def iter_reply_tokens(chat, user_message) -> AsyncIterator[str]:
+    """Yield reply tokens as the LLM produces them.
+
+    Uses the client's ``stream_message`` when it has one (OpenAIChat). emergentintegrations'
+    LlmChat has no streaming call, so its full ``send_message`` reply is re-chunked and
+    callers see the same stream shape, but without the earlier first token.
+    """
+    stream_message = getattr(chat, "stream_message", None)
+    if stream_message is not None:
+        async for token in stream_message(user_message):
+            yield token
+        return
+
+    reply = await chat.send_message(user_message)
+    for match in _TOKEN_PATTERN.finditer(reply):
+        yield match.group(0)
+        await asyncio.sleep(0)
+
+
+async def sse_chat_events(
+    chat,
+    user_message,
+    session_id: str,
+    on_complete: Callable[[str], Awaitable[None]],
+    crisis: Optional[dict] = None,
+) -> AsyncIterator[str]:
+    """Stream a chat reply as SSE frames and hand the full reply to ``on_complete`` at the end.
+
+    ``crisis`` resources, when given, are sent before the first token. A ``chat`` of None
+    means the client could not be loaded, and is reported as an error event.
+    """
+    yield sse_event({"session_id": session_id}, event="session")
+    if crisis is not None:
+        yield sse_event(crisis, event="crisis")
+
+    tokens = []
+    try:
+        if chat is None:
+            raise RuntimeError("Chat session unavailable")
+        async for token in iter_reply_tokens(chat, user_message):
+            tokens.append(token)
+            yield sse_event({"token": token})
+        ai_response = "".join(tokens)
+        await on_complete(ai_response)
+    except Exception as e:
+        yield sse_event({"detail": f"Chat error: {str(e)}"}, event="error")
+        return
+
+    yield sse_event({"session_id": session_id, "response": ai_response}, event="done")
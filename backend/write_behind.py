@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import math
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindFull(Exception):
+    """The queue stayed full for ``put_timeout`` seconds; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_connection_error(error: Exception) -> bool:
+    return isinstance(error, (OSError, TimeoutError))
+
+
+class WriteBehindQueue:
+    """Buffers documents in memory and inserts them in batches from a background task.
+
+    ``put`` returns as soon as the document is queued. While the queue is full it waits
+    (backpressure), for at most ``put_timeout`` seconds before raising WriteBehindFull.
+    A batch is flushed when it reaches ``max_batch`` documents or ``flush_interval``
+    seconds after its first one. Until a document is stored it stays visible through
+    ``pending`` so readers can merge it (read-your-writes).
+
+    Failed writes for which ``is_transient`` is true are retried with backoff until they
+    succeed. Any other failure is permanent: the batch is retried one document at a
+    time, and documents that still cannot be stored are logged and dropped.
+    """
+
+    def __init__(
+        self,
+        insert_many: Callable[[List[dict]], Awaitable[None]],
+        key: Callable[[dict], str],
+        max_batch: int = 100,
+        flush_interval: float = 0.05,
+        max_queued: int = 10000,
+        max_retry_delay: float = 5.0,
+        put_timeout: float = 2.0,
+        is_transient: Callable[[Exception], bool] = is_connection_error,
+    ):
+        self._insert_many = insert_many
+        self._key = key
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queued = max_queued
+        self.max_retry_delay = max_retry_delay
+        self.put_timeout = put_timeout
+        self._is_transient = is_transient
+        self._retry_delay = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[str, Dict[str, dict]] = {}
+        self._closing = False
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, document: dict):
+        if self._closing:
+            raise RuntimeError("Write-behind queue is shutting down")
+        self.start()
+        key = self._key(document)
+        self._pending.setdefault(key, {})[document["id"]] = document
+        try:
+            # The driver adds _id to inserted documents, so the queued copy is kept apart from the pending one
+            await asyncio.wait_for(self._queue.put(dict(document)), self.put_timeout)
+        except asyncio.TimeoutError:
+            self._forget(key, document["id"])
+            raise WriteBehindFull("Too many writes are waiting to be stored", max(1, math.ceil(self._retry_delay)))
+        except BaseException:
+            # Cancelled while waiting (the client went away): the turn was never queued
+            self._forget(key, document["id"])
+            raise
+
+    def pending(self, key: str) -> List[dict]:
+        return list(self._pending.get(key, {}).values())
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queued": self.max_queued,
+            "pending_keys": len(self._pending),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+    async def _next_batch(self) -> List[dict]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            await self._flush(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _flush(self, batch: List[dict]):
+        await self._write(batch)
+        self.batches += 1
+        for document in batch:
+            self._forget(self._key(document), document["id"])
+
+    async def _write(self, batch: List[dict]):
+        delay = 0.1
+        while True:
+            try:
+                await self._insert_many(batch)
+                self.flushed += len(batch)
+                self._retry_delay = 0.0
+                return
+            except Exception as e:
+                self.failures += 1
+                if not self._is_transient(e):
+                    error = e
+                    break
+                logger.exception("Failed to write %d queued documents; retrying", len(batch))
+            self._retry_delay = delay
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+        if len(batch) > 1:
+            # Keep the documents that can be stored; only the bad ones are dropped
+            logger.warning("Writing %d queued documents failed (%s); retrying them one at a time", len(batch), error)
+            for document in batch:
+                await self._write([document])
+            return
+        self.dropped += 1
+        logger.error("Dropping queued document %s that cannot be stored: %s", batch[0].get("id"), error)
+
+    def _forget(self, key: str, document_id: str):
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.pop(document_id, None)
+            if not pending:
+                del self._pending[key]
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop accepting documents and flush what is queued."""
+        self._closing = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Write-behind queue shut down with %d documents not stored", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
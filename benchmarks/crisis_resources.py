@@ -0,0 +1,83 @@
+"""Requests/sec for /api/crisis-resources: dict literal through FastAPI's encoder vs. the precompressed payload.
+
+Both handlers are mounted on an in-process FastAPI app and called through ASGI directly,
+so the numbers cover routing, handler and serialization cost without network overhead.
+
+    python benchmarks/crisis_resources.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from fastapi import FastAPI, Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from crisis import build_crisis_payload, load_crisis_resources  # noqa: E402
+
+CRISIS_RESOURCES = load_crisis_resources()
+crisis_payload = build_crisis_payload(CRISIS_RESOURCES)
+
+app = FastAPI()
+
+
+@app.get("/dict-literal")
+async def dict_literal_handler():
+    # Same shape as the original handler: a fresh nested dict per call, encoded by FastAPI
+    return {
+        "emergency_contacts": [dict(contact) for contact in CRISIS_RESOURCES["emergency_contacts"]],
+        "immediate_steps": list(CRISIS_RESOURCES["immediate_steps"]),
+    }
+
+
+@app.get("/precompressed")
+async def precompressed_handler(request: Request):
+    return crisis_payload.response(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+
+
+async def call(path, headers):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": headers, "client": ("bench", 1), "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(path, headers, requests):
+    await call(path, headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        body = await call(path, headers)
+    elapsed = time.perf_counter() - start
+    return {"requests_per_s": requests / elapsed, "mean_us": elapsed / requests * 1e6, "body_bytes": len(body)}
+
+
+async def main(args):
+    gzip_headers = [(b"accept-encoding", b"gzip, deflate")]
+    results = {
+        "config": vars(args),
+        "dict_literal": await measure("/dict-literal", [], args.requests),
+        "precompressed_identity": await measure("/precompressed", [], args.requests),
+        "precompressed_gzip": await measure("/precompressed", gzip_headers, args.requests),
+        "precompressed_304": await measure("/precompressed", [(b"if-none-match", crisis_payload.etag.encode())], args.requests),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
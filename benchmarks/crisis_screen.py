@@ -0,0 +1,83 @@
+"""Throughput of the crisis-language pre-screen on long messages.
+
+Compares the compiled CrisisMatcher with two straightforward alternatives over the same
+phrase list: one regular expression per phrase, and substring checks per phrase on the
+lowercased message (no word boundaries or tolerance for punctuation between words).
+Each message is benign filler, optionally with a phrase at the end so a full scan is
+needed either way.
+
+    python benchmarks/crisis_screen.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from crisis_screen import CrisisMatcher, load_crisis_phrases  # noqa: E402
+
+FILLER = (
+    "Today was long. I went to work, skipped lunch and kept thinking about the deadline. "
+    "My sister called and we talked about the weekend; it helped a bit, but I still feel tense. "
+)
+
+
+def per_phrase_regexes(phrases):
+    patterns = [
+        re.compile(r"\b" + r"\W+".join(re.escape(word).replace(r"\*", r"\w*") for word in phrase.split()) + r"\b", re.IGNORECASE)
+        for items in phrases.values() for phrase in items
+    ]
+    return lambda text: any(pattern.search(text) for pattern in patterns)
+
+
+def per_phrase_substrings(phrases):
+    needles = [phrase.lower().rstrip("*") for items in phrases.values() for phrase in items]
+
+    def check(text):
+        text = text.lower()
+        return any(needle in text for needle in needles)
+
+    return check
+
+
+def measure(check, text, min_seconds):
+    runs, started = 0, time.perf_counter()
+    while True:
+        check(text)
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seconds", type=float, default=0.5, help="minimum time per measurement")
+    args = parser.parse_args()
+
+    phrases = load_crisis_phrases()
+    matcher = CrisisMatcher(phrases)
+    checks = {
+        "crisis_matcher": matcher.search,
+        "per_phrase_regex": per_phrase_regexes(phrases),
+        "per_phrase_substring": per_phrase_substrings(phrases),
+    }
+
+    report = {"phrases": sum(len(items) for items in phrases.values()), "results": []}
+    for size in args.sizes:
+        benign = (FILLER * (size // len(FILLER) + 1))[:size]
+        for label, text in (("benign", benign), ("match_at_end", benign + " I want to end my life")):
+            assert matcher.search(text) == (label != "benign")
+            row = {"chars": len(text), "message": label}
+            for name, check in checks.items():
+                seconds = measure(check, text, args.seconds)
+                row[name] = {"us_per_message": round(seconds * 1e6, 1), "mb_per_s": round(len(text) / seconds / 1e6, 1)}
+            report["results"].append(row)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
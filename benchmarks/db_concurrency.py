@@ -0,0 +1,186 @@
+"""Concurrency benchmark for the MongoDB access path.
+
+Replays a mixed mood/resource/chat workload the way the API handlers issue it,
+once with blocking pymongo calls inside coroutines (the old server behaviour)
+and once with Motor, and prints per-operation latency percentiles as JSON.
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/db_concurrency.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from database import create_mongo_client  # noqa: E402
+
+OPERATIONS = {
+    "mood_log": 0.2,
+    "mood_history": 0.25,
+    "resources": 0.25,
+    "categories": 0.1,
+    "chat": 0.2,
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else None,
+    }
+
+
+def mood_doc():
+    return {
+        "id": str(uuid.uuid4()),
+        "mood_level": random.randint(1, 10),
+        "notes": "",
+        "activities": random.sample(["exercise", "reading", "meditation", "sleep"], 2),
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+def chat_doc():
+    return {
+        "id": str(uuid.uuid4()),
+        "session_id": str(uuid.uuid4()),
+        "user_message": "I feel anxious",
+        "ai_response": "x" * 800,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+class BlockingWorkload:
+    def __init__(self, db, llm_latency):
+        self.db = db
+        self.llm_latency = llm_latency
+
+    async def run(self, op):
+        if op == "mood_log":
+            self.db.mood_entries.insert_one(mood_doc())
+        elif op == "mood_history":
+            list(self.db.mood_entries.find({}, {"_id": 0}).sort("timestamp", -1).limit(30))
+        elif op == "resources":
+            list(self.db.resources.find({}, {"_id": 0}).sort("timestamp", -1))
+        elif op == "categories":
+            self.db.resources.distinct("category")
+        elif op == "chat":
+            await asyncio.sleep(self.llm_latency)
+            self.db.conversations.insert_one(chat_doc())
+
+
+class MotorWorkload(BlockingWorkload):
+    async def run(self, op):
+        if op == "mood_log":
+            await self.db.mood_entries.insert_one(mood_doc())
+        elif op == "mood_history":
+            await self.db.mood_entries.find({}, {"_id": 0}).sort("timestamp", -1).limit(30).to_list(length=30)
+        elif op == "resources":
+            await self.db.resources.find({}, {"_id": 0}).sort("timestamp", -1).to_list(length=None)
+        elif op == "categories":
+            await self.db.resources.distinct("category")
+        elif op == "chat":
+            await asyncio.sleep(self.llm_latency)
+            await self.db.conversations.insert_one(chat_doc())
+
+
+def seed(db, resources, moods):
+    db.resources.delete_many({})
+    db.mood_entries.delete_many({})
+    db.conversations.delete_many({})
+    categories = ["anxiety", "coping-strategies", "mindfulness", "professional-help", "sleep"]
+    db.resources.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Resource {i}",
+            "category": categories[i % len(categories)],
+            "description": "description",
+            "content": "content " * 60,
+            "url": "",
+            "timestamp": datetime.now(timezone.utc),
+        }
+        for i in range(resources)
+    ])
+    db.mood_entries.insert_many([mood_doc() for _ in range(moods)])
+
+
+async def drive(workload, plan, concurrency):
+    latencies = {op: [] for op in OPERATIONS}
+    queue = list(plan)
+
+    async def worker():
+        while queue:
+            op = queue.pop()
+            start = time.perf_counter()
+            await workload.run(op)
+            latencies[op].append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "elapsed_s": elapsed,
+        "throughput_rps": len(everything) / elapsed if elapsed else None,
+        "overall": summarize(everything),
+        "operations": {op: summarize(values) for op, values in latencies.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="simulated LLM reply time in seconds")
+    parser.add_argument("--resources", type=int, default=200)
+    parser.add_argument("--moods", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", default="mental_health_bench")
+    args = parser.parse_args()
+
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    random.seed(args.seed)
+    plan = random.choices(list(OPERATIONS), weights=list(OPERATIONS.values()), k=args.requests)
+
+    sync_client = MongoClient(mongo_url)
+    sync_db = sync_client[args.database]
+    seed(sync_db, args.resources, args.moods)
+
+    results = {"config": vars(args)}
+    results["pymongo_blocking"] = asyncio.run(drive(BlockingWorkload(sync_db, args.llm_latency), plan, args.concurrency))
+
+    async def motor_run():
+        motor_client = create_mongo_client(mongo_url)
+        try:
+            return await drive(MotorWorkload(motor_client[args.database], args.llm_latency), plan, args.concurrency)
+        finally:
+            motor_client.close()
+
+    results["motor"] = asyncio.run(motor_run())
+
+    sync_client.drop_database(args.database)
+    sync_client.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Stand-in for the LLM client in benchmarks: a fixed reply with a configurable latency.
+
+Kept apart from tests/fakes.py so benchmarks do not depend on the test package.
+"""
+import asyncio
+
+
+class SimulatedLlmChat:
+    """Built like ``LlmChat``; answers after ``first_token_delay``, then one token per ``token_delay`` seconds."""
+
+    def __init__(self, tokens, first_token_delay=0.0, token_delay=0.0, **kwargs):
+        self.tokens = list(tokens)
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    def with_model(self, provider, model):
+        return self
+
+    def with_max_tokens(self, max_tokens):
+        return self
+
+    async def stream_message(self, user_message):
+        await asyncio.sleep(self.first_token_delay)
+        for index, token in enumerate(self.tokens):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def send_message(self, user_message):
+        return "".join([token async for token in self.stream_message(user_message)])
+
+
+class SimulatedUserMessage:
+    def __init__(self, text):
+        self.text = text
@@ -0,0 +1,109 @@
+"""Query latency for the API route queries on a seeded dataset, without and with the managed indexes.
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/index_latency.py --documents 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from database import create_mongo_client  # noqa: E402
+from indexes import ensure_indexes, find_collection_scans  # noqa: E402
+
+CATEGORIES = ["anxiety", "coping-strategies", "mindfulness", "professional-help", "sleep", "depression"]
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))]
+
+
+async def seed(db, documents, sessions, batch_size=10000):
+    await db.conversations.drop()
+    await db.mood_entries.drop()
+    await db.resources.drop()
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+
+    async def insert(collection, factory, count):
+        for offset in range(0, count, batch_size):
+            await collection.insert_many([factory(i) for i in range(offset, min(count, offset + batch_size))], ordered=False)
+
+    await insert(db.conversations, lambda i: {
+        "id": str(uuid.uuid4()),
+        "session_id": session_ids[i % sessions],
+        "user_message": "message",
+        "ai_response": "reply",
+        "timestamp": START + timedelta(seconds=i),
+    }, documents)
+    await insert(db.mood_entries, lambda i: {
+        "id": str(uuid.uuid4()),
+        "mood_level": random.randint(1, 10),
+        "notes": "",
+        "activities": [],
+        "timestamp": START + timedelta(seconds=i),
+    }, documents)
+    await insert(db.resources, lambda i: {
+        "id": str(uuid.uuid4()),
+        "title": f"Resource {i}",
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "description": "description",
+        "content": "content",
+        "url": "",
+        "timestamp": START + timedelta(seconds=i),
+    }, documents // 10)
+    return session_ids
+
+
+async def measure(db, session_ids, iterations):
+    queries = {
+        "chat_history": lambda: db.conversations.find({"session_id": random.choice(session_ids)}, {"_id": 0}).sort("timestamp", 1).to_list(length=None),
+        "mood_history": lambda: db.mood_entries.find({}, {"_id": 0}).sort("timestamp", -1).limit(30).to_list(length=30),
+        "resources_by_category": lambda: db.resources.find({"category": random.choice(CATEGORIES)}, {"_id": 0}).sort("timestamp", -1).limit(50).to_list(length=50),
+        "resource_categories": lambda: db.resources.distinct("category"),
+    }
+    results = {}
+    for name, run in queries.items():
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await run()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = {"p50_ms": percentile(samples, 50), "p95_ms": percentile(samples, 95), "p99_ms": percentile(samples, 99)}
+    return results
+
+
+async def main(args):
+    client = create_mongo_client(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[args.database]
+    random.seed(args.seed)
+    try:
+        session_ids = await seed(db, args.documents, args.sessions)
+        results = {"config": vars(args)}
+        results["collection_scans_without_indexes"] = len(await find_collection_scans(db))
+        results["without_indexes"] = await measure(db, session_ids, args.iterations)
+        start = time.perf_counter()
+        await ensure_indexes(db)
+        results["index_build_s"] = time.perf_counter() - start
+        results["collection_scans_with_indexes"] = len(await find_collection_scans(db))
+        results["with_indexes"] = await measure(db, session_ids, args.iterations)
+        print(json.dumps(results, indent=2))
+    finally:
+        await client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000000)
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", default="mental_health_index_bench")
+    asyncio.run(main(parser.parse_args()))
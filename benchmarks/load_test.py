@@ -0,0 +1,207 @@
+"""Offline load test of the API with local storage and a stand-in for the LLM.
+
+Imports the FastAPI app in-process and serves it through httpx's ASGI transport, so no
+server, database or API key is needed. Storage is the in-memory engine, or a throwaway
+SQLite file with --engine sqlite, and LlmChat is replaced by SimulatedLlmChat, which answers after
+--llm-latency-ms plus --llm-token-ms per token. A fixed, seeded mix of chat, mood and
+resource requests is driven by --concurrency workers, and throughput plus latency
+percentiles (overall and per operation) are printed as JSON for comparison between commits.
+
+    python benchmarks/load_test.py --requests 2000 --concurrency 50 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from fake_llm import SimulatedLlmChat, SimulatedUserMessage
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+from storage import create_storage  # noqa: E402
+
+# Operation -> share of the requests
+OPERATIONS = {
+    "chat_new": 0.1,
+    "chat_followup": 0.1,
+    "mood_log": 0.2,
+    "mood_history": 0.15,
+    "mood_analytics": 0.05,
+    "resources": 0.2,
+    "resource_search": 0.1,
+    "categories": 0.1,
+}
+
+OPENERS = ["I feel anxious", "I can't sleep", "Work has been overwhelming lately", "I feel lonely", "How do I calm down?"]
+SEARCHES = ["anxiety", "sleep", "breathing", "mindful", "therapy", "stress"]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return round(ordered[index], 2)
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(max(latencies), 2) if latencies else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def seed_moods(storage, count):
+    now = datetime.now(timezone.utc)
+    entries = []
+    for index in range(count):
+        entries.append({
+            "id": str(uuid.uuid4()),
+            "mood_level": random.randint(1, 10),
+            "notes": "",
+            "activities": random.sample(["exercise", "reading", "meditation", "sleep"], 2),
+            "timestamp": now - timedelta(minutes=index * 37),
+        })
+    await storage.moods.insert_many(entries)
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.sessions = []
+
+    async def run(self, op) -> httpx.Response:
+        if op == "chat_new" or (op == "chat_followup" and not self.sessions):
+            response = await self.client.post("/api/chat", json={"message": random.choice(OPENERS)})
+            if response.status_code == 200:
+                self.sessions.append(response.json()["session_id"])
+            return response
+        if op == "chat_followup":
+            message = {"message": "Thanks, that helps a little. What else can I try?", "session_id": random.choice(self.sessions)}
+            return await self.client.post("/api/chat", json=message)
+        if op == "mood_log":
+            return await self.client.post("/api/mood", json={"mood_level": random.randint(1, 10), "notes": "", "activities": ["walking"]})
+        if op == "mood_history":
+            return await self.client.get("/api/mood/history", params={"limit": 30})
+        if op == "mood_analytics":
+            return await self.client.get("/api/mood/analytics")
+        if op == "resources":
+            return await self.client.get("/api/resources", headers={"Accept-Encoding": "gzip"})
+        if op == "resource_search":
+            return await self.client.get("/api/resources/search", params={"q": random.choice(SEARCHES)})
+        if op == "categories":
+            return await self.client.get("/api/resources/categories")
+        raise ValueError(f"unknown operation {op}")
+
+
+async def drive(server, plan, concurrency):
+    latencies = {op: [] for op in OPERATIONS}
+    statuses = {op: Counter() for op in OPERATIONS}
+    queue = list(plan)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        workload = Workload(client)
+
+        async def worker():
+            while queue:
+                op = queue.pop()
+                start = time.perf_counter()
+                response = await workload.run(op)
+                latencies[op].append((time.perf_counter() - start) * 1000)
+                statuses[op][response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    everything = [value for values in latencies.values() for value in values]
+    errors = sum(count for counter in statuses.values() for status, count in counter.items() if status >= 400)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(everything) / elapsed, 1) if elapsed else None,
+        "errors": errors,
+        "overall": summarize(everything),
+        "operations": {
+            op: dict(summarize(values), statuses={str(status): count for status, count in sorted(statuses[op].items())})
+            for op, values in latencies.items()
+        },
+    }
+
+
+async def run(args, directory):
+    import server
+
+    def build_chat(**kwargs):
+        return SimulatedLlmChat(
+            tokens=["I hear ", "you. ", "Let's ", "take ", "this ", "one ", "step ", "at ", "a ", "time."],
+            first_token_delay=args.llm_latency_ms / 1000,
+            token_delay=args.llm_token_ms / 1000,
+            **kwargs,
+        )
+
+    # The handlers look these up as module globals on every call
+    server.storage = create_storage(args.engine, path=os.path.join(directory, "load_test.db"))
+    server.LlmChat = build_chat
+    server.UserMessage = SimulatedUserMessage
+    # What the startup hook does, waited for rather than run in the background
+    server.conversation_writer.start()
+    await server.prepare_storage()
+    await seed_moods(server.storage, args.moods)
+    try:
+        plan = random.choices(list(OPERATIONS), weights=list(OPERATIONS.values()), k=args.requests)
+        if args.warmup:
+            await drive(server, plan[:args.warmup], args.concurrency)
+        return await drive(server, plan, args.concurrency)
+    finally:
+        await server.conversation_writer.stop()
+        await server.storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engine", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="simulated time to the first LLM token")
+    parser.add_argument("--llm-token-ms", type=float, default=0, help="simulated time between LLM tokens")
+    parser.add_argument("--moods", type=int, default=1000, help="mood entries stored before the run")
+    parser.add_argument("--warmup", type=int, default=100, help="requests run and discarded before measuring")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        report = {"commit": git_commit(), "config": vars(args), "results": asyncio.run(run(args, directory))}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
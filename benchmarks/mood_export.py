@@ -0,0 +1,135 @@
+"""Throughput of /api/mood/export (CSV and Parquet) against reading the same history as JSON pages.
+
+Serves the app in-process through httpx's ASGI transport on the in-memory or a throwaway
+SQLite storage seeded with --entries mood entries. Each variant reads the full history:
+
+- csv, parquet: one streamed /api/mood/export response
+- json_pages: /api/mood/history following next_cursor, --page-size entries per page
+- ndjson: one streamed /api/mood/history response
+
+Reports rows per second, bytes transferred and, with --trace-memory, the peak Python
+allocation during the read (slower, so throughput is measured in a separate pass).
+httpx's ASGI transport holds the whole response body, so peak_mb includes about
+``bytes`` on top of what the server itself allocates.
+
+    python benchmarks/mood_export.py --entries 200000 --engine sqlite --trace-memory
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from storage import create_storage  # noqa: E402
+
+ACTIVITIES = ["exercise", "reading", "meditation", "sleep", "walking"]
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+async def seed(storage, entries, batch_size=5000):
+    for offset in range(0, entries, batch_size):
+        await storage.moods.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "mood_level": random.randint(1, 10),
+                "notes": random.choice(["", "", "Felt calmer after a walk", "Long day at work, tired"]),
+                "activities": random.sample(ACTIVITIES, random.randint(0, 3)),
+                "timestamp": START + timedelta(minutes=17 * index),
+            }
+            for index in range(offset, min(entries, offset + batch_size))
+        ])
+
+
+async def read_export(client, format):
+    received = 0
+    async with client.stream("GET", "/api/mood/export", params={"format": format}) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+
+async def read_json_pages(client, page_size):
+    received, cursor = 0, None
+    while True:
+        params = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/mood/history", params=params)
+        response.raise_for_status()
+        received += len(response.content)
+        cursor = response.json()["next_cursor"]
+        if not cursor:
+            return received
+
+
+async def read_ndjson(client):
+    received = 0
+    async with client.stream("GET", "/api/mood/history", headers={"Accept": "application/x-ndjson"}) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+
+async def measure(client, read, entries, repeat, trace_memory):
+    samples, received = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        received = await read()
+        samples.append(time.perf_counter() - started)
+    best = min(samples)
+    result = {"best_s": round(best, 3), "rows_per_s": round(entries / best, 1), "bytes": received}
+    if trace_memory:
+        tracemalloc.start()
+        await read()
+        result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    return result
+
+
+async def main(args):
+    import server
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        server.storage = create_storage(args.engine, path=os.path.join(directory, "export.db"))
+        await server.storage.setup()
+        await seed(server.storage, args.entries)
+        server.MOOD_EXPORT_CHUNK_ROWS = args.chunk_rows
+        variants = {
+            "csv": lambda client: read_export(client, "csv"),
+            "parquet": lambda client: read_export(client, "parquet"),
+            "json_pages": lambda client: read_json_pages(client, args.page_size),
+            "ndjson": read_ndjson,
+        }
+        results = {"config": vars(args), "results": {}}
+        transport = httpx.ASGITransport(app=server.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for name in args.variants:
+                    results["results"][name] = await measure(
+                        client, lambda: variants[name](client), args.entries, args.repeat, args.trace_memory)
+        finally:
+            await server.storage.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engine", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="entries per CSV chunk / Parquet row group")
+    parser.add_argument("--page-size", type=int, default=100, help="limit per JSON history page")
+    parser.add_argument("--variants", nargs="+", choices=["csv", "parquet", "json_pages", "ndjson"], default=["csv", "parquet", "json_pages", "ndjson"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""Query latency of the in-process resource search index over a synthetic catalog.
+
+    python benchmarks/resource_search.py --resources 100000 --queries 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from search_index import ResourceSearchIndex  # noqa: E402
+
+CATEGORIES = ["anxiety", "depression", "coping-strategies", "mindfulness", "professional-help", "sleep", "stress"]
+TOPIC_WORDS = (
+    "anxiety panic worry stress depression sadness grief sleep insomnia breathing grounding mindfulness "
+    "meditation therapy counselling support exercise journaling gratitude routine relationships loneliness "
+    "burnout motivation resilience selfcare nutrition trauma boundaries emotions thoughts habits"
+).split()
+FILLER_WORDS = (
+    "the a to of and in is for with your you can this that it on be are as help when more daily simple "
+    "steps practice time feel may try people life work week small start keep find notice moment"
+).split()
+QUERIES = ["anxiety", "panic breathing", "sleep routine", "therapy support", "mindful", "gratitude journ", "burnout work stress", "gr"]
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(TOPIC_WORDS) if rng.random() < 0.3 else rng.choice(FILLER_WORDS) for _ in range(length)).capitalize() + "."
+
+
+def synthetic_resource(rng):
+    # Pad the vocabulary with rare terms so prefix expansion has realistic work to do
+    rare = f"{rng.choice(TOPIC_WORDS)}{rng.randrange(5000)}"
+    return {
+        "id": str(uuid.uuid4()),
+        "title": sentence(rng, 6),
+        "category": rng.choice(CATEGORIES),
+        "description": sentence(rng, 15),
+        "content": " ".join(sentence(rng, 18) for _ in range(4)) + f" {rare}",
+        "url": "",
+    }
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resources", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    resources = [synthetic_resource(rng) for _ in range(args.resources)]
+    started = time.perf_counter()
+    index = ResourceSearchIndex.from_resources(resources)
+    build_seconds = time.perf_counter() - started
+
+    # The first query per term converts its postings to arrays; that one-off cost is excluded
+    for query in QUERIES:
+        index.search(query, limit=args.limit)
+
+    report = {"resources": args.resources, "build_seconds": round(build_seconds, 2), "queries": {}}
+    for query in QUERIES:
+        samples = []
+        for _ in range(max(1, args.queries // len(QUERIES))):
+            started = time.perf_counter()
+            result = index.search(query, limit=args.limit)
+            samples.append((time.perf_counter() - started) * 1000)
+        report["queries"][query] = {
+            "results": len(result["results"]),
+            "p50_ms": round(percentile(samples, 0.5), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+        }
+
+    started = time.perf_counter()
+    index.add(synthetic_resource(rng))
+    report["incremental_add_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    # The add changed the average length, so this query recomputes the impacts of its terms
+    started = time.perf_counter()
+    index.search(QUERIES[0], limit=args.limit)
+    report["first_query_after_add_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
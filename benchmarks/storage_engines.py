@@ -0,0 +1,160 @@
+"""Write and read latency of the storage engines on the same seeded dataset.
+
+Each engine gets the same conversations, mood entries and resources, written in batches
+the size the write-behind queue and bulk ingest use, then the reads the API routes make
+are timed. mongo is included when MONGO_URL is reachable (its database is dropped
+afterwards); sqlite uses a temporary file.
+
+    python benchmarks/storage_engines.py --documents 100000
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/storage_engines.py --engines mongo sqlite memory
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from storage import STORAGE_ENGINES, create_storage  # noqa: E402
+
+CATEGORIES = ["anxiety", "coping-strategies", "mindfulness", "professional-help", "sleep", "depression"]
+ACTIVITIES = ["exercise", "reading", "meditation", "sleep", "walking"]
+ANALYTICS_FIELDS = ("mood_level", "timestamp", "activities")
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))]
+
+
+def summarize(samples):
+    return {"p50_ms": round(percentile(samples, 50), 3), "p95_ms": round(percentile(samples, 95), 3), "p99_ms": round(percentile(samples, 99), 3)}
+
+
+async def seed(storage, documents, sessions, batch_size):
+    session_ids = [str(uuid.uuid4()) for _ in range(sessions)]
+    timings = {}
+
+    async def insert(name, write, factory, count):
+        samples = []
+        for offset in range(0, count, batch_size):
+            batch = [factory(i) for i in range(offset, min(count, offset + batch_size))]
+            start = time.perf_counter()
+            await write(batch)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[name] = dict(summarize(samples), batch_size=batch_size, rows_per_s=round(count / (sum(samples) / 1000), 1))
+
+    await insert("conversations.insert_many", storage.conversations.insert_many, lambda i: {
+        "id": str(uuid.uuid4()),
+        "session_id": session_ids[i % sessions],
+        "user_message": "message",
+        "ai_response": "reply",
+        "timestamp": START + timedelta(seconds=i),
+    }, documents)
+    await insert("moods.insert_many", storage.moods.insert_many, lambda i: {
+        "id": str(uuid.uuid4()),
+        "mood_level": random.randint(1, 10),
+        "notes": "",
+        "activities": random.sample(ACTIVITIES, 2),
+        "timestamp": START + timedelta(seconds=i * 60),
+    }, documents)
+    await insert("resources.insert_many", storage.resources.insert_many, lambda i: {
+        "id": str(uuid.uuid4()),
+        "title": f"Resource {i}",
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "description": "description",
+        "content": "content",
+        "url": "",
+        "timestamp": START + timedelta(seconds=i),
+    }, max(1, documents // 100))
+    return session_ids, timings
+
+
+async def collect(iterator):
+    return [document async for document in iterator]
+
+
+async def measure(storage, session_ids, documents, iterations):
+    last = START + timedelta(seconds=documents * 60)
+
+    async def mood_page():
+        page = await collect(storage.moods.history(limit=31))
+        # The second page, as a client following next_cursor would read it
+        await collect(storage.moods.history((page[-1]["timestamp"], page[-1]["id"]), 31))
+
+    async def context():
+        session_id = random.choice(session_ids)
+        await storage.conversations.get_summary(session_id)
+        await storage.conversations.recent(session_id, None, 6)
+        await storage.conversations.count(session_id)
+
+    queries = {
+        "chat_history": lambda: collect(storage.conversations.history(random.choice(session_ids), limit=101)),
+        "chat_context": context,
+        "mood_history": mood_page,
+        "mood_insert": lambda: storage.moods.insert({
+            "id": str(uuid.uuid4()), "mood_level": 5, "notes": "", "activities": ["walking"], "timestamp": datetime.now(timezone.utc),
+        }),
+        "mood_analytics_30d": lambda: collect(storage.moods.between(last - timedelta(days=30), last, ANALYTICS_FIELDS)),
+        "mood_daily_30d": lambda: storage.moods.daily((last - timedelta(days=30)).strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")),
+        "resources_by_category": lambda: storage.resources.list(random.choice(CATEGORIES), ("id", "title", "category")),
+        "resource_get": lambda: storage.resources.get("missing"),
+    }
+    results = {}
+    for name, run in queries.items():
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await run()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = summarize(samples)
+    return results
+
+
+async def bench(engine, args, directory):
+    database = f"mental_health_storage_bench_{uuid.uuid4().hex[:8]}"
+    if engine == "mongo":
+        from storage_mongo import MongoStorage
+        storage = MongoStorage.connect(os.environ.get("MONGO_URL", "mongodb://localhost:27017"), database=database)
+    else:
+        storage = create_storage(engine, path=os.path.join(directory, f"{engine}.db"))
+    random.seed(args.seed)
+    try:
+        start = time.perf_counter()
+        await asyncio.wait_for(storage.setup(), 10)
+        setup_s = time.perf_counter() - start
+        session_ids, writes = await seed(storage, args.documents, args.sessions, args.batch_size)
+        return {"setup_s": round(setup_s, 3), "writes": writes, "reads": await measure(storage, session_ids, args.documents, args.iterations)}
+    finally:
+        if engine == "mongo":
+            await storage.client.drop_database(database)
+        await storage.close()
+
+
+async def main(args):
+    results = {"config": vars(args), "engines": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for engine in args.engines:
+            try:
+                results["engines"][engine] = await bench(engine, args, directory)
+            except Exception as e:
+                # Typically MongoDB not running; the other engines are still compared
+                results["engines"][engine] = {"error": f"{type(e).__name__}: {e}"}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", choices=STORAGE_ENGINES, default=list(STORAGE_ENGINES))
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
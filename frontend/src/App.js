@@ -15,6 +15,7 @@ function App() {
   const [resources, setResources] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState('all');
   const [categories, setCategories] = useState([]);
+  const [expandedResources, setExpandedResources] = useState({});
   const chatEndRef = useRef(null);
 
   // Load initial data
@@ -103,6 +104,18 @@ function App() {
       };
       setChatMessages(prev => [...prev, aiMessage]);
 
+      // The backend flags crisis language before the AI replies; show the contacts alongside
+      if (data.crisis) {
+        const contacts = data.crisis.emergency_contacts
+          .map(contact => `• ${contact.name}: ${contact.phone}`)
+          .join('\n');
+        setChatMessages(prev => [...prev, {
+          type: 'crisis',
+          content: `You don't have to go through this alone. Help is available right now:\n${contacts}`,
+          timestamp: new Date().toISOString()
+        }]);
+      }
+
     } catch (error) {
       console.error('Error sending message:', error);
       const errorMessage = {
@@ -147,6 +160,21 @@ function App() {
     loadResources(category);
   };
 
+  // The resource list leaves out article bodies; fetch one when its card is expanded
+  const toggleResource = async (resourceId) => {
+    if (expandedResources[resourceId]) {
+      setExpandedResources(prev => ({ ...prev, [resourceId]: null }));
+      return;
+    }
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/resources/${resourceId}`);
+      const data = await response.json();
+      setExpandedResources(prev => ({ ...prev, [resourceId]: data.content }));
+    } catch (error) {
+      console.error('Error loading resource:', error);
+    }
+  };
+
   const getMoodEmoji = (level) => {
     const emojis = ['😢', '😔', '😐', '😊', '😄'];
     return emojis[Math.floor((level - 1) / 2)] || '😐';
@@ -292,7 +320,9 @@ function App() {
                       className={`max-w-xs lg:max-w-md px-4 py-2 rounded-lg ${
                         message.type === 'user'
                           ? 'chat-message-user'
-                          : 'chat-message-ai'
+                          : message.type === 'crisis'
+                            ? 'chat-message-ai border border-red-300/60'
+                            : 'chat-message-ai'
                       }`}
                     >
                       <p className="whitespace-pre-wrap text-white">{message.content}</p>
@@ -476,14 +506,20 @@ function App() {
                   <h3 className="text-lg font-semibold text-white mb-2 drop-shadow-md">{resource.title}</h3>
                   <p className="text-white/80 text-sm mb-4">{resource.description}</p>
                   
-                  <div className="glass-pill rounded-lg p-4 mb-4">
-                    <p className="text-sm text-white/90 leading-relaxed">
-                      {resource.content.length > 200 
-                        ? `${resource.content.substring(0, 200)}...` 
-                        : resource.content
-                      }
-                    </p>
-                  </div>
+                  {expandedResources[resource.id] && (
+                    <div className="glass-pill rounded-lg p-4 mb-4">
+                      <p className="text-sm text-white/90 leading-relaxed whitespace-pre-wrap">
+                        {expandedResources[resource.id]}
+                      </p>
+                    </div>
+                  )}
+
+                  <button
+                    onClick={() => toggleResource(resource.id)}
+                    className="inline-flex items-center text-white hover:text-white/80 text-sm font-medium mb-2 mr-4"
+                  >
+                    {expandedResources[resource.id] ? 'Show less' : 'Read article'}
+                  </button>
                   
                   {resource.url && (
                     <a
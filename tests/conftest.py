@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend is run from its own directory (uvicorn server:app), so its modules import each other flat
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
@@ -0,0 +1,322 @@
+import asyncio
+
+from pymongo import ReplaceOne, UpdateOne
+
+
+class FakeLlmChat:
+    """Local stand-in for ``LlmChat`` that emits a fixed reply token by token."""
+
+    def __init__(self, tokens=None, first_token_delay=0.0, token_delay=0.0, fail_after=None, **kwargs):
+        self.tokens = list(tokens or ["I ", "hear ", "you."])
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.fail_after = fail_after
+        self.kwargs = kwargs
+        self.messages = []
+
+    def with_model(self, provider, model):
+        return self
+
+    def with_max_tokens(self, max_tokens):
+        return self
+
+    async def stream_message(self, user_message):
+        self.messages.append(user_message)
+        await asyncio.sleep(self.first_token_delay)
+        for index, token in enumerate(self.tokens):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise RuntimeError("upstream stream closed")
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def send_message(self, user_message):
+        tokens = []
+        async for token in self.stream_message(user_message):
+            tokens.append(token)
+        return "".join(tokens)
+
+
+class FakeUserMessage:
+    def __init__(self, text):
+        self.text = text
+
+
+def _get_path(document, path):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _matches_condition(value, condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$gt" and not (value is not None and value > operand):
+                return False
+            if operator == "$gte" and not (value is not None and value >= operand):
+                return False
+            if operator == "$lt" and not (value is not None and value < operand):
+                return False
+            if operator == "$lte" and not (value is not None and value <= operand):
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$nin" and (value in operand or (isinstance(value, list) and set(value) & set(operand))):
+                return False
+            if operator == "$in" and not (value in operand or (isinstance(value, list) and set(value) & set(operand))):
+                return False
+            if operator == "$exists" and (value is not None) != operand:
+                return False
+            if operator == "$type" and operand == "string" and not isinstance(value, str):
+                return False
+        return True
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    return value == condition
+
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif not _matches_condition(_get_path(document, key), condition):
+            return False
+    return True
+
+
+def project(document, projection):
+    if not projection:
+        return dict(document)
+    include = {key for key, flag in projection.items() if flag and key != "_id"}
+    if include:
+        result = {key: document[key] for key in include if key in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+    excluded = {key for key, flag in projection.items() if not flag}
+    return {key: value for key, value in document.items() if key not in excluded}
+
+
+class FakeCursor:
+    def __init__(self, documents, projection=None):
+        self._documents = documents
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=1):
+        keys = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        for key, key_direction in reversed(keys):
+            self._documents.sort(key=lambda doc: (_get_path(doc, key) is not None, _get_path(doc, key)), reverse=key_direction < 0)
+        return self
+
+    def batch_size(self, count):
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _selected(self):
+        documents = self._documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return [project(document, self._projection) for document in documents]
+
+    async def to_list(self, length=None):
+        documents = self._selected()
+        return documents[:length] if length else documents
+
+    def __aiter__(self):
+        self._iterator = iter(self._selected())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeInsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class FakeUpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class FakeDeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+def _set_path(document, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+class FakeCollection:
+    """In-memory stand-in for the subset of the Motor collection API the backend uses."""
+
+    def __init__(self, name):
+        self.name = name
+        self.documents = []
+        self.unique_fields = set()
+        # Index descriptions as list_indexes reports them, by name
+        self.indexes = {}
+        self._next_id = 0
+
+    def _duplicate(self, document):
+        for field in self.unique_fields:
+            value = document.get(field)
+            if value is not None and any(existing.get(field) == value for existing in self.documents):
+                return field
+        return None
+
+    def _assign_id(self, document):
+        if "_id" not in document:
+            self._next_id += 1
+            document["_id"] = f"{self.name}-{self._next_id}"
+        return document["_id"]
+
+    async def list_indexes(self):
+        for index in list(self.indexes.values()):
+            yield dict(index)
+
+    async def create_indexes(self, models):
+        for model in models:
+            self.indexes[model.document["name"]] = dict(model.document, v=2)
+        return [model.document["name"] for model in models]
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+    async def insert_one(self, document):
+        self._assign_id(document)
+        self.documents.append(dict(document))
+
+    async def insert_many(self, documents, ordered=True):
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            field = self._duplicate(document)
+            if field is not None:
+                errors.append({"index": index, "code": 11000, "errmsg": f"E11000 duplicate key error: {field}"})
+                if ordered:
+                    break
+                continue
+            inserted.append(self._assign_id(document))
+            self.documents.append(dict(document))
+        if errors:
+            from pymongo.errors import BulkWriteError
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return FakeInsertManyResult(inserted)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([doc for doc in self.documents if matches(doc, query or {})], projection)
+
+    async def find_one(self, query=None, projection=None):
+        for document in self.documents:
+            if matches(document, query or {}):
+                return project(document, projection)
+        return None
+
+    async def count_documents(self, query):
+        return sum(1 for document in self.documents if matches(document, query))
+
+    async def distinct(self, key, query=None):
+        values = []
+        for document in self.documents:
+            if matches(document, query or {}):
+                value = _get_path(document, key)
+                if value is not None and value not in values:
+                    values.append(value)
+        return values
+
+    async def update_one(self, query, update, upsert=False):
+        for document in self.documents:
+            if matches(document, query):
+                self._apply(document, update)
+                return FakeUpdateResult(1, 1)
+        if not upsert:
+            return FakeUpdateResult(0, 0)
+        document = {key: value for key, value in query.items() if not isinstance(value, dict)}
+        self._apply(document, update, inserting=True)
+        upserted_id = self._assign_id(document)
+        self.documents.append(document)
+        return FakeUpdateResult(0, 0, upserted_id)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        for index, document in enumerate(self.documents):
+            if matches(document, query):
+                replacement = dict(replacement, _id=document["_id"])
+                self.documents[index] = replacement
+                return FakeUpdateResult(1, 1)
+        if upsert:
+            self._assign_id(replacement)
+            self.documents.append(dict(replacement))
+        return FakeUpdateResult(0, 0)
+
+    async def bulk_write(self, requests, ordered=True):
+        # pymongo's write models keep their arguments in private attributes
+        for request in requests:
+            if isinstance(request, ReplaceOne):
+                await self.replace_one(request._filter, request._doc, upsert=request._upsert)
+            elif isinstance(request, UpdateOne):
+                await self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+    async def delete_many(self, query):
+        kept = [doc for doc in self.documents if not matches(doc, query)]
+        deleted = len(self.documents) - len(kept)
+        self.documents = kept
+        return FakeDeleteResult(deleted)
+
+    def _apply(self, document, update, inserting=False):
+        for key, value in update.get("$set", {}).items():
+            _set_path(document, key, value)
+        if inserting:
+            for key, value in update.get("$setOnInsert", {}).items():
+                _set_path(document, key, value)
+        for key, value in update.get("$inc", {}).items():
+            _set_path(document, key, (_get_path(document, key) or 0) + value)
+        for key, value in update.get("$min", {}).items():
+            current = _get_path(document, key)
+            _set_path(document, key, value if current is None else min(current, value))
+        for key, value in update.get("$max", {}).items():
+            current = _get_path(document, key)
+            _set_path(document, key, value if current is None else max(current, value))
+
+
+class FakeDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    async def command(self, name):
+        return {"ok": 1.0}
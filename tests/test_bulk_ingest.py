@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from bulk_ingest import BodyFormatError, ingest_mood_entries, iter_json_array, iter_ndjson
+from mood_rollups import ROLLUP_COLLECTION, check_mood_rollups
+from storage_memory import MemoryStorage
+from storage_mongo import MongoMoodRepository
+from tests.fakes import FakeDatabase
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def collect(iterator):
+    async def run():
+        return [item async for item in iterator]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_json_array_parses_elements_split_across_chunks(size):
+    body = '[{"mood_level": 7, "notes": "café"}, 12345, "x", [1, 2], {}]'.encode()
+    items = collect(iter_json_array(chunked(body, size)))
+    assert [item for item, _ in items] == [{"mood_level": 7, "notes": "café"}, 12345, "x", [1, 2], {}]
+
+
+@pytest.mark.parametrize("body", [b'{"mood_level": 1}', b'[{"mood_level": 1}', b'[1 2]', b'[1,]', b'[1] 2'])
+def test_json_array_rejects_malformed_bodies(body):
+    with pytest.raises(BodyFormatError):
+        collect(iter_json_array(chunked(body, 4)))
+
+
+def test_ndjson_reports_bad_lines_individually():
+    items = collect(iter_ndjson(chunked(b'{"mood_level": 3}\n\nnot json\n{"mood_level": 4}', 5)))
+    assert [item for item, _ in items] == [{"mood_level": 3}, None, {"mood_level": 4}]
+    assert items[1][1].startswith("Invalid JSON")
+
+
+def build_document(item):
+    if not isinstance(item, dict) or not isinstance(item.get("mood_level"), int):
+        raise ValueError("mood_level: required")
+    document = {
+        "id": f"id-{item['mood_level']}-{item.get('idempotency_key')}",
+        "mood_level": item["mood_level"],
+        "activities": item.get("activities", []),
+        "timestamp": datetime(2024, 5, item.get("day", 1), tzinfo=timezone.utc),
+    }
+    if item.get("idempotency_key"):
+        document["idempotency_key"] = item["idempotency_key"]
+    return document
+
+
+def test_ingest_chunks_validates_and_deduplicates_retries():
+    db = FakeDatabase()
+    db.mood_entries.unique_fields.add("idempotency_key")
+
+    async def items(payload):
+        for item in payload:
+            yield item, None
+
+    first = [{"mood_level": 5, "idempotency_key": "a"}, {"mood_level": "bad"}, {"mood_level": 6, "day": 2, "idempotency_key": "b"}]
+    result = asyncio.run(ingest_mood_entries(MongoMoodRepository(db), items(first), build_document, chunk_size=2))
+    assert (result["received"], result["created"], result["invalid"]) == (3, 2, 1)
+    assert [r["status"] for r in result["results"]] == ["created", "invalid", "created"]
+
+    # A retry of the same upload plus one new entry
+    retry = first + [{"mood_level": 9, "idempotency_key": "c"}]
+    result = asyncio.run(ingest_mood_entries(MongoMoodRepository(db), items(retry), build_document, chunk_size=2))
+    assert (result["created"], result["duplicate"], result["invalid"]) == (1, 2, 1)
+    assert result["results"][0] == {"index": 0, "status": "duplicate", "id": "id-5-a"}
+    assert len(db.mood_entries.documents) == 3
+
+    assert asyncio.run(check_mood_rollups(db))["consistent"]
+    assert sorted(doc["date"] for doc in db[ROLLUP_COLLECTION].documents) == ["2024-05-01", "2024-05-02"]
+
+
+def test_bulk_endpoint_reports_out_of_range_levels_as_invalid(monkeypatch):
+    import server
+
+    storage = MemoryStorage()
+    monkeypatch.setattr(server, "storage", storage)
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/mood/bulk", json=[{"mood_level": 7}, {"mood_level": 200}, {"mood_level": 0}])
+            single = await client.post("/api/mood", json={"mood_level": 11})
+        return response, single, [entry async for entry in storage.moods.history()]
+
+    response, single, stored = asyncio.run(run())
+    result = response.json()
+    assert (result["created"], result["invalid"]) == (1, 2)
+    assert [r["status"] for r in result["results"]] == ["created", "invalid", "invalid"]
+    assert result["results"][1]["error"].startswith("mood_level:")
+    assert single.status_code == 422
+    assert [entry["mood_level"] for entry in stored] == [7]
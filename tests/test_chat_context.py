@@ -0,0 +1,190 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from chat_context import ConversationContext, estimate_tokens, trim_to_tokens
+from llm_scheduler import LlmScheduler, QueueFull
+from session_cache import SessionCache
+from storage_memory import MemoryStorage
+from storage_mongo import MongoConversationRepository
+from tests.fakes import FakeDatabase, FakeLlmChat, FakeUserMessage
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_context(**kwargs):
+    calls = []
+
+    async def summarize(session_id, previous_summary, turns):
+        calls.append((previous_summary, [turn["user_message"] for turn in turns]))
+        return (previous_summary + " " if previous_summary else "") + "+".join(turn["user_message"] for turn in turns)
+
+    options = {"recent_turns": 2, "fold_batch": 3}
+    options.update(kwargs)
+    return ConversationContext(summarize=summarize, **options), calls
+
+
+def add_turns(db, session_id, start, count):
+    for index in range(start, start + count):
+        asyncio.run(db.conversations.insert_one({
+            "id": f"{session_id}-{index}",
+            "session_id": session_id,
+            "user_message": f"m{index}",
+            "ai_response": f"r{index}",
+            "timestamp": START + timedelta(minutes=index),
+        }))
+
+
+def test_trim_keeps_the_most_recent_text():
+    assert trim_to_tokens("short", 10) == "short"
+    trimmed = trim_to_tokens("a" * 100 + "end", 5)
+    assert trimmed.endswith("end") and len(trimmed) == 20
+
+
+def test_render_drops_oldest_turns_beyond_budget():
+    context, _ = make_context(max_context_tokens=estimate_tokens("base") + 2 * estimate_tokens("User: m0\nMindWell: r0"))
+    turns = [{"user_message": f"m{i}", "ai_response": f"r{i}"} for i in range(5)]
+    message = context.render_system_message("base", "", turns)
+    assert "m4" in message and "m3" in message
+    assert "m2" not in message
+
+
+def test_fold_waits_for_a_full_batch_then_merges_incrementally():
+    db = FakeDatabase()
+    context, calls = make_context()
+
+    add_turns(db, "s", 0, 4)
+    assert asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s")) is False
+
+    add_turns(db, "s", 4, 1)
+    assert asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s")) is True
+    assert calls == [("", ["m0", "m1", "m2"])]
+
+    summary, turns = asyncio.run(context.load(MongoConversationRepository(db), "s"))
+    assert summary == "m0+m1+m2"
+    assert [turn["user_message"] for turn in turns] == ["m3", "m4"]
+
+    # The next fold only sees turns after the previous summary point
+    add_turns(db, "s", 5, 3)
+    assert asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s")) is True
+    assert calls[-1] == ("m0+m1+m2", ["m3", "m4", "m5"])
+    summary_doc = asyncio.run(db.conversation_summaries.find_one({"session_id": "s"}))
+    assert summary_doc["summarized_turns"] == 6
+
+
+def test_turns_sharing_the_last_folded_timestamp_are_kept():
+    db = FakeDatabase()
+    context, calls = make_context()
+    add_turns(db, "s", 0, 5)
+    # Stored in the same instant as m2, the last turn of the first fold
+    asyncio.run(db.conversations.insert_one({
+        "id": "s-2b", "session_id": "s", "user_message": "m2b", "ai_response": "r2b", "timestamp": START + timedelta(minutes=2),
+    }))
+    assert asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s")) is True
+    assert calls == [("", ["m0", "m1", "m2"])]
+
+    summary, turns = asyncio.run(context.load(MongoConversationRepository(db), "s"))
+    assert [turn["user_message"] for turn in turns] == ["m2b", "m3", "m4"]
+    add_turns(db, "s", 5, 2)
+    asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s"))
+    assert calls[-1] == ("m0+m1+m2", ["m2b", "m3", "m4"])
+
+
+def test_long_backlog_is_folded_in_bounded_batches():
+    db = FakeDatabase()
+    context, calls = make_context()
+    add_turns(db, "s", 0, 20)
+    assert asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s")) is True
+    # Each summarizer prompt carries at most fold_batch turns; the backlog is caught up in order
+    assert [turns for _, turns in calls] == [[f"m{index}" for index in range(start, start + 3)] for start in range(0, 18, 3)]
+    summary, turns = asyncio.run(context.load(MongoConversationRepository(db), "s"))
+    assert [turn["user_message"] for turn in turns] == ["m18", "m19"]
+
+
+def test_failed_folds_back_off_per_session():
+    db = FakeDatabase()
+    now = [0.0]
+    attempts = []
+
+    async def summarize(session_id, previous_summary, turns):
+        attempts.append(now[0])
+        raise RuntimeError("summarizer unavailable")
+
+    context = ConversationContext(summarize=summarize, recent_turns=2, fold_batch=3, retry_delay=5, max_retry_delay=12, clock=lambda: now[0])
+    add_turns(db, "s", 0, 5)
+    for now[0] in (0, 1, 5, 9, 15, 26, 38):
+        try:
+            asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s"))
+        except RuntimeError:
+            pass
+    # Retries wait 5, then 10, then at most 12 seconds
+    assert attempts == [0, 5, 15, 38]
+
+
+def test_load_merges_turns_not_yet_written():
+    db = FakeDatabase()
+    context, _ = make_context()
+    add_turns(db, "s", 0, 2)
+    pending = [
+        {"id": "s-1", "user_message": "m1", "ai_response": "r1", "timestamp": START + timedelta(minutes=1)},
+        {"id": "s-2", "user_message": "m2", "ai_response": "r2", "timestamp": START + timedelta(minutes=2)},
+    ]
+    _, turns = asyncio.run(context.load(MongoConversationRepository(db), "s", pending))
+    assert [turn["user_message"] for turn in turns] == ["m0", "m1", "m2"]
+
+
+def test_prompt_size_is_bounded_for_long_sessions():
+    db = FakeDatabase()
+    context, _ = make_context(summary_max_tokens=20)
+    sizes = []
+    for index in range(60):
+        add_turns(db, "s", index, 1)
+        asyncio.run(context.maybe_fold(MongoConversationRepository(db), "s"))
+        summary, turns = asyncio.run(context.load(MongoConversationRepository(db), "s"))
+        sizes.append(len(context.render_system_message("base", summary, turns)))
+    assert max(sizes[20:]) <= max(sizes[:20]) + 20 * 4
+
+
+def test_summaries_take_a_background_scheduler_slot(monkeypatch):
+    import server
+
+    scheduler = LlmScheduler(max_in_flight=1)
+    monkeypatch.setattr(server, "llm_scheduler", scheduler)
+    monkeypatch.setattr(server, "LlmChat", lambda **kwargs: FakeLlmChat(tokens=["Feels ", "anxious."]))
+    monkeypatch.setattr(server, "UserMessage", FakeUserMessage)
+    turns = [{"user_message": "m0", "ai_response": "r0"}]
+
+    async def run():
+        summary = await server.summarize_turns("s", "", turns)
+        # While a user's call holds the only slot, the summary is deferred rather than queued
+        ticket = await scheduler.acquire("s")
+        try:
+            with pytest.raises(QueueFull):
+                await server.summarize_turns("s", summary, turns)
+        finally:
+            scheduler.release(ticket)
+        return summary
+
+    assert asyncio.run(run()) == "Feels anxious."
+    stats = scheduler.stats()
+    assert (stats["admitted_background"], stats["rejected_background"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_failed_fold_keeps_the_cached_client(monkeypatch):
+    import server
+
+    async def failing_fold(conversations, session_id):
+        raise RuntimeError("summarizer unavailable")
+
+    monkeypatch.setattr(server, "storage", MemoryStorage())
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server.chat_context, "maybe_fold", failing_fold)
+
+    async def run():
+        server.session_cache.put("s", FakeLlmChat())
+        server.schedule_context_fold("s")
+        await asyncio.gather(*server.background_tasks)
+
+    asyncio.run(run())
+    assert "s" in server.session_cache
@@ -0,0 +1,82 @@
+import asyncio
+import gzip
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+
+from compression import CompressionMiddleware, encoded_etag, etag_matches, preferred_encoding
+
+LARGE = b'{"text": "' + b"calm " * 500 + b'"}'
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return Response(content=LARGE, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(content=gzip.compress(LARGE), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield LARGE
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    return app
+
+
+def get(app, path, accept_encoding="gzip"):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    return asyncio.run(run())
+
+
+def test_preferred_encoding():
+    assert preferred_encoding("gzip, deflate") == "gzip"
+    assert preferred_encoding("*") == "gzip"
+    assert preferred_encoding("gzip;q=0") is None
+    assert preferred_encoding("identity") is None
+    assert preferred_encoding(None) is None
+    assert preferred_encoding("br;q=1, gzip;q=0.5", available=("br", "gzip")) == "br"
+    assert preferred_encoding("br;q=0.2, gzip", available=("br", "gzip")) == "gzip"
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"' and encoded_etag('"abc"', None) == '"abc"'
+
+
+def test_large_responses_are_compressed():
+    response = get(make_app(), "/large")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(LARGE)
+    assert response.content == LARGE
+
+
+def test_small_encoded_and_streamed_responses_pass_through():
+    app = make_app()
+    assert "content-encoding" not in get(app, "/small").headers
+    assert "content-encoding" not in get(app, "/large", accept_encoding="identity").headers
+    assert get(app, "/encoded").content == LARGE
+    streamed = get(app, "/stream")
+    assert "content-encoding" not in streamed.headers
+    assert streamed.content == LARGE * 3
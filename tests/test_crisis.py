@@ -0,0 +1,41 @@
+import gzip
+import json
+
+from crisis import build_crisis_payload, load_crisis_resources
+from precompressed import accepts_gzip
+
+
+def test_crisis_data_file_has_required_content():
+    resources = load_crisis_resources()
+    names = [contact["name"] for contact in resources["emergency_contacts"]]
+    assert "National Suicide Prevention Lifeline" in names
+    assert len(resources["immediate_steps"]) >= 5
+
+
+def test_payload_serves_identity_gzip_and_304():
+    resources = load_crisis_resources()
+    payload = build_crisis_payload(resources)
+
+    identity = payload.response()
+    assert json.loads(identity.body) == resources
+    assert identity.headers["etag"] == payload.etag
+    assert "max-age" in identity.headers["cache-control"]
+    assert "content-encoding" not in identity.headers
+
+    compressed = payload.response(accept_encoding="br, gzip")
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.body)) == resources
+    assert compressed.headers["etag"] == payload.etag[:-1] + '-gzip"'
+
+    assert payload.response(if_none_match=payload.etag).status_code == 304
+    # A validator only matches the coding it was sent with
+    assert payload.response(accept_encoding="gzip", if_none_match=payload.etag).status_code == 200
+    assert payload.response(accept_encoding="gzip", if_none_match=compressed.headers["etag"]).status_code == 304
+
+
+def test_accepts_gzip_honours_zero_quality():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip(None)
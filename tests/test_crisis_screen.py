@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from crisis_screen import CrisisMatcher, load_crisis_phrases
+
+MATCHER = CrisisMatcher(load_crisis_phrases())
+
+
+@pytest.mark.parametrize("message, categories", [
+    ("I want to KILL   myself.", ["suicide"]),
+    ("honestly i dont want to live anymore", ["suicide"]),
+    ("I don’t want to be alive", ["suicide"]),
+    ("been feeling suicidal lately", ["suicide"]),
+    ("relapsed into self-harming again", ["self_harm"]),
+    ("“hurt myself”", ["self_harm"]),
+    ("so tired...\ncut myself last night", ["self_harm"]),
+    ("he hits me and I want to die", ["danger", "suicide"]),
+])
+def test_crisis_language_is_detected(message, categories):
+    assert MATCHER.search(message)
+    assert MATCHER.categories(message) == categories
+
+
+@pytest.mark.parametrize("message", [
+    "I killed it at work today",
+    "my skill myself assessment went fine",
+    "the weekend was calm and I want to try yoga",
+    "",
+])
+def test_ordinary_messages_do_not_match(message):
+    assert not MATCHER.search(message)
+    assert MATCHER.categories(message) == []
+
+
+def test_phrase_list_is_configurable(tmp_path):
+    path = tmp_path / "phrases.json"
+    path.write_text(json.dumps({"custom": ["lost all hope", "hopeless*"]}))
+    matcher = CrisisMatcher(load_crisis_phrases(str(path)))
+
+    assert matcher.categories("I have lost, all hope") == ["custom"]
+    assert matcher.categories("feeling hopelessness") == ["custom"]
+    assert not matcher.search("kill myself")
+
+    path.write_text(json.dumps({"custom": []}))
+    with pytest.raises(ValueError):
+        load_crisis_phrases(str(path))
+
+
+def test_phrase_at_the_end_of_a_long_message():
+    message = "Work was busy and I kept thinking about the deadline. " * 2000 + "I want to end my life"
+    assert MATCHER.search(message)
+    assert MATCHER.categories(message) == ["suicide"]
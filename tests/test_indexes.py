@@ -0,0 +1,70 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from indexes import INDEXES, ROUTE_QUERIES, ensure_indexes, find_collection_scans, plan_stages, reconcile_indexes
+from tests.fakes import FakeDatabase
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def mongo_available():
+    try:
+        MongoClient(MONGO_URL, serverSelectionTimeoutMS=300).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+def test_plan_stages_walks_nested_plans():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}
+    assert plan_stages(plan) == ["FETCH", "SORT", "COLLSCAN"]
+    assert plan_stages({"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "IXSCAN"}]}) == ["OR", "IXSCAN", "IXSCAN"]
+
+
+def test_reconcile_recreates_indexes_whose_options_changed():
+    db = FakeDatabase()
+    asyncio.run(reconcile_indexes(db))
+    # As left behind by an older version: no partial filter, then a TTL, and one hand-made index
+    db.mood_entries.indexes["mh_idempotency_key"].pop("partialFilterExpression")
+    db.mood_daily.indexes["mh_date"]["expireAfterSeconds"] = 86400
+    db.resources.indexes["by_hand"] = {"name": "by_hand", "key": {"title": 1}, "sparse": True}
+
+    result = asyncio.run(reconcile_indexes(db))
+    assert sorted(result["dropped"]) == ["mood_daily.mh_date", "mood_entries.mh_idempotency_key"]
+    assert sorted(result["created"]) == sorted(result["dropped"])
+    assert db.mood_entries.indexes["mh_idempotency_key"]["partialFilterExpression"] == {"idempotency_key": {"$type": "string"}}
+    assert "expireAfterSeconds" not in db.mood_daily.indexes["mh_date"]
+    assert "by_hand" in db.resources.indexes
+    assert asyncio.run(reconcile_indexes(db))["dropped"] == []
+
+
+@pytest.mark.skipif(not mongo_available(), reason="MongoDB is not reachable at MONGO_URL")
+def test_route_queries_use_indexes_after_reconcile():
+    from database import create_mongo_client
+
+    database_name = f"mh_index_test_{uuid.uuid4().hex[:8]}"
+
+    async def run():
+        client = create_mongo_client(MONGO_URL)
+        db = client[database_name]
+        try:
+            first = await ensure_indexes(db, explain_check=True)
+            second = await ensure_indexes(db)
+            return first, second, await find_collection_scans(db)
+        finally:
+            await client.drop_database(database_name)
+            client.close()
+
+    first, second, offenders = asyncio.run(run())
+    assert len(first["created"]) == sum(len(models) for models in INDEXES.values())
+    assert second["created"] == [] and second["dropped"] == []
+    assert offenders == []
+
+
+def test_every_indexed_collection_has_route_queries():
+    assert {collection for collection, _, _ in ROUTE_QUERIES} == set(INDEXES)
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from llm_scheduler import LlmScheduler, QueueFull, QueueTimeout, SessionBusy
+
+
+def test_caps_concurrent_calls():
+    peak = 0
+    running = 0
+
+    async def call(scheduler, session_id):
+        nonlocal peak, running
+        async with scheduler.slot(session_id):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def run():
+        scheduler = LlmScheduler(max_in_flight=3, max_queued=50)
+        await asyncio.gather(*(call(scheduler, f"s{index}") for index in range(12)))
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert peak == 3
+    assert stats["admitted"] == 12
+    assert stats["in_flight"] == 0 and stats["queued"] == 0 and stats["sessions"] == 0
+    assert stats["wait_ms_p95"] >= stats["wait_ms_p50"] >= 0
+
+
+def test_session_calls_run_one_at_a_time_in_order():
+    order = []
+
+    async def call(scheduler, session_id, index):
+        async with scheduler.slot(session_id):
+            order.append((session_id, index, "start"))
+            await asyncio.sleep(0.005)
+            order.append((session_id, index, "end"))
+
+    async def run():
+        scheduler = LlmScheduler(max_in_flight=4, max_per_session=5)
+        tasks = [asyncio.create_task(call(scheduler, "a", index)) for index in range(3)]
+        tasks.append(asyncio.create_task(call(scheduler, "b", 0)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    session_a = [(index, event) for session_id, index, event in order if session_id == "a"]
+    assert session_a == [(0, "start"), (0, "end"), (1, "start"), (1, "end"), (2, "start"), (2, "end")]
+    # The other session was not held up behind session "a"
+    assert order.index(("b", 0, "start")) < order.index(("a", 1, "start"))
+
+
+def test_rejects_when_queue_or_session_is_full():
+    async def run():
+        scheduler = LlmScheduler(max_in_flight=1, max_queued=2, max_per_session=2)
+        running = await scheduler.acquire("a")
+        waiting = [asyncio.create_task(scheduler.acquire(session_id)) for session_id in ("a", "b")]
+        await asyncio.sleep(0)
+
+        with pytest.raises(SessionBusy) as busy:
+            await scheduler.acquire("a")
+        with pytest.raises(QueueFull) as full:
+            await scheduler.acquire("c")
+
+        scheduler.release(running)
+        for task in asyncio.as_completed(waiting):
+            scheduler.release(await task)
+        return scheduler, busy.value, full.value
+
+    scheduler, busy, full = asyncio.run(run())
+    assert busy.status_code == 429 and full.status_code == 503
+    assert 1 <= busy.retry_after <= 60 and 1 <= full.retry_after <= 60
+    stats = scheduler.stats()
+    assert stats["rejected_session"] == 1 and stats["rejected_full"] == 1
+    assert stats["admitted"] == 3 and stats["queued"] == 0
+
+
+def test_queued_call_expires_after_its_deadline():
+    async def run():
+        scheduler = LlmScheduler(max_in_flight=1, queue_timeout=0.02)
+        running = await scheduler.acquire("a")
+        with pytest.raises(QueueTimeout):
+            await scheduler.acquire("b")
+        assert scheduler.stats()["queued"] == 0
+        scheduler.release(running)
+        # The slot is free again and the expired call left nothing behind
+        scheduler.release(await scheduler.acquire("b"))
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["expired"] == 1
+    assert stats["sessions"] == 0 and stats["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_block_its_session():
+    async def run():
+        scheduler = LlmScheduler(max_in_flight=1, max_per_session=5)
+        running = await scheduler.acquire("a")
+        first = asyncio.create_task(scheduler.acquire("b"))
+        second = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+
+        scheduler.release(running)
+        ticket = await asyncio.wait_for(second, 1)
+        scheduler.release(ticket)
+        # Releasing twice is a no-op
+        scheduler.release(ticket)
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["in_flight"] == 0 and stats["queued"] == 0 and stats["sessions"] == 0
+    assert stats["admitted"] == 2
+
+
+def test_background_calls_only_take_idle_slots():
+    async def run():
+        scheduler = LlmScheduler(max_in_flight=2)
+        background = await scheduler.acquire("summary:a", background=True)
+        running = await scheduler.acquire("b")
+        # Both slots are taken
+        with pytest.raises(QueueFull):
+            await scheduler.acquire("summary:c", background=True)
+        scheduler.release(background)
+        waiting = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        # A slot is free, but a user call is waiting for its session
+        with pytest.raises(QueueFull):
+            await scheduler.acquire("summary:c", background=True)
+        scheduler.release(running)
+        scheduler.release(await waiting)
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["admitted"] == 3 and stats["admitted_background"] == 1
+    assert stats["rejected_background"] == 2 and stats["rejected_full"] == 0
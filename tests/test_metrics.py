@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from database import MongoCommandTimer, create_mongo_client
+from metrics import MetricsMiddleware, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("op_seconds", "Operation time.", ("op",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, op="read")
+    histogram.observe(0.5, op="read")
+    histogram.observe(5.0, op="read")
+    histogram.observe(0.1, op='say "hi"')
+
+    text = registry.render().decode()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1.0"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'op_seconds_sum{op="read"} 5.55' in text
+    assert 'op_seconds_count{op="read"} 3' in text
+    # Bounds are inclusive and label values are escaped
+    assert 'op_seconds_bucket{op="say \\"hi\\"",le="0.1"} 1' in text
+
+
+def test_time_records_outcome():
+    histogram = Registry().histogram("call_seconds", "Call time.", ("operation", "outcome"))
+    with histogram.time(operation="chat"):
+        pass
+    try:
+        with histogram.time(operation="chat"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert histogram.count(operation="chat", outcome="ok") == 1
+    assert histogram.count(operation="chat", outcome="error") == 1
+
+
+def test_middleware_labels_requests_by_route_template():
+    registry = Registry()
+    histogram = registry.histogram("http_request_duration_seconds", "Latency.", ("method", "route", "status"))
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, histogram=histogram)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        if item_id == "missing":
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"id": item_id}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for item_id in ("a", "b", "missing"):
+                await client.get(f"/items/{item_id}")
+            await client.get("/nowhere")
+
+    asyncio.run(run())
+    assert histogram.count(method="GET", route="/items/{item_id}", status="200") == 2
+    assert histogram.count(method="GET", route="/items/{item_id}", status="404") == 1
+    assert histogram.count(method="GET", route="unmatched", status="404") == 1
+
+
+def test_mongo_command_timer_pairs_events_by_request():
+    histogram = Registry().histogram("mongodb_command_duration_seconds", "Latency.", ("command", "collection", "outcome"))
+    timer = MongoCommandTimer(histogram)
+    connection = ("localhost", 27017)
+    timer.started(SimpleNamespace(command={"find": "moods", "filter": {}}, command_name="find", request_id=1, connection_id=connection))
+    timer.started(SimpleNamespace(command={"ping": 1}, command_name="ping", request_id=2, connection_id=connection))
+    timer.failed(SimpleNamespace(command_name="ping", request_id=2, connection_id=connection, duration_micros=900))
+    timer.started(SimpleNamespace(command={"getMore": 8421, "collection": "moods"}, command_name="getMore", request_id=3, connection_id=connection))
+    timer.succeeded(SimpleNamespace(command_name="getMore", request_id=3, connection_id=connection, duration_micros=400))
+    timer.succeeded(SimpleNamespace(command_name="find", request_id=1, connection_id=connection, duration_micros=2500))
+
+    assert histogram.count(command="find", collection="moods", outcome="ok") == 1
+    assert histogram.count(command="ping", collection="", outcome="error") == 1
+    assert histogram.count(command="getMore", collection="moods", outcome="ok") == 1
+
+
+def test_client_accepts_command_listeners():
+    histogram = Registry().histogram("mongodb_command_duration_seconds", "Latency.", ("command", "collection", "outcome"))
+    timer = MongoCommandTimer(histogram)
+    client = create_mongo_client("mongodb://localhost:27017", event_listeners=[timer])
+    try:
+        assert timer in client.delegate.options.event_listeners
+    finally:
+        client.close()
@@ -0,0 +1,55 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from mood_analytics import compute_mood_analytics
+
+START = datetime(2024, 1, 1)  # a Monday
+
+
+def entry(day, level, activities=(), hour=9):
+    return {"mood_level": level, "timestamp": START + timedelta(days=day, hours=hour), "activities": list(activities)}
+
+
+def test_empty_history():
+    result = compute_mood_analytics([])
+    assert result["summary"]["entries"] == 0 and result["daily"] == []
+
+
+def test_daily_weekly_and_rolling_statistics():
+    entries = [entry(0, 4), entry(0, 6, hour=20), entry(1, 8), entry(9, 2)]
+    result = compute_mood_analytics(entries)
+
+    assert [day["date"] for day in result["daily"]] == ["2024-01-01", "2024-01-02", "2024-01-10"]
+    assert [day["mean"] for day in result["daily"]] == [5.0, 8.0, 2.0]
+    # Day 9 is outside the 7-day window of days 0 and 1, but inside the 30-day one
+    assert [day["rolling_7d"] for day in result["daily"]] == [5.0, 6.5, 2.0]
+    assert result["daily"][-1]["rolling_30d"] == 5.0
+    assert result["weekly"] == [
+        {"week_start": "2024-01-01", "mean": 6.0, "count": 3},
+        {"week_start": "2024-01-08", "mean": 2.0, "count": 1},
+    ]
+    assert result["summary"]["mean"] == 5.0
+    assert result["summary"]["mean_abs_daily_change"] == 4.5
+
+
+def test_activity_lift_compares_with_and_without():
+    entries = [entry(0, 8, ["exercise"]), entry(1, 6, ["exercise", "exercise"]), entry(2, 4), entry(3, 2, ["work"])]
+    activities = {item["activity"]: item for item in compute_mood_analytics(entries)["activities"]}
+
+    assert activities["exercise"] == {"activity": "exercise", "entries": 2, "mean_with": 7.0, "mean_without": 3.0, "lift": 4.0}
+    assert activities["work"]["lift"] == 2.0 - 6.0
+    assert list(activities) == ["exercise", "work"]
+
+
+def test_years_of_daily_entries_stay_fast():
+    random.seed(3)
+    entries = [
+        entry(day, random.randint(1, 10), random.sample(["exercise", "reading", "sleep", "social"], 2))
+        for day in range(5 * 365)
+    ]
+    compute_mood_analytics(entries)
+    start = time.perf_counter()
+    result = compute_mood_analytics(entries)
+    assert time.perf_counter() - start < 0.05
+    assert result["summary"]["days"] == 5 * 365
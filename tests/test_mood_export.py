@@ -0,0 +1,99 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from mood_export import csv_chunks, parquet_chunks
+from storage_memory import MemoryStorage
+
+START = datetime(2024, 6, 1, 8, tzinfo=timezone.utc)
+
+
+def make_entries(count):
+    return [
+        {
+            "id": f"mood-{index:04d}",
+            "mood_level": index % 10 + 1,
+            "notes": 'slept badly, "again"\nbut walked' if index == 1 else "",
+            "activities": ["walking; then tea", "reading"][: index % 3],
+            "timestamp": START + timedelta(hours=index),
+        }
+        for index in range(count)
+    ]
+
+
+async def from_list(entries):
+    for entry in entries:
+        yield entry
+
+
+def collect(chunks):
+    async def run():
+        return [chunk async for chunk in chunks]
+
+    return asyncio.run(run())
+
+
+def test_csv_is_streamed_in_chunks_and_round_trips():
+    entries = make_entries(25)
+    chunks = collect(csv_chunks(from_list(entries), chunk_rows=10))
+    # Header, then one chunk per 10 entries
+    assert len(chunks) == 4
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert len(rows) == 25
+    assert rows[1]["notes"] == 'slept badly, "again"\nbut walked'
+    assert rows[2] == {"id": "mood-0002", "timestamp": "2024-06-01T10:00:00+00:00", "mood_level": "3", "notes": "", "activities": '["walking; then tea", "reading"]'}
+    assert [json.loads(row["activities"]) for row in rows[:3]] == [[], ["walking; then tea"], ["walking; then tea", "reading"]]
+
+
+def test_parquet_writes_one_row_group_per_chunk():
+    pq = pytest.importorskip("pyarrow.parquet")
+    entries = make_entries(25)
+    # Naive UTC, as storage returns it
+    entries[0]["timestamp"] = entries[0]["timestamp"].replace(tzinfo=None)
+    chunks = collect(parquet_chunks(from_list(entries), chunk_rows=10))
+    assert len(chunks) == 4 and all(chunks[:3])
+
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.num_rows == 25
+    assert table.column("id").to_pylist() == [entry["id"] for entry in entries]
+    assert table.column("timestamp")[0].as_py() == START
+    assert table.column("activities")[2].as_py() == ["walking; then tea", "reading"]
+
+    # Levels stored before validation existed can fall outside 1-10; they must not break the file mid-stream
+    wide = collect(parquet_chunks(from_list([dict(entries[0], mood_level=200)])))
+    assert pq.ParquetFile(io.BytesIO(b"".join(wide))).read().column("mood_level").to_pylist() == [200]
+
+    empty = pq.ParquetFile(io.BytesIO(b"".join(collect(parquet_chunks(from_list([]))))))
+    assert empty.metadata.num_rows == 0
+
+
+def test_export_endpoint_filters_by_time_range(monkeypatch):
+    import server
+
+    storage = MemoryStorage()
+    asyncio.run(storage.moods.insert_many(make_entries(48)))
+    monkeypatch.setattr(server, "storage", storage)
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            params = {"from": (START + timedelta(hours=24)).isoformat(), "to": (START + timedelta(hours=30)).isoformat()}
+            exported = await client.get("/api/mood/export", params=params)
+            rejected = await client.get("/api/mood/export", params={"format": "xlsx"})
+        return exported, rejected
+
+    exported, rejected = asyncio.run(run())
+    assert exported.status_code == 200
+    assert exported.headers["content-type"].startswith("text/csv")
+    assert exported.headers["content-disposition"] == 'attachment; filename="mood-history.csv"'
+    rows = list(csv.DictReader(io.StringIO(exported.text)))
+    assert [row["id"] for row in rows] == [f"mood-{index:04d}" for index in range(24, 30)]
+    assert rejected.status_code == 400
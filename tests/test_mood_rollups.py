@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mood_rollups import ROLLUP_COLLECTION, check_mood_rollups, rebuild_mood_rollups, record_mood_rollup, summarize_rollup
+from tests.fakes import FakeDatabase
+
+START = datetime(2024, 3, 1)
+
+
+def log(db, level, hours, activities=()):
+    entry = {"id": f"e{len(db.mood_entries.documents)}", "mood_level": level, "activities": list(activities), "timestamp": START + timedelta(hours=hours)}
+    asyncio.run(db.mood_entries.insert_one(entry))
+    asyncio.run(record_mood_rollup(db, entry))
+    return entry
+
+
+def rollups(db):
+    return {doc["date"]: doc for doc in asyncio.run(db[ROLLUP_COLLECTION].find({}, {"_id": 0}).to_list())}
+
+
+def test_incremental_rollup_tracks_day_statistics():
+    db = FakeDatabase()
+    log(db, 4, 1, ["walk", "a.b"])
+    log(db, 8, 5, ["walk"])
+    log(db, 6, 30)
+
+    days = rollups(db)
+    assert sorted(days) == ["2024-03-01", "2024-03-02"]
+    first = days["2024-03-01"]
+    assert (first["count"], first["sum"], first["sum_sq"], first["min"], first["max"]) == (2, 12, 80, 4, 8)
+    assert summarize_rollup(first) == {
+        "date": "2024-03-01", "count": 2, "mean": 6.0, "std": 2.0, "min": 4, "max": 8,
+        "activities": {"walk": 2, "a.b": 1},
+    }
+
+
+def test_rebuild_matches_incremental_and_check_detects_drift():
+    db = FakeDatabase()
+    for hours, level in enumerate([3, 5, 7, 9, 2]):
+        log(db, level, hours * 10, ["yoga"] if level > 4 else [])
+    incremental = rollups(db)
+    assert asyncio.run(check_mood_rollups(db))["consistent"]
+
+    # Drift: one entry never reached its rollup, and a stray day exists
+    asyncio.run(db.mood_entries.insert_one({"id": "x", "mood_level": 1, "activities": [], "timestamp": START + timedelta(hours=2)}))
+    asyncio.run(db[ROLLUP_COLLECTION].insert_one({"date": "2023-01-01", "count": 1, "sum": 1, "sum_sq": 1, "min": 1, "max": 1}))
+    report = asyncio.run(check_mood_rollups(db))
+    assert not report["consistent"]
+    assert report["mismatched"] == [{"date": "2024-03-01", "fields": ["count", "sum", "sum_sq", "min"]}]
+    assert report["extra"] == ["2023-01-01"]
+
+    result = asyncio.run(rebuild_mood_rollups(db, batch_size=1))
+    assert result == {"days_written": 2, "days_deleted": 1}
+    assert asyncio.run(check_mood_rollups(db))["consistent"]
+    assert summarize_rollup(rollups(db)["2024-03-02"]) == summarize_rollup(incremental["2024-03-02"])
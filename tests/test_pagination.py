@@ -0,0 +1,73 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, fetch_page, keyset_filter, keyset_sort, stream_ndjson, wants_ndjson
+from storage_memory import MemoryStorage
+from tests.fakes import FakeDatabase
+
+START = datetime(2024, 1, 1)
+
+
+def seeded_collection():
+    db = FakeDatabase()
+    for index in range(25):
+        # Pairs of entries share a timestamp so the id tie-breaker matters
+        asyncio.run(db.mood_entries.insert_one({"id": f"id-{index:02d}", "mood_level": 5, "timestamp": START + timedelta(hours=index // 2)}))
+    return db.mood_entries
+
+
+def read_all_pages(collection, direction, limit):
+    seen, cursor = [], None
+    while True:
+        results = collection.find(keyset_filter({}, decode_cursor(cursor) if cursor else None, direction), {"_id": 0}).sort(keyset_sort(direction)).limit(limit + 1)
+        page, cursor = asyncio.run(fetch_page(results, limit))
+        seen.extend(document["id"] for document in page)
+        if cursor is None:
+            return seen
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"timestamp": START, "id": "abc"})
+    assert decode_cursor(cursor) == (START, "abc")
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_pages_cover_every_document_once(direction):
+    seen = read_all_pages(seeded_collection(), direction, limit=4)
+    expected = sorted(f"id-{index:02d}" for index in range(25))
+    assert seen == (expected if direction > 0 else expected[::-1])
+
+
+def test_ndjson_stream_yields_one_line_per_document():
+    collection = seeded_collection()
+
+    async def collect():
+        return [line async for line in stream_ndjson(collection.find({}, {"_id": 0}).sort(keyset_sort(1)).limit(3))]
+
+    lines = asyncio.run(collect())
+    assert len(lines) == 3
+    assert json.loads(lines[0]) == {"id": "id-00", "mood_level": 5, "timestamp": START.isoformat()}
+    assert wants_ndjson("application/x-ndjson, application/json;q=0.5")
+    assert not wants_ndjson("application/json")
+
+
+def test_history_page_size_is_capped(monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "storage", MemoryStorage())
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.get("/api/mood/history", params={"limit": limit})).status_code for limit in (1000, 1001)]
+
+    assert asyncio.run(run()) == [200, 422]
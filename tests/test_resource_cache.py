@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from compression import etag_matches
+from resource_cache import SUMMARY_FIELDS, CachedPayload, ResourceCatalogCache, parse_fields
+from tests.fakes import FakeDatabase
+
+
+def make_cache(db, **kwargs):
+    async def loader():
+        resources = await db.resources.find({}, {"_id": 0}).sort("timestamp", -1).to_list(length=None)
+        return resources, await db.resources.distinct("category")
+
+    return ResourceCatalogCache(loader, **kwargs)
+
+
+def add_resource(db, title, category, hour):
+    asyncio.run(db.resources.insert_one({"id": title, "title": title, "category": category, "timestamp": datetime(2024, 1, 1, hour)}))
+
+
+def test_catalog_is_loaded_once_and_grouped_by_category():
+    db = FakeDatabase()
+    add_resource(db, "a", "anxiety", 1)
+    add_resource(db, "b", "sleep", 2)
+    cache = make_cache(db)
+
+    first = asyncio.run(cache.get())
+    second = asyncio.run(cache.get())
+    assert first is second and cache.loads == 1 and cache.hits == 1
+    assert [r["title"] for r in json.loads(first.resources().body)["resources"]] == ["b", "a"]
+    assert [r["title"] for r in json.loads(first.resources("sleep").body)["resources"]] == ["b"]
+    assert json.loads(first.resources("missing").body) == {"resources": []}
+    assert json.loads(first.categories.body) == {"categories": ["anxiety", "sleep"]}
+
+
+def test_invalidate_changes_etag():
+    db = FakeDatabase()
+    add_resource(db, "a", "anxiety", 1)
+    cache = make_cache(db)
+    etag = asyncio.run(cache.get()).resources().etag
+
+    add_resource(db, "c", "anxiety", 3)
+    assert asyncio.run(cache.get()).resources().etag == etag
+    cache.invalidate()
+    assert asyncio.run(cache.get()).resources().etag != etag
+    assert cache.loads == 2
+
+
+def test_parse_fields():
+    assert parse_fields(None) == SUMMARY_FIELDS
+    assert "content" not in SUMMARY_FIELDS
+    assert parse_fields("title, category,title") == ("id", "title", "category")
+    assert parse_fields("content,id") == ("id", "content")
+    with pytest.raises(ValueError):
+        parse_fields("title,password")
+
+
+def test_projected_payloads_are_built_once():
+    db = FakeDatabase()
+    add_resource(db, "a", "anxiety", 1)
+    add_resource(db, "b", "sleep", 2)
+    catalog = asyncio.run(make_cache(db).get())
+
+    fields = parse_fields("title")
+    payload = catalog.resources("sleep", fields)
+    assert catalog.resources("sleep", fields) is payload
+    assert json.loads(payload.body) == {"resources": [{"id": "b", "title": "b"}]}
+    assert "timestamp" in json.loads(catalog.resources().body)["resources"][0]
+
+
+def test_encoded_body_is_compressed_once():
+    payload = CachedPayload({"resources": [{"title": "x" * 100}]})
+    encoded = payload.encoded("gzip")
+    assert payload.encoded("gzip") is encoded
+    assert gzip.decompress(encoded) == payload.body
+
+
+def test_each_encoding_has_its_own_etag():
+    payload = CachedPayload({"resources": []})
+    assert payload.etag_for(None) == payload.etag
+    assert payload.etag_for("gzip") == payload.etag[:-1] + '-gzip"'
+    assert len({payload.etag, payload.etag_for("gzip"), payload.etag_for("br")}) == 3
+    assert not etag_matches(payload.etag, payload.etag_for("gzip"))
@@ -0,0 +1,73 @@
+from response_cache import ResponseCache, normalize_prompt
+
+PARAMS = {"provider": "openai", "model": "gpt-4o", "max_tokens": 1000}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalization_ignores_case_spacing_and_end_punctuation():
+    assert normalize_prompt("  I feel   ANXIOUS!! ") == "i feel anxious"
+    assert normalize_prompt("I can’t sleep.") == normalize_prompt("i can't sleep")
+    assert normalize_prompt("I can't sleep") != normalize_prompt("I can sleep")
+
+
+def test_key_depends_on_system_prompt_and_model_params():
+    cache = ResponseCache()
+    key = cache.key("I feel anxious", "prompt", PARAMS)
+    assert key == cache.key("i feel anxious.", "prompt", PARAMS)
+    assert key != cache.key("I feel anxious", "other prompt", PARAMS)
+    assert key != cache.key("I feel anxious", "prompt", {**PARAMS, "max_tokens": 500})
+
+
+def test_long_or_empty_messages_bypass_the_cache():
+    cache = ResponseCache(max_prompt_chars=20)
+    assert cache.key("x" * 21, "prompt", PARAMS) is None
+    assert cache.key("?!", "prompt", PARAMS) is None
+    cache.bypass()
+    assert cache.stats()["bypasses"] == 3
+
+
+def test_hits_report_latency_saved_and_expire_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    key = cache.key("I can't sleep", "prompt", PARAMS)
+    assert cache.get(key) is None
+    cache.put(key, "Sleep trouble is hard.", latency=1.5)
+    clock.now = 30
+    assert cache.get(key) == "Sleep trouble is hard."
+    assert cache.get(key) == "Sleep trouble is hard."
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["latency_saved_ms"] == 3000.0 and stats["avg_latency_saved_ms"] == 1500.0
+
+    # Age is counted from when the reply was stored, not from the last hit
+    clock.now = 60
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = ResponseCache(max_bytes=3 * (64 + 100))
+    keys = [cache.key(f"opener {index}", "prompt", PARAMS) for index in range(4)]
+    for key in keys[:3]:
+        cache.put(key, "x" * 100, latency=1.0)
+    cache.get(keys[0])
+    cache.put(keys[3], "x" * 100, latency=1.0)
+
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) is not None for key in (keys[0], keys[2], keys[3]))
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    # A reply larger than the whole cache is not stored
+    cache.put(keys[1], "x" * 1000, latency=1.0)
+    assert cache.get(keys[1]) is None and len(cache) == 3
@@ -0,0 +1,141 @@
+import math
+import random
+from collections import Counter
+
+from search_index import FIELD_WEIGHTS, STOPWORDS, TOKEN_PATTERN, ResourceSearchIndex, highlight_pattern, snippet
+
+
+def resource(id, title, description="", content="", category="general"):
+    return {"id": id, "title": title, "category": category, "description": description, "content": content, "url": ""}
+
+
+def brute_force_bm25(resources, words, k1=1.2, b=0.75):
+    frequencies, lengths = [], []
+    for item in resources:
+        counts = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in TOKEN_PATTERN.findall(item[field].lower()):
+                if token not in STOPWORDS:
+                    counts[token] += weight
+        frequencies.append(counts)
+        lengths.append(sum(counts.values()))
+    average = sum(lengths) / len(lengths)
+    scores = {}
+    for counts, length, item in zip(frequencies, lengths, resources):
+        score = 0.0
+        for word in words:
+            df = sum(1 for other in frequencies if word in other)
+            tf = counts.get(word, 0)
+            if tf:
+                idf = math.log(1 + (len(resources) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+        if score:
+            scores[item["id"]] = score
+    return scores
+
+
+def test_ranks_title_matches_above_content_matches():
+    index = ResourceSearchIndex()
+    index.add(resource("content", "Evening routines", content="A short note on sleep and rest."))
+    index.add(resource("title", "Better sleep", content="Wind down before bed."))
+    index.add(resource("other", "Grounding", content="Use your senses."))
+
+    results = index.search("sleep")["results"]
+    assert [r["id"] for r in results] == ["title", "content"]
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_top_k_matches_exhaustive_bm25():
+    rng = random.Random(3)
+    words = "anxiety panic sleep stress breathing therapy support routine journal grief".split()
+    resources = [
+        resource(
+            str(i),
+            " ".join(rng.choices(words, k=3)),
+            " ".join(rng.choices(words, k=6)),
+            " ".join(rng.choices(words + ["filler"] * 10, k=rng.randint(5, 60))),
+        )
+        for i in range(400)
+    ]
+    index = ResourceSearchIndex()
+    for item in resources:
+        index.add(item)
+
+    for query in (["anxiety"], ["panic", "breathing"], ["sleep", "stress", "grief"]):
+        expected = brute_force_bm25(resources, query)
+        best = sorted(expected.items(), key=lambda pair: (-pair[1], int(pair[0])))[:10]
+        results = index.search(" ".join(query), limit=10, prefix=False)["results"]
+        assert [r["score"] for r in results] == [round(score, 4) for _, score in best]
+
+
+def test_scores_stay_exact_after_additions():
+    rng = random.Random(5)
+    words = "anxiety panic sleep stress breathing".split()
+    resources = [resource(str(i), " ".join(rng.choices(words, k=3)), content=" ".join(rng.choices(words, k=20))) for i in range(200)]
+    index = ResourceSearchIndex()
+    for item in resources:
+        index.add(item)
+    index.search("panic", prefix=False)
+
+    # Moves the average length by about 1%; half of the new documents extend the postings of "panic"
+    for i in range(200, 210):
+        resources.append(resource(str(i), "grief panic" if i % 2 else "grief", content="grief " * 5, category="loss"))
+        index.add(resources[-1])
+    expected = sorted(brute_force_bm25(resources, ["panic"]).items(), key=lambda pair: (-pair[1], int(pair[0])))[:10]
+    results = index.search("panic", limit=10, prefix=False)["results"]
+    assert [(r["id"], r["score"]) for r in results] == [(id, round(score, 4)) for id, score in expected]
+    assert {r["id"] for r in index.search("panic", category="loss", prefix=False)["results"]} == {"201", "203", "205", "207", "209"}
+
+
+def test_last_word_matches_as_prefix():
+    index = ResourceSearchIndex()
+    index.add(resource("1", "Mindfulness basics"))
+    index.add(resource("2", "Mindful eating"))
+    index.add(resource("3", "Minding your thoughts about mind games"))
+
+    assert {r["id"] for r in index.search("mindf")["results"]} == {"1", "2"}
+    assert index.search("mindf", prefix=False)["results"] == []
+    # Only the last word is completed, so "mindf" matches nothing here and only "eating" counts
+    assert [r["id"] for r in index.search("mindf eating")["results"]] == ["2"]
+    assert [r["id"] for r in index.search("eating mindf")["results"]] == ["2", "1"]
+
+
+def test_incremental_add_and_duplicates():
+    index = ResourceSearchIndex()
+    index.add(resource("1", "Coping with grief"))
+    assert index.search("journaling")["results"] == []
+
+    assert index.add(resource("2", "Journaling prompts", category="coping-strategies"))
+    assert not index.add(resource("2", "Journaling prompts"))
+    assert len(index) == 2
+    assert [r["id"] for r in index.search("journal")["results"]] == ["2"]
+
+
+def test_category_filter():
+    index = ResourceSearchIndex()
+    index.add(resource("1", "Sleep hygiene", category="sleep"))
+    index.add(resource("2", "Sleep and anxiety", category="anxiety"))
+
+    assert [r["id"] for r in index.search("sleep", category="anxiety")["results"]] == ["2"]
+    assert index.search("sleep", category="missing")["results"] == []
+
+
+def test_stopwords_and_unknown_words():
+    index = ResourceSearchIndex()
+    index.add(resource("1", "The anxiety toolkit"))
+    assert index.search("the")["results"] == []
+    assert [r["id"] for r in index.search("the anxiety")["results"]] == ["1"]
+    assert index.search("zzz")["results"] == []
+    assert index.search("   ")["results"] == []
+
+
+def test_snippet_highlights_and_escapes():
+    text = "Start <small>: " + "filler " * 40 + "Breathing slowly calms panic. Breathing again."
+    result = snippet(text, highlight_pattern(["breathing", "panic"]), width=60)
+
+    assert result.startswith("…")
+    assert "<mark>Breathing</mark> slowly calms <mark>panic</mark>" in result
+    assert "<small>" not in snippet("A <small> note", highlight_pattern(["note"]))
+    assert snippet("A <small> note", highlight_pattern(["note"])) == "A &lt;small&gt; <mark>note</mark>"
+    # Whole tokens only
+    assert "<mark>" not in snippet("panicked", highlight_pattern(["panic"]))
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from session_cache import SessionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = SessionCache(max_size=2, idle_ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_idle_ttl_expiry_is_refreshed_by_access():
+    clock = FakeClock()
+    cache = SessionCache(max_size=10, idle_ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    clock.now = 8
+    assert cache.get("a") == 1
+    clock.now = 12
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 1
+
+
+def test_get_or_create_builds_once_for_concurrent_misses():
+    cache = SessionCache(max_size=10, idle_ttl=60)
+    builds = []
+
+    async def factory():
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_create("s", factory) for _ in range(5)))
+
+    values = asyncio.run(run())
+    assert len(builds) == 1
+    assert all(value is values[0] for value in values)
+    assert cache.get("s") is values[0]
+
+
+def test_get_or_create_does_not_cache_failures():
+    cache = SessionCache(max_size=10, idle_ttl=60)
+
+    async def failing():
+        raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_create("s", failing))
+    assert "s" not in cache
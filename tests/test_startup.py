@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from migrations import MIGRATIONS, SAMPLE_RESOURCES, apply_migrations
+from storage_memory import MemoryStorage
+from tests.fakes import FakeLlmChat
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+
+# Seconds to import server.py in a fresh interpreter; most of it is FastAPI itself
+IMPORT_BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET_SECONDS", "2.0"))
+
+# Loaded on first use only; each adds noticeably to a cold start
+LAZY_MODULES = ("emergentintegrations", "openai", "motor", "pymongo")
+
+PROFILE = """
+import json, sys, time
+started = time.perf_counter()
+import server
+print(json.dumps({"seconds": time.perf_counter() - started, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def test_import_stays_within_budget_and_defers_heavy_modules():
+    env = {key: value for key, value in os.environ.items() if key != "STORAGE_ENGINE"}
+    # Best of three, so one slow run on a busy machine does not fail the build
+    runs = [
+        json.loads(subprocess.run(
+            [sys.executable, "-c", PROFILE], cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+        ).stdout)
+        for _ in range(3)
+    ]
+    assert all(run["loaded"] == [] for run in runs), runs
+    assert min(run["seconds"] for run in runs) < IMPORT_BUDGET_SECONDS, runs
+
+
+
+def test_emergent_client_is_the_default():
+    env = {key: value for key, value in os.environ.items() if key not in ("STORAGE_ENGINE", "LLM_CLIENT")}
+    modules = subprocess.run(
+        [sys.executable, "-c", "import server; print(server.LlmChat.module, server.UserMessage.module)"],
+        cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    assert modules == ["emergentintegrations.llm.chat", "emergentintegrations.llm.chat"]
+
+
+class FlakyStorage(MemoryStorage):
+    """In-memory storage whose setup fails a few times, like a database that is still starting."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def setup(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection refused")
+
+
+def test_ready_only_once_storage_is_prepared(monkeypatch):
+    import server
+
+    storage = FlakyStorage(failures=2)
+    monkeypatch.setattr(server, "storage", storage)
+    monkeypatch.setattr(server, "LlmChat", FakeLlmChat)
+    monkeypatch.setattr(server, "STARTUP_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(server, "startup_state", {"ready": False, "attempts": 0, "error": None})
+    monkeypatch.setattr(server, "startup_tasks", [])
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await server.startup_event()
+            try:
+                live = await client.get("/api/health/live")
+                starting = await client.get("/api/health/ready")
+                await asyncio.wait_for(server.startup_tasks[0], 5)
+                ready = await client.get("/api/health/ready")
+            finally:
+                await server.shutdown_event()
+        return live, starting, ready
+
+    live, starting, ready = asyncio.run(run())
+    assert live.status_code == 200
+    assert starting.status_code == 503 and starting.json()["status"] == "starting"
+    assert ready.status_code == 200 and ready.json()["status"] == "healthy"
+    assert server.startup_state["attempts"] == 3
+    assert len(server.search_index) == len(SAMPLE_RESOURCES)
+
+
+def test_search_index_builds_off_the_event_loop(monkeypatch):
+    import server
+    from search_index import ResourceSearchIndex
+
+    storage = MemoryStorage()
+    build = ResourceSearchIndex.from_resources
+
+    def slow_build(resources):
+        time.sleep(0.3)
+        return build(resources)
+
+    monkeypatch.setattr(server, "storage", storage)
+    monkeypatch.setattr(server, "search_index", ResourceSearchIndex())
+    monkeypatch.setattr(ResourceSearchIndex, "from_resources", staticmethod(slow_build))
+
+    async def run():
+        await storage.setup()
+        await apply_migrations(storage)
+        building = asyncio.create_task(server.build_search_index())
+        ticks = 0
+        while not building.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+            if ticks == 5:
+                # What create_resource does while the index is still being built
+                server.search_index.add({"id": "new", "title": "Created during the build", "category": "general", "description": "", "content": ""})
+        await building
+        return ticks
+
+    ticks = asyncio.run(run())
+    assert ticks >= 10
+    assert len(server.search_index) == len(SAMPLE_RESOURCES) + 1
+
+
+def test_migrations_run_once():
+    storage = MemoryStorage()
+
+    async def run():
+        first = await apply_migrations(storage)
+        # Lost resources are not re-seeded on the next start
+        storage.resources._resources.clear()
+        second = await apply_migrations(storage)
+        return first, second, await storage.resources.count()
+
+    first, second, count = asyncio.run(run())
+    assert first == [name for name, _ in MIGRATIONS]
+    assert second == [] and count == 0
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import AutoReconnect, BulkWriteError, DocumentTooLarge, PyMongoError
+
+from mood_rollups import summarize_rollup
+from storage import DUPLICATE, create_storage, utc_naive
+from storage_memory import MemoryStorage
+from storage_mongo import MongoStorage
+from storage_sqlite import SqliteStorage
+from tests.fakes import FakeDatabase
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+START = datetime(2024, 3, 1, 9, tzinfo=timezone.utc)
+
+
+def mongo_available():
+    try:
+        MongoClient(MONGO_URL, serverSelectionTimeoutMS=300).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+def fake_mongo():
+    db = FakeDatabase()
+    # What the managed unique indexes (and MongoDB's own _id index) enforce
+    db.conversations.unique_fields.add("_id")
+    db.mood_entries.unique_fields.add("idempotency_key")
+    storage = MongoStorage(db)
+
+    async def setup():
+        pass
+
+    # The stand-in has no index management to reconcile
+    storage.setup = setup
+    return storage
+
+
+ENGINES = {
+    "memory": lambda tmp_path: MemoryStorage(),
+    "sqlite": lambda tmp_path: SqliteStorage(str(tmp_path / "storage.db")),
+    "fake-mongo": lambda tmp_path: fake_mongo(),
+    "mongo": lambda tmp_path: MongoStorage.connect(MONGO_URL, database=f"mh_storage_test_{uuid.uuid4().hex[:8]}"),
+}
+
+
+@pytest.fixture(params=[
+    "memory",
+    "sqlite",
+    "fake-mongo",
+    pytest.param("mongo", marks=pytest.mark.skipif(not mongo_available(), reason="MongoDB is not reachable at MONGO_URL")),
+])
+def storage(request, tmp_path):
+    return ENGINES[request.param](tmp_path)
+
+
+def run(storage, scenario):
+    """Run ``scenario(storage)`` against a freshly set-up storage, dropping any real database afterwards."""
+    async def main():
+        await storage.setup()
+        try:
+            return await scenario(storage)
+        finally:
+            if getattr(storage, "client", None) is not None:
+                await storage.client.drop_database(storage.db.name)
+            await storage.close()
+
+    return asyncio.run(main())
+
+
+async def collect(iterator):
+    return [document async for document in iterator]
+
+
+def turn(session_id, index):
+    return {
+        "id": f"{session_id}-{index:03d}",
+        "session_id": session_id,
+        "user_message": f"m{index}",
+        "ai_response": f"r{index}",
+        # Pairs of turns share a timestamp, so ordering falls back to id
+        "timestamp": START + timedelta(minutes=index // 2),
+    }
+
+
+def mood(index, level, activities=(), key=None):
+    entry = {
+        "id": f"mood-{index:03d}",
+        "mood_level": level,
+        "notes": "",
+        "activities": list(activities),
+        "timestamp": START + timedelta(hours=index * 7),
+    }
+    if key:
+        entry["idempotency_key"] = key
+    return entry
+
+
+def test_conversation_history_pages_by_keyset_and_skips_retried_turns(storage):
+    async def scenario(storage):
+        turns = [turn("s", index) for index in range(7)]
+        await storage.conversations.insert_many(turns[:4])
+        # A retried write-behind batch carries turns that are already stored
+        await storage.conversations.insert_many(turns)
+        await storage.conversations.insert_many([turn("other", 0)])
+
+        everything = await collect(storage.conversations.history("s"))
+        first = await collect(storage.conversations.history("s", limit=3))
+        last = first[-1]
+        rest = await collect(storage.conversations.history("s", (last["timestamp"], last["id"])))
+        return everything, first, rest, await storage.conversations.count("s")
+
+    everything, first, rest, count = run(storage, scenario)
+    assert [t["id"] for t in everything] == [f"s-{index:03d}" for index in range(7)]
+    assert [t["id"] for t in first + rest] == [t["id"] for t in everything]
+    assert count == 7
+    assert utc_naive(everything[0]["timestamp"]) == START.replace(tzinfo=None)
+    assert "_id" not in everything[0]
+
+
+def test_context_reads_and_summary_round_trip(storage):
+    async def scenario(storage):
+        await storage.conversations.insert_many([turn("s", index) for index in range(10)])
+        # s-003 shares s-002's timestamp, so only the id keeps it after the watermark
+        after = (START + timedelta(minutes=1), "s-002")
+        recent = await storage.conversations.recent("s", after, 2)
+        oldest = await storage.conversations.oldest("s", after, 2)
+        counted = await storage.conversations.count("s", after)
+        missing = await storage.conversations.get_summary("s")
+        for through, total in ((START + timedelta(minutes=2), 3), (START + timedelta(minutes=3), 4)):
+            await storage.conversations.save_summary("s", {
+                "summary": f"through {total}", "summarized_through": through, "summarized_through_id": f"s-{total:03d}",
+                "summarized_turns": total, "updated_at": through,
+            })
+        return recent, oldest, counted, missing, await storage.conversations.get_summary("s")
+
+    recent, oldest, counted, missing, summary = run(storage, scenario)
+    assert [t["user_message"] for t in recent] == ["m8", "m9"]
+    assert [t["user_message"] for t in oldest] == ["m3", "m4"]
+    assert counted == 7
+    assert missing is None
+    assert (summary["summary"], summary["summarized_through_id"], summary["summarized_turns"]) == ("through 4", "s-004", 4)
+    assert utc_naive(summary["summarized_through"]) == (START + timedelta(minutes=3)).replace(tzinfo=None)
+
+
+def test_mood_writes_deduplicate_and_keep_rollups(storage):
+    async def scenario(storage):
+        await storage.moods.insert(mood(0, 4, ["walking"]))
+        errors = await storage.moods.insert_many([
+            mood(1, 8, ["walking", "reading"], key="a"),
+            mood(2, 6, key="b"),
+            mood(3, 2, key="a"),
+        ])
+        ids = await storage.moods.ids_for_keys(["a", "b", "missing"])
+        newest = await collect(storage.moods.history(limit=2))
+        last = newest[-1]
+        older = await collect(storage.moods.history((last["timestamp"], last["id"])))
+        window = await collect(storage.moods.between(START + timedelta(hours=7), START + timedelta(hours=14), ("mood_level", "timestamp")))
+        return errors, ids, newest, older, window, await storage.moods.daily("2024-03-01", "2024-03-02")
+
+    errors, ids, newest, older, window, days = run(storage, scenario)
+    assert errors == [None, None, DUPLICATE]
+    assert ids == {"a": "mood-001", "b": "mood-002"}
+    assert [e["id"] for e in newest + older] == ["mood-002", "mood-001", "mood-000"]
+    assert [(e["mood_level"], utc_naive(e["timestamp"])) for e in window] == [(8, (START + timedelta(hours=7)).replace(tzinfo=None))]
+    assert set(window[0]) == {"mood_level", "timestamp"}
+
+    # 09:00, 16:00 and 23:00 on March 1st; the duplicate is not counted
+    assert [summarize_rollup(day) for day in days] == [{
+        "date": "2024-03-01", "count": 3, "mean": 6.0, "std": 1.633, "min": 4, "max": 8,
+        "activities": {"walking": 2, "reading": 1},
+    }]
+
+
+def test_resources_list_newest_first_with_selected_fields(storage):
+    def resource(index, category):
+        return {
+            "id": f"r{index}", "title": f"Title {index}", "category": category, "description": "d",
+            "content": "c" * index, "url": "", "timestamp": START + timedelta(days=index),
+        }
+
+    async def scenario(storage):
+        await storage.resources.insert_many([resource(1, "Anxiety"), resource(2, "Sleep")])
+        await storage.resources.insert(resource(3, "Anxiety"))
+        return (
+            await storage.resources.count(),
+            await storage.resources.list(),
+            await storage.resources.list("Anxiety", ("id", "title")),
+            await storage.resources.get("r2"),
+            await storage.resources.get("missing"),
+            sorted(await storage.resources.categories()),
+            sorted(r["id"] for r in await collect(storage.resources.iter_all())),
+        )
+
+    count, everything, anxiety, single, missing, categories, all_ids = run(storage, scenario)
+    assert count == 3
+    assert [r["id"] for r in everything] == ["r3", "r2", "r1"]
+    assert anxiety == [{"id": "r3", "title": "Title 3"}, {"id": "r1", "title": "Title 1"}]
+    assert single["content"] == "cc" and "_id" not in single
+    assert missing is None
+    assert categories == ["Anxiety", "Sleep"]
+    assert all_ids == ["r1", "r2", "r3"]
+
+
+def test_migrations_are_recorded_once(storage):
+    async def scenario(storage):
+        before = await storage.applied_migrations()
+        await storage.record_migration("0001_example")
+        await storage.record_migration("0001_example")
+        return before, await storage.applied_migrations()
+
+    assert run(storage, scenario) == (set(), {"0001_example"})
+
+
+def test_create_storage_rejects_unknown_engines():
+    assert isinstance(create_storage("memory"), MemoryStorage)
+    with pytest.raises(ValueError):
+        create_storage("postgres")
+
+
+def test_engines_tell_transient_write_errors_apart(tmp_path):
+    memory = MemoryStorage()
+    assert memory.is_transient_error(ConnectionError("reset")) and not memory.is_transient_error(ValueError("bad"))
+
+    mongo = fake_mongo()
+    assert mongo.is_transient_error(AutoReconnect("primary stepped down"))
+    assert mongo.is_transient_error(BulkWriteError({"writeErrors": [{"index": 0, "code": 189}]}))
+    assert not mongo.is_transient_error(BulkWriteError({"writeErrors": [{"index": 0, "code": 121}]}))
+    assert not mongo.is_transient_error(DocumentTooLarge("too large"))
+
+    path = str(tmp_path / "locked.db")
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    with pytest.raises(sqlite3.OperationalError) as busy:
+        sqlite3.connect(path, timeout=0).execute("SELECT 1 FROM sqlite_master")
+    holder.close()
+    sqlite = SqliteStorage(path)
+    assert sqlite.is_transient_error(busy.value)
+    assert not sqlite.is_transient_error(sqlite3.IntegrityError("NOT NULL constraint failed"))
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import time
+
+from types import SimpleNamespace
+
+from llm_scheduler import LlmScheduler
+from openai_chat import OpenAIChat, UserMessage
+from session_cache import SessionCache
+from storage_memory import MemoryStorage
+from streaming import iter_reply_tokens, sse_chat_events, sse_event
+from tests.fakes import FakeLlmChat, FakeUserMessage
+from write_behind import WriteBehindQueue
+
+
+def parse_frames(body):
+    frames = []
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        frames.append((event, data))
+    return frames
+
+
+def test_sse_event_format():
+    assert sse_event({"token": "hi"}) == 'data: {"token": "hi"}\n\n'
+    assert sse_event({"a": 1}, event="done") == 'event: done\ndata: {"a": 1}\n\n'
+
+
+def test_stream_emits_tokens_then_persists_and_finishes():
+    stored = []
+    chat = FakeLlmChat(tokens=["Take ", "a ", "breath."])
+
+    async def collect():
+        return [frame async for frame in sse_chat_events(chat, FakeUserMessage("hi"), "s1", on_complete=_append(stored))]
+
+    frames = parse_frames("".join(asyncio.run(collect())))
+    assert frames[0] == ("session", {"session_id": "s1"})
+    assert [data["token"] for event, data in frames[1:-1]] == ["Take ", "a ", "breath."]
+    assert frames[-1] == ("done", {"session_id": "s1", "response": "Take a breath."})
+    assert stored == ["Take a breath."]
+
+
+def test_stream_reports_error_and_skips_persistence():
+    stored = []
+    chat = FakeLlmChat(tokens=["one ", "two"], fail_after=1)
+
+    async def collect():
+        return [frame async for frame in sse_chat_events(chat, FakeUserMessage("hi"), "s1", on_complete=_append(stored))]
+
+    frames = parse_frames("".join(asyncio.run(collect())))
+    assert frames[-1][0] == "error"
+    assert stored == []
+
+
+def test_crisis_resources_are_sent_before_tokens_even_without_a_client():
+    crisis = {"categories": ["suicide"], "emergency_contacts": [{"name": "Lifeline", "phone": "988"}]}
+    chat = FakeLlmChat(tokens=["I'm ", "here."], first_token_delay=0.05)
+
+    async def collect(chat):
+        return [frame async for frame in sse_chat_events(chat, FakeUserMessage("hi"), "s1", on_complete=_append([]), crisis=crisis)]
+
+    frames = parse_frames("".join(asyncio.run(collect(chat))))
+    assert [event for event, _ in frames[:3]] == ["session", "crisis", "message"]
+    assert frames[1][1] == crisis
+
+    frames = parse_frames("".join(asyncio.run(collect(None))))
+    assert [event for event, _ in frames] == ["session", "crisis", "error"]
+
+
+def test_send_message_only_client_is_rechunked():
+    class BlockingChat:
+        async def send_message(self, user_message):
+            return "You are not alone."
+
+    async def collect():
+        return [token async for token in iter_reply_tokens(BlockingChat(), FakeUserMessage("hi"))]
+
+    assert asyncio.run(collect()) == ["You", " are", " not", " alone."]
+
+
+class FakeCompletions:
+    """``AsyncOpenAI().chat.completions`` answering with a fixed list of text deltas."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.requests = []
+        self.closed = 0
+
+    async def create(self, **request):
+        self.requests.append(request)
+        completions = self
+
+        class Stream:
+            async def __aiter__(self):
+                for delta in completions.deltas:
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+                # The final chunk carries usage only
+                yield SimpleNamespace(choices=[])
+
+            async def close(self):
+                completions.closed += 1
+
+        return Stream()
+
+
+def test_openai_chat_streams_deltas_and_keeps_history():
+    completions = FakeCompletions(["You ", None, "matter."])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    chat = OpenAIChat(api_key=None, session_id="s1", system_message="Be kind.", client=client).with_model("openai", "gpt-4o").with_max_tokens(50)
+
+    async def run():
+        tokens = [token async for token in chat.stream_message(UserMessage("hi"))]
+        reply = await chat.send_message(UserMessage("thanks"))
+        return tokens, reply
+
+    tokens, reply = asyncio.run(run())
+    assert tokens == ["You ", "matter."] and reply == "You matter."
+    assert completions.requests[0] == {
+        "model": "gpt-4o", "max_tokens": 50, "stream": True,
+        "messages": [{"role": "system", "content": "Be kind."}, {"role": "user", "content": "hi"}],
+    }
+    # The second request carries the first turn
+    assert [message["content"] for message in completions.requests[1]["messages"]] == ["Be kind.", "hi", "You matter.", "thanks"]
+    assert completions.closed == 2
+
+
+def use_fake_llm(monkeypatch, **chat_options):
+    """Serve the real app on in-memory storage with FakeLlmChat in place of the LLM client."""
+    import server
+
+    monkeypatch.setattr(server, "storage", MemoryStorage())
+    monkeypatch.setattr(server, "LlmChat", lambda **kwargs: FakeLlmChat(**chat_options))
+    monkeypatch.setattr(server, "UserMessage", FakeUserMessage)
+    monkeypatch.setattr(server, "llm_scheduler", LlmScheduler(max_in_flight=2))
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server, "conversation_writer", WriteBehindQueue(
+        server.insert_conversations, key=lambda conversation: conversation["session_id"], flush_interval=0.001))
+    return server
+
+
+async def stream_chat(server, message, disconnect_after_first_token=False):
+    """POST to the real /api/chat/stream through the ASGI app; httpx's ASGITransport buffers the whole body.
+
+    Returns (seconds since start, body chunk, LLM calls in flight) for every chunk sent.
+    """
+    body = json.dumps({"message": message, "session_id": "s1"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", b"application/json")], "client": ("test", 1), "server": ("test", 80),
+    }
+    chunks = []
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+    first_token = asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        if disconnect_after_first_token:
+            await first_token.wait()
+            return {"type": "http.disconnect"}
+        # Client stays connected until the response completes
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunk = message.get("body", b"").decode()
+            chunks.append((time.perf_counter() - start, chunk, server.llm_scheduler.stats()["in_flight"]))
+            if '"token"' in chunk:
+                first_token.set()
+
+    await server.app(scope, receive, send)
+    return chunks
+
+
+async def stored_turns(server):
+    await server.conversation_writer.stop()
+    return [turn async for turn in server.storage.conversations.history("s1")]
+
+
+def test_stream_route_sends_first_token_early_and_stores_the_turn(monkeypatch):
+    server = use_fake_llm(monkeypatch, tokens=["word "] * 20, first_token_delay=0.02, token_delay=0.02)
+
+    async def run():
+        chunks = await stream_chat(server, "hello")
+        return chunks, await stored_turns(server)
+
+    chunks, turns = asyncio.run(run())
+    total = chunks[-1][0]
+    first_token_at = next(at for at, chunk, _ in chunks if '"token"' in chunk)
+    # Full reply takes ~0.4s; the first token should arrive after roughly one token delay
+    assert first_token_at < total / 2
+    # The reply holds a scheduler slot while it streams, and gives it back at the end
+    assert all(in_flight == 1 for _, chunk, in_flight in chunks if '"token"' in chunk)
+    assert server.llm_scheduler.stats()["in_flight"] == 0
+    assert parse_frames("".join(chunk for _, chunk, _ in chunks))[-1][0] == "done"
+    assert [(turn["user_message"], turn["ai_response"]) for turn in turns] == [("hello", "word " * 20)]
+
+
+def test_stream_route_sends_crisis_resources_first(monkeypatch):
+    server = use_fake_llm(monkeypatch, tokens=["I'm ", "here."])
+
+    async def run():
+        return await stream_chat(server, "I want to kill myself"), await stored_turns(server)
+
+    chunks, turns = asyncio.run(run())
+    frames = parse_frames("".join(chunk for _, chunk, _ in chunks))
+    assert [event for event, _ in frames] == ["session", "crisis", "message", "message", "done"]
+    assert frames[1][1]["emergency_contacts"]
+    assert turns[0]["ai_response"] == "I'm here."
+
+
+def test_stream_route_frees_its_slot_when_the_client_disconnects(monkeypatch):
+    server = use_fake_llm(monkeypatch, tokens=["word "] * 50, token_delay=0.01)
+
+    async def run():
+        chunks = await stream_chat(server, "hello", disconnect_after_first_token=True)
+        return chunks, await stored_turns(server)
+
+    chunks, turns = asyncio.run(run())
+    frames = parse_frames("".join(chunk for _, chunk, _ in chunks if chunk))
+    assert "done" not in [event for event, _ in frames]
+    stats = server.llm_scheduler.stats()
+    assert stats["in_flight"] == 0 and stats["sessions"] == 0
+    # Nothing half-finished is stored or left cached for the session
+    assert turns == [] and "s1" not in server.session_cache
+
+
+def _append(stored):
+    async def persist(ai_response):
+        stored.append(ai_response)
+
+    return persist
@@ -0,0 +1,212 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from pymongo.errors import BulkWriteError, DocumentTooLarge
+
+from pagination import encode_cursor, merge_pending_page
+from storage_memory import MemoryStorage
+from storage_mongo import MongoStorage
+from tests.fakes import FakeDatabase, FakeLlmChat, FakeUserMessage
+from write_behind import WriteBehindFull, WriteBehindQueue
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def turn(index, session="s"):
+    return {"id": f"{session}-{index:03d}", "session_id": session, "timestamp": START + timedelta(seconds=index)}
+
+
+def make_queue(store, **kwargs):
+    batches = []
+
+    async def insert_many(documents):
+        batches.append(len(documents))
+        store.extend(documents)
+
+    options = {"max_batch": 10, "flush_interval": 0.01}
+    options.update(kwargs)
+    return WriteBehindQueue(insert_many, key=lambda document: document["session_id"], **options), batches
+
+
+def test_batches_by_size_and_drains_on_stop():
+    store = []
+
+    async def run():
+        queue, batches = make_queue(store)
+        for index in range(25):
+            await queue.put(turn(index))
+        assert len(queue.pending("s")) == 25 - len(store)
+        await queue.stop()
+        return queue, batches
+
+    queue, batches = asyncio.run(run())
+    assert len(store) == 25
+    assert max(batches) <= 10 and sum(batches) == 25
+    assert queue.pending("s") == []
+    assert queue.stats()["flushed"] == 25
+
+
+def test_full_queue_applies_backpressure():
+    store = []
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def slow_insert(documents):
+            await gate.wait()
+            store.extend(documents)
+
+        queue = WriteBehindQueue(slow_insert, key=lambda d: d["session_id"], max_batch=1, flush_interval=0, max_queued=2)
+        for index in range(3):
+            await queue.put(turn(index))
+        # The writer holds one document and the queue holds two more, so the next put has to wait
+        blocked = asyncio.ensure_future(queue.put(turn(3)))
+        await asyncio.sleep(0.02)
+        assert not blocked.done()
+        gate.set()
+        await asyncio.wait_for(blocked, 1)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert [document["id"] for document in store] == [f"s-{index:03d}" for index in range(4)]
+
+
+def test_failed_batches_are_retried_and_partial_duplicates_accepted():
+    store, attempts = [], []
+
+    async def flaky_insert(documents):
+        attempts.append(len(documents))
+        if len(attempts) == 1:
+            raise ConnectionError("primary stepped down")
+        if len(attempts) == 2:
+            store.extend(documents[:1])
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 6, "errmsg": "host unreachable"}]})
+        # The repository skips turns stored by the partial attempt
+        store.extend(document for document in documents if document not in store)
+
+    async def run():
+        queue = WriteBehindQueue(
+            flaky_insert, key=lambda d: d["session_id"], max_batch=2, flush_interval=0.01, max_retry_delay=0.01,
+            is_transient=MongoStorage(FakeDatabase()).is_transient_error,
+        )
+        await queue.put(turn(0))
+        await queue.put(turn(1))
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    assert len(attempts) == 3 and queue.stats()["failures"] == 2
+    assert [document["id"] for document in store] == ["s-000", "s-001"]
+
+
+def test_documents_that_cannot_be_stored_are_dropped_alone():
+    store, attempts = [], []
+
+    async def insert(documents):
+        attempts.append([document["id"] for document in documents])
+        if any(document["id"] == "s-001" for document in documents):
+            raise DocumentTooLarge("BSON document too large")
+        store.extend(documents)
+
+    async def run():
+        queue = WriteBehindQueue(
+            insert, key=lambda d: d["session_id"], max_batch=3, flush_interval=0.01,
+            is_transient=MongoStorage(FakeDatabase()).is_transient_error,
+        )
+        for index in range(3):
+            await queue.put(turn(index))
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    # Not retried as a batch; the batch is split and only the bad document is lost
+    assert attempts == [["s-000", "s-001", "s-002"], ["s-000"], ["s-001"], ["s-002"]]
+    assert [document["id"] for document in store] == ["s-000", "s-002"]
+    assert queue.stats()["dropped"] == 1 and queue.pending("s") == []
+
+
+def test_put_gives_up_when_the_queue_stays_full():
+    async def run():
+        gate = asyncio.Event()
+
+        async def stalled_insert(documents):
+            await gate.wait()
+
+        queue = WriteBehindQueue(stalled_insert, key=lambda d: d["session_id"], max_batch=1, flush_interval=0, max_queued=1, put_timeout=0.02)
+        await queue.put(turn(0))
+        await queue.put(turn(1))
+        with pytest.raises(WriteBehindFull) as full:
+            await queue.put(turn(2))
+        pending = [document["id"] for document in queue.pending("s")]
+        gate.set()
+        await queue.stop()
+        return full.value, pending
+
+    full, pending = asyncio.run(run())
+    assert full.retry_after >= 1
+    # The rejected turn is not reported as pending
+    assert pending == ["s-000", "s-001"]
+
+
+def test_cancelled_put_leaves_no_pending_turn():
+    async def run():
+        gate = asyncio.Event()
+
+        async def stalled_insert(documents):
+            await gate.wait()
+
+        queue = WriteBehindQueue(stalled_insert, key=lambda d: d["session_id"], max_batch=1, flush_interval=0, max_queued=1)
+        await queue.put(turn(0))
+        await queue.put(turn(1))
+        waiting = asyncio.create_task(queue.put(turn(2)))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        pending = [document["id"] for document in queue.pending("s")]
+        gate.set()
+        await queue.stop()
+        return pending
+
+    assert asyncio.run(run()) == ["s-000", "s-001"]
+
+
+def test_chat_returns_503_when_transcripts_cannot_be_queued(monkeypatch):
+    import server
+
+    async def stalled_insert(documents):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(server, "storage", MemoryStorage())
+    monkeypatch.setattr(server, "LlmChat", FakeLlmChat)
+    monkeypatch.setattr(server, "UserMessage", FakeUserMessage)
+    monkeypatch.setattr(server, "conversation_writer", WriteBehindQueue(
+        stalled_insert, key=lambda d: d["session_id"], max_batch=1, flush_interval=0, max_queued=1, put_timeout=0.02))
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await client.post("/api/chat", json={"message": "hello", "session_id": "s"}) for _ in range(3)]
+            crisis = await client.post("/api/chat", json={"message": "I want to kill myself", "session_id": "s"})
+        await server.conversation_writer.stop(timeout=0.01)
+        return responses, crisis
+
+    responses, crisis = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200, 200, 503]
+    assert int(responses[2].headers["retry-after"]) >= 1
+    # A crisis reply is still sent when its transcript cannot be stored
+    assert crisis.status_code == 200 and crisis.json()["crisis"] is not None
+
+
+def test_history_page_merges_unflushed_turns():
+    stored = [dict(turn(index), timestamp=turn(index)["timestamp"].replace(tzinfo=None)) for index in range(3)]
+    pending = [turn(2), turn(3), turn(4)]
+
+    page, next_cursor = merge_pending_page(stored, None, pending, None, limit=4)
+    assert [document["id"] for document in page] == ["s-000", "s-001", "s-002", "s-003"]
+    assert next_cursor == encode_cursor(page[-1])
+
+    page, next_cursor = merge_pending_page([], None, pending, next_cursor, limit=4)
+    assert [document["id"] for document in page] == ["s-004"] and next_cursor is None